@@ -0,0 +1,49 @@
+"""
+Ambiente do Alembic
+Usa a mesma URL e o mesmo metadata da aplicação (app.db.database)
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db.database import Base, engine, database_url
+import app.models  # noqa: F401  (registra os modelos no metadata)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """
+    Gera o SQL das migrações sem conectar ao banco (alembic upgrade --sql)
+    """
+    context.configure(
+        url=database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """
+    Aplica as migrações usando o engine da aplicação
+    """
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,45 @@
+"""
+Índices compostos da tabela transactions
+
+O esquema base é criado por init_database.py (create_all), que já marca o
+banco com a revisão atual. Bancos existentes criados antes das migrações
+recebem os índices com: alembic upgrade head
+
+Revision ID: 0001_transaction_indexes
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_transaction_indexes"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Recentes, listagem e resumo por período
+    op.create_index(
+        "ix_transactions_user_date_created",
+        "transactions",
+        ["user_id", sa.text("transaction_date DESC"), sa.text("created_at DESC")],
+    )
+    # Saldo e conferência por carteira
+    op.create_index("ix_transactions_wallet_id", "transactions", ["wallet_id"])
+    # Gráficos por tipo/categoria no período (cobre category_id e amount no PostgreSQL)
+    op.create_index(
+        "ix_transactions_user_type_date",
+        "transactions",
+        ["user_id", "transaction_type", "transaction_date"],
+        postgresql_include=["category_id", "amount"],
+    )
+    op.create_index("ix_transactions_category_id", "transactions", ["category_id"])
+
+
+def downgrade():
+    op.drop_index("ix_transactions_category_id", table_name="transactions")
+    op.drop_index("ix_transactions_user_type_date", table_name="transactions")
+    op.drop_index("ix_transactions_wallet_id", table_name="transactions")
+    op.drop_index("ix_transactions_user_date_created", table_name="transactions")
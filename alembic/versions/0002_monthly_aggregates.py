@@ -0,0 +1,52 @@
+"""
+Tabela monthly_aggregates (rollup mensal por usuário, categoria e tipo)
+
+Cria a tabela e faz o backfill a partir das transações existentes.
+Se o create_all já criou a tabela (vazia ou parcial), ela é repreenchida.
+Para reconstruir depois: python -m app.services.monthly_aggregates rebuild
+
+Revision ID: 0002_monthly_aggregates
+Revises: 0001_transaction_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_monthly_aggregates"
+down_revision = "0001_transaction_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("monthly_aggregates"):
+        op.execute("DELETE FROM monthly_aggregates")
+    else:
+        op.create_table(
+            "monthly_aggregates",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("month", sa.Date(), nullable=False),
+            sa.Column("category_id", sa.Integer(), nullable=False),
+            sa.Column("transaction_type", sa.String(), nullable=False),
+            sa.Column("total_amount", sa.Float(), nullable=False),
+            sa.Column("transaction_count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("user_id", "month", "category_id", "transaction_type"),
+        )
+
+    if op.get_bind().dialect.name == "sqlite":
+        month = "date(transaction_date, 'start of month')"
+    else:
+        month = "CAST(date_trunc('month', transaction_date) AS DATE)"
+
+    op.execute(f"""
+        INSERT INTO monthly_aggregates
+            (user_id, month, category_id, transaction_type, total_amount, transaction_count)
+        SELECT user_id, {month}, COALESCE(category_id, 0), transaction_type, SUM(amount), COUNT(id)
+        FROM transactions
+        GROUP BY user_id, {month}, COALESCE(category_id, 0), transaction_type
+    """)
+
+
+def downgrade():
+    op.drop_table("monthly_aggregates")
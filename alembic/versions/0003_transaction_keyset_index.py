@@ -0,0 +1,27 @@
+"""
+Índice para paginação por keyset em (transaction_date, id)
+
+Revision ID: 0003_transaction_keyset_index
+Revises: 0002_monthly_aggregates
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_transaction_keyset_index"
+down_revision = "0002_monthly_aggregates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_transactions_user_date_id",
+        "transactions",
+        ["user_id", sa.text("transaction_date DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_transactions_user_date_id", table_name="transactions")
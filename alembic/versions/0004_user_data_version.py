@@ -0,0 +1,27 @@
+"""
+Versão dos dados do usuário (ETag das consultas do dashboard)
+
+Revision ID: 0004_user_data_version
+Revises: 0003_transaction_keyset_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_user_data_version"
+down_revision = "0003_transaction_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "users",
+        sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("data_version")
@@ -0,0 +1,42 @@
+"""
+Tabela outbound_messages (fila durável de envio para o WhatsApp)
+
+Revision ID: 0005_outbound_messages
+Revises: 0004_user_data_version
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_outbound_messages"
+down_revision = "0004_user_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Já criada pelo create_all de uma versão anterior do init_db
+    if sa.inspect(op.get_bind()).has_table("outbound_messages"):
+        return
+
+    op.create_table(
+        "outbound_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("remote_jid", sa.String(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_outbound_messages_id", "outbound_messages", ["id"])
+    op.create_index("ix_outbound_messages_status_id", "outbound_messages", ["status", "id"])
+    op.create_index("ix_outbound_messages_jid_id", "outbound_messages", ["remote_jid", "id"])
+
+
+def downgrade():
+    op.drop_table("outbound_messages")
@@ -0,0 +1,37 @@
+"""
+Tabela media_analyses (cache das análises de mídia por fileSha256)
+
+Revision ID: 0006_media_analyses
+Revises: 0005_outbound_messages
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_media_analyses"
+down_revision = "0005_outbound_messages"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Já criada pelo create_all de uma versão anterior do init_db
+    if sa.inspect(op.get_bind()).has_table("media_analyses"):
+        return
+
+    op.create_table(
+        "media_analyses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(), nullable=False, unique=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("result", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_media_analyses_id", "media_analyses", ["id"])
+    op.create_index("ix_media_analyses_expires_at", "media_analyses", ["expires_at"])
+
+
+def downgrade():
+    op.drop_table("media_analyses")
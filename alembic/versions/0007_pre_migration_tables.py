@@ -0,0 +1,73 @@
+"""
+Tabelas inbound_jobs, processed_messages e conversation_memories
+
+Foram criadas só pelo create_all antes das migrações existirem; bancos
+anteriores a elas as recebem aqui. Bancos em que o create_all já as criou
+são mantidos como estão.
+
+Revision ID: 0007_pre_migration_tables
+Revises: 0006_media_analyses
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_pre_migration_tables"
+down_revision = "0006_media_analyses"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("inbound_jobs"):
+        op.create_table(
+            "inbound_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("remote_jid", sa.String(), nullable=False),
+            sa.Column("message_id", sa.String(), nullable=True),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("available_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_inbound_jobs_id", "inbound_jobs", ["id"])
+        op.create_index("ix_inbound_jobs_remote_jid", "inbound_jobs", ["remote_jid"])
+        op.create_index("ix_inbound_jobs_status", "inbound_jobs", ["status"])
+        op.create_index("ix_inbound_jobs_available_at", "inbound_jobs", ["available_at"])
+
+    if not inspector.has_table("processed_messages"):
+        op.create_table(
+            "processed_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("message_id", sa.String(), nullable=False, unique=True),
+            sa.Column("remote_jid", sa.String(), nullable=False),
+            sa.Column("response", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        )
+        op.create_index("ix_processed_messages_id", "processed_messages", ["id"])
+        op.create_index("ix_processed_messages_expires_at", "processed_messages", ["expires_at"])
+
+    if not inspector.has_table("conversation_memories"):
+        op.create_table(
+            "conversation_memories",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+            sa.Column("summary", sa.Text(), nullable=True),
+            sa.Column("messages", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_conversation_memories_id", "conversation_memories", ["id"])
+
+
+def downgrade():
+    # As tabelas fazem parte do esquema base (create_all); não são removidas
+    pass
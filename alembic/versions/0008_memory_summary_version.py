@@ -0,0 +1,27 @@
+"""
+Versão do resumo da memória de conversa (gravação otimista do resumo)
+
+Revision ID: 0008_memory_summary_version
+Revises: 0007_pre_migration_tables
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_memory_summary_version"
+down_revision = "0007_pre_migration_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "conversation_memories",
+        sa.Column("summary_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("conversation_memories") as batch_op:
+        batch_op.drop_column("summary_version")
@@ -1,20 +1,22 @@
 """
 Endpoints de Gráficos
 Baseado nas chamadas HTTP do N8n: [FLUXO PRINCIPAL]
-GET /api/charts/bar e GET /api/charts/pizza
+GET /api/charts/bar, GET /api/charts/pizza e GET /api/charts/series
+Versões em imagem: GET /api/charts/bar.png e GET /api/charts/pizza.png
 """
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date, timedelta
-from collections import defaultdict
 import io
 import base64
 
 from app.db.database import get_db
 from app.core.security import get_current_user
-from app.models import User, Transaction, Category
+from app.core.http_cache import conditional_get, CACHE_CONTROL
+from app.models import User
 from app.services.transaction_service import transaction_service
+from app.services.chart_renderer import chart_renderer
 
 router = APIRouter()
 
@@ -24,6 +26,7 @@ async def get_bar_chart(
     target_date: Optional[date] = Query(None, alias="date"),
     descricao: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
     """
@@ -42,47 +45,101 @@ async def get_bar_chart(
     start_date = target_date - timedelta(days=6)
     end_date = target_date
 
-    # Buscar transações do período
-    transactions = transaction_service.get_all(
+    # Agrupamento por dia e filtro de descrição no banco
+    series = transaction_service.get_series(
         db,
         current_user,
-        start_date=start_date,
-        end_date=end_date
+        start_date,
+        end_date,
+        bucket="day",
+        title_filter=descricao
     )
 
-    # Filtrar por descrição se fornecida
-    if descricao:
-        transactions = [t for t in transactions if descricao.lower() in t.title.lower()]
+    result = [
+        {"data": day, "receitas": income, "despesas": expense, "saldo": balance}
+        for day, income, expense, balance in zip(
+            series["dates"], series["income"], series["expense"], series["balance"], strict=True
+        )
+    ]
 
-    # Agrupar por dia
-    daily_data = defaultdict(lambda: {"receitas": 0.0, "despesas": 0.0})
+    return {
+        "periodo": {
+            "inicio": start_date.isoformat(),
+            "fim": end_date.isoformat()
+        },
+        "dados": result
+    }
 
-    for transaction in transactions:
-        day_key = transaction.transaction_date.isoformat()
-        if transaction.transaction_type == "income":
-            daily_data[day_key]["receitas"] += transaction.amount
-        else:
-            daily_data[day_key]["despesas"] += transaction.amount
 
-    # Garantir que todos os 7 dias estejam no resultado
-    result = []
-    current_date = start_date
-    while current_date <= end_date:
-        day_key = current_date.isoformat()
-        result.append({
-            "data": day_key,
-            "receitas": daily_data[day_key]["receitas"],
-            "despesas": daily_data[day_key]["despesas"],
-            "saldo": daily_data[day_key]["receitas"] - daily_data[day_key]["despesas"]
-        })
-        current_date += timedelta(days=1)
+@router.get("/bar.png")
+async def get_bar_chart_image(
+    target_date: Optional[date] = Query(None, alias="date"),
+    descricao: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    """
+    Gráfico de barras dos últimos 7 dias em PNG
+
+    GET /api/charts/bar.png?date=YYYY-MM-DD&descricao=optional
+    Headers: apikey
+    """
+    image = await chart_renderer.bar_chart(db, current_user, target_date, descricao)
+    return Response(content=image, media_type="image/png", headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+@router.get("/series")
+async def get_series_chart(
+    start_date: Optional[date] = Query(None, alias="data_inicio"),
+    end_date: Optional[date] = Query(None, alias="data_fim"),
+    bucket: str = Query("day", alias="agrupamento", pattern="^(day|week|month|year)$"),
+    descricao: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None, alias="categoria_id"),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    """
+    Série temporal de receitas e despesas para gráficos
+
+    GET /api/charts/series?data_inicio=YYYY-MM-DD&data_fim=YYYY-MM-DD&agrupamento=day|week|month|year
+    Headers: apikey
+    Query params: descricao, categoria_id (opcionais)
+
+    Se não informado, usa os últimos 30 dias até hoje. Semanas começam na
+    segunda-feira. Retorna arrays colunares alinhados por posição
+    (um ponto por intervalo, inclusive os sem transações).
+    """
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=29)
+
+    try:
+        series = transaction_service.get_series(
+            db,
+            current_user,
+            start_date,
+            end_date,
+            bucket=bucket,
+            title_filter=descricao,
+            category_id=category_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
     return {
         "periodo": {
             "inicio": start_date.isoformat(),
             "fim": end_date.isoformat()
         },
-        "dados": result
+        "agrupamento": bucket,
+        "datas": series["dates"],
+        "receitas": series["income"],
+        "despesas": series["expense"],
+        "saldo": series["balance"],
+        "quantidade": series["count"]
     }
 
 
@@ -91,6 +148,7 @@ async def get_pizza_chart(
     target_date: Optional[date] = Query(None, alias="date"),
     transaction_type: Optional[str] = Query("expense", alias="tipo"),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
     """
@@ -114,28 +172,13 @@ async def get_pizza_chart(
     else:
         end_date = date(target_date.year, target_date.month + 1, 1) - timedelta(days=1)
 
-    # Buscar transações do período
-    transactions = transaction_service.get_all(
+    # Totais do mês por categoria (rollup mensal)
+    category_data = dict(transaction_service.get_category_distribution(
         db,
         current_user,
-        start_date=start_date,
-        end_date=end_date,
-        transaction_type=transaction_type
-    )
-
-    # Agrupar por categoria
-    category_data = defaultdict(float)
-
-    for transaction in transactions:
-        if transaction.category_id:
-            category = db.query(Category).filter(
-                Category.id == transaction.category_id
-            ).first()
-            category_name = category.name if category else "Sem categoria"
-        else:
-            category_name = "Sem categoria"
-
-        category_data[category_name] += transaction.amount
+        start_date,
+        transaction_type
+    ))
 
     # Calcular total e percentuais
     total = sum(category_data.values())
@@ -158,3 +201,21 @@ async def get_pizza_chart(
         "total": total,
         "distribuicao": result
     }
+
+
+@router.get("/pizza.png")
+async def get_pizza_chart_image(
+    target_date: Optional[date] = Query(None, alias="date"),
+    transaction_type: str = Query("expense", alias="tipo", pattern="^(expense|income)$"),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    """
+    Gráfico de pizza por categoria do mês em PNG
+
+    GET /api/charts/pizza.png?date=YYYY-MM-DD&tipo=expense
+    Headers: apikey
+    """
+    image = await chart_renderer.pizza_chart(db, current_user, target_date, transaction_type)
+    return Response(content=image, media_type="image/png", headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -9,8 +9,9 @@ from datetime import date, datetime, timedelta
 
 from app.db.database import get_db
 from app.core.security import get_current_user
+from app.core.http_cache import conditional_get
 from app.models import User
-from app.services.transaction_service import transaction_service
+from app.services.transaction_service import transaction_service, consecutive_periods
 
 router = APIRouter()
 
@@ -20,6 +21,7 @@ async def get_dashboard_summary(
     start_date: Optional[date] = Query(None, alias="data_inicio"),
     end_date: Optional[date] = Query(None, alias="data_fim"),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
     """
@@ -62,3 +64,91 @@ async def get_dashboard_summary(
         "saldo": summary["balance"],
         "quantidade_transacoes": summary["transaction_count"]
     }
+
+
+@router.get("/summary/periods")
+async def get_dashboard_summary_periods(
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    """
+    Resumo do mês atual, mês anterior e ano até hoje em uma única consulta
+
+    GET /api/dashboard/summary/periods
+    Headers: apikey
+    """
+    today = date.today()
+    month_start = date(today.year, today.month, 1)
+    last_month_end = month_start - timedelta(days=1)
+
+    periods = {
+        "mes_atual": (month_start, today),
+        "mes_anterior": (date(last_month_end.year, last_month_end.month, 1), last_month_end),
+        "ano_atual": (date(today.year, 1, 1), today)
+    }
+
+    summaries = transaction_service.get_summaries(db, current_user, periods)
+
+    return {
+        name: {
+            "periodo": {
+                "data_inicio": start_date.isoformat(),
+                "data_fim": end_date.isoformat()
+            },
+            "total_receitas": summaries[name]["total_income"],
+            "total_despesas": summaries[name]["total_expense"],
+            "saldo": summaries[name]["balance"],
+            "quantidade_transacoes": summaries[name]["transaction_count"]
+        }
+        for name, (start_date, end_date) in periods.items()
+    }
+
+
+@router.get("/compare")
+async def compare_periods(
+    bucket: str = Query("month", alias="agrupamento", pattern="^(week|month|year)$"),
+    count: int = Query(2, alias="quantidade", ge=2, le=24),
+    transaction_type: str = Query("expense", alias="tipo", pattern="^(expense|income)$"),
+    target_date: Optional[date] = Query(None, alias="date"),
+    current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    """
+    Compara os totais por categoria dos últimos N períodos
+
+    GET /api/dashboard/compare?agrupamento=month&quantidade=2&tipo=expense&date=YYYY-MM-DD
+    Headers: apikey
+
+    Períodos consecutivos até o que contém a data (padrão: hoje), do mais
+    antigo para o mais recente. Arrays alinhados por período; variação e
+    variação percentual em relação ao período anterior (null no primeiro).
+    """
+    periods = consecutive_periods(target_date or date.today(), bucket, count)
+    comparison = transaction_service.compare_periods(db, current_user, periods, transaction_type)
+
+    return {
+        "tipo": transaction_type,
+        "agrupamento": bucket,
+        "periodos": [
+            {
+                "data_inicio": period["start"].isoformat(),
+                "data_fim": period["end"].isoformat(),
+                "total": period["total"],
+                "variacao": period["delta"],
+                "variacao_percentual": period["change"]
+            }
+            for period in comparison["periods"]
+        ],
+        "categorias": [
+            {
+                "categoria_id": category["category_id"],
+                "categoria": category["name"],
+                "totais": category["totals"],
+                "variacao": category["deltas"],
+                "variacao_percentual": category["changes"]
+            }
+            for category in comparison["categories"]
+        ]
+    }
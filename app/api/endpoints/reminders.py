@@ -10,6 +10,7 @@ from datetime import datetime
 from app.db.database import get_db
 from app.core.security import get_current_user
 from app.models import User, Reminder
+from app.services.user_service import user_service
 from app.schemas.reminder import (
     ReminderCreate,
     ReminderUpdate,
@@ -47,6 +48,7 @@ async def create_reminder(
     )
 
     db.add(new_reminder)
+    user_service.bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(new_reminder)
 
@@ -146,6 +148,7 @@ async def update_reminder(
         setattr(reminder, field, value)
 
     db.add(reminder)
+    user_service.bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(reminder)
 
@@ -176,6 +179,7 @@ async def delete_reminder(
         )
 
     db.delete(reminder)
+    user_service.bump_data_version(db, current_user.id)
     db.commit()
 
     return None
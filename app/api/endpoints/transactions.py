@@ -2,24 +2,39 @@
 Endpoints de Transações
 Baseado nas chamadas HTTP do N8n: [FLUXO PRINCIPAL]
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
+import csv
+import io
+import json
 
-from app.db.database import get_db
+from app.db.database import get_db, SessionLocal
 from app.core.security import get_current_user
-from app.models import User
+from app.core.http_cache import conditional_get
+from app.models import User, Wallet
 from app.schemas.transaction import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
     TransactionListResponse
 )
-from app.services.transaction_service import transaction_service
+from app.services.transaction_service import transaction_service, EXPORT_COLUMNS
+from app.services.statement_import import statement_import, StatementImportError
 
 router = APIRouter()
 
+# Tamanho da página quando apenas o cursor é informado
+DEFAULT_PAGE_SIZE = 100
+
+# Tamanho aproximado de cada bloco enviado na exportação (bytes)
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Máximo de duplicatas/erros listados na resposta da importação
+IMPORT_REPORT_LIMIT = 500
+
 
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
@@ -47,10 +62,83 @@ async def create_transaction(
     return new_transaction
 
 
+# Função síncrona: o FastAPI executa em threadpool, sem bloquear o event loop
+@router.post("/import")
+def import_transactions(
+    file: UploadFile = File(..., description="Extrato em CSV ou OFX"),
+    file_format: Optional[str] = Form(None, alias="formato", pattern="^(csv|ofx)$"),
+    date_column: Optional[str] = Form(None, alias="coluna_data"),
+    title_column: Optional[str] = Form(None, alias="coluna_descricao"),
+    amount_column: Optional[str] = Form(None, alias="coluna_valor"),
+    type_column: Optional[str] = Form(None, alias="coluna_tipo"),
+    wallet_id: Optional[int] = Form(None, alias="carteira_id"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa extrato bancário (CSV ou OFX)
+
+    POST /api/transactions/import
+    Headers: apikey
+    Body (multipart/form-data):
+        file: arquivo .csv ou .ofx
+        formato: csv|ofx (opcional, detectado pela extensão)
+        coluna_data, coluna_descricao, coluna_valor, coluna_tipo: nomes das
+            colunas do CSV (opcionais, detectados automaticamente)
+        carteira_id: carteira de destino (opcional, padrão do usuário)
+
+    Transações já cadastradas (mesma data, valor e descrição) não são
+    inseridas novamente e aparecem em "duplicadas".
+    """
+    if wallet_id is not None:
+        wallet = db.query(Wallet).filter(
+            Wallet.id == wallet_id,
+            Wallet.user_id == current_user.id
+        ).first()
+
+        if not wallet:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Carteira não encontrada"
+            )
+
+    column_map = {
+        "date": date_column,
+        "title": title_column,
+        "amount": amount_column,
+        "type": type_column
+    }
+
+    try:
+        result = statement_import.import_file(
+            db,
+            current_user,
+            file.filename or "",
+            file.file.read(),
+            file_format,
+            column_map,
+            wallet_id
+        )
+    except StatementImportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        ) from e
+
+    return {
+        "inseridas": result.inserted,
+        "total_duplicadas": len(result.duplicates),
+        "duplicadas": result.duplicates[:IMPORT_REPORT_LIMIT],
+        "total_erros": len(result.errors),
+        "erros": result.errors[:IMPORT_REPORT_LIMIT]
+    }
+
+
 @router.get("/recent", response_model=List[TransactionResponse])
 async def get_recent_transactions(
     limit: int = Query(10, ge=1, le=100),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
     """
@@ -63,6 +151,67 @@ async def get_recent_transactions(
     return transactions
 
 
+@router.get("/export")
+async def export_transactions(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    start_date: Optional[date] = Query(None, alias="data_inicio"),
+    end_date: Optional[date] = Query(None, alias="data_fim"),
+    category_id: Optional[int] = Query(None, alias="categoria_id"),
+    transaction_type: Optional[str] = Query(None, alias="tipo"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exporta transações em CSV ou NDJSON (streaming)
+
+    GET /api/transactions/export?format=csv|ndjson&data_inicio=YYYY-MM-DD&data_fim=YYYY-MM-DD
+    Headers: apikey
+
+    As linhas são lidas do banco em lotes e enviadas conforme são geradas:
+    o uso de memória não depende do tamanho do período.
+    """
+    user_id = current_user.id
+
+    def generate():
+        # Sessão própria: a resposta continua sendo enviada após o endpoint retornar
+        db = SessionLocal()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == "csv" else None
+
+        try:
+            if writer:
+                writer.writerow(EXPORT_COLUMNS)
+
+            for row in transaction_service.iter_export(
+                db, user_id, start_date, end_date, category_id, transaction_type
+            ):
+                if writer:
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(
+                        dict(zip(EXPORT_COLUMNS, row, strict=True)),
+                        default=str,
+                        ensure_ascii=False
+                    ))
+                    buffer.write("\n")
+
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+            yield buffer.getvalue()
+        finally:
+            db.close()
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transacoes.{export_format}"'}
+    )
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: int,
@@ -86,12 +235,14 @@ async def get_transaction(
 
 @router.get("/", response_model=List[TransactionResponse])
 async def get_all_transactions(
+    response: Response,
     start_date: Optional[date] = Query(None, alias="data_inicio"),
     end_date: Optional[date] = Query(None, alias="data_fim"),
     category_id: Optional[int] = Query(None, alias="categoria_id"),
     transaction_type: Optional[str] = Query(None, alias="tipo"),
     limit: Optional[int] = Query(None, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    offset: int = Query(0, ge=0, description="Obsoleto: prefira cursor"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -100,17 +251,43 @@ async def get_all_transactions(
 
     GET /api/transactions?data_inicio=YYYY-MM-DD&data_fim=YYYY-MM-DD&categoria_id=1
     Headers: apikey
+
+    Paginação: informe limit; se houver mais páginas, o cabeçalho
+    X-Next-Cursor traz o valor a ser enviado em cursor na próxima chamada.
     """
-    transactions = transaction_service.get_all(
-        db,
-        current_user,
-        start_date,
-        end_date,
-        category_id,
-        transaction_type,
-        limit,
-        offset
-    )
+    # Paginação por offset (compatibilidade) ou listagem completa
+    if offset or not (limit or cursor):
+        return transaction_service.get_all(
+            db,
+            current_user,
+            start_date,
+            end_date,
+            category_id,
+            transaction_type,
+            limit,
+            offset
+        )
+
+    try:
+        transactions, next_cursor = transaction_service.get_page(
+            db,
+            current_user,
+            limit or DEFAULT_PAGE_SIZE,
+            cursor,
+            start_date,
+            end_date,
+            category_id,
+            transaction_type
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        ) from e
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
     return transactions
 
 
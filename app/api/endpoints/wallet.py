@@ -9,6 +9,7 @@ from datetime import date, datetime, timedelta
 
 from app.db.database import get_db
 from app.core.security import get_current_user
+from app.core.http_cache import conditional_get
 from app.models import User, Wallet
 from app.services.transaction_service import transaction_service
 
@@ -18,6 +19,7 @@ router = APIRouter()
 @router.get("/current")
 async def get_current_wallet(
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
     """
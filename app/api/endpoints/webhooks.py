@@ -2,7 +2,7 @@
 Webhooks - Recebe mensagens do WhatsApp
 Baseado no N8n: [FLUXO PRINCIPAL] - Webhook /finmec
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from loguru import logger
 
@@ -10,17 +10,16 @@ from app.db.database import get_db
 from app.schemas.webhook import WebhookRequest
 from app.schemas.user import UserActivationRequest
 from app.services.user_service import user_service
-from app.services.message_processor import message_processor
-from app.services.langgraph_agent import financial_agent
-from app.integrations.uazapi import uazapi_client
+from app.services.inbound_queue import inbound_queue, inbound_worker_pool
+from app.services.idempotency import message_idempotency
+from app.services.outbound_queue import outbound_dispatcher
 
 router = APIRouter()
 
 
-@router.post("/finmec")
+@router.post("/finmec", status_code=status.HTTP_202_ACCEPTED)
 async def webhook_whatsapp(
     webhook_data: WebhookRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -39,81 +38,41 @@ async def webhook_whatsapp(
 
     Fluxo:
     1. Validar webhook
-    2. Buscar ou criar usuário
-    3. Verificar se está ativo
-    4. Processar mensagem baseado no tipo
-    5. Enviar para LangGraph Agent
-    6. Responder no WhatsApp
+    2. Descartar reentregas (mesmo message.id) antes de qualquer trabalho
+    3. Persistir na fila de entrada (inbound_jobs)
+    4. Responder 202 imediatamente
+
+    O processamento (usuário, mídia, LangGraph Agent e resposta no WhatsApp)
+    é feito pelos workers em app.services.inbound_queue / webhook_service.
     """
     try:
-        remote_jid = webhook_data.remoteJid
-        message = webhook_data.message
-        message_type = message.type
-        message_id = message.id
-
-        logger.info(f"📩 Webhook recebido de {remote_jid} - Tipo: {message_type}")
-
-        # 1. Buscar ou criar usuário
-        user, is_new = user_service.get_or_create_user(db, remote_jid)
-
-        # 2. Verificar se usuário está ativo
-        if not user.is_active:
-            # Usuário inativo (não pagou)
-            logger.warning(f"⚠️ Usuário inativo tentou usar o sistema: {remote_jid}")
-
-            inactive_message = """👋 Olá! Obrigado por entrar em contato.
-
-Para usar o sistema de controle financeiro, você precisa ativar sua conta primeiro.
-
-Entre em contato conosco para mais informações sobre como ativar."""
-
-            # Enviar mensagem de forma assíncrona
-            background_tasks.add_task(
-                uazapi_client.send_text,
-                remote_jid,
-                inactive_message
-            )
-
-            return {"status": "user_inactive", "message": "Usuário inativo"}
-
-        # 3. Processar mensagem baseado no tipo
-        try:
-            processed_text = await message_processor.route_and_process(
-                message_type=message_type,
-                message_data=message.dict(),
-                message_id=message_id
-            )
-        except Exception as e:
-            logger.error(f"❌ Erro ao processar mensagem: {e}")
-            processed_text = "Desculpe, tive um problema ao processar sua mensagem."
-
-        logger.info(f"📝 Texto processado: {processed_text[:100]}...")
-
-        # 4. Enviar para LangGraph Agent
-        try:
-            agent_response = await financial_agent.process_message(
-                user=user,
-                message_text=processed_text,
-                db=db
-            )
-        except Exception as e:
-            logger.error(f"❌ Erro no agent: {e}", exc_info=True)
-            agent_response = "Desculpe, tive um problema ao processar sua solicitação. Tente novamente em alguns instantes."
-
-        logger.info(f"🤖 Agent respondeu: {agent_response[:100]}...")
-
-        # 5. Responder no WhatsApp (em background para não bloquear)
-        background_tasks.add_task(
-            uazapi_client.send_text,
-            remote_jid,
-            agent_response
-        )
+        message_id = webhook_data.message.id
+
+        if message_id:
+            # Camada 1: LRU em memória (sem acesso ao banco)
+            # Camada 2: restrição única em processed_messages
+            if (message_idempotency.seen_recently(message_id)
+                    or not message_idempotency.register(db, message_id, webhook_data.remoteJid)):
+                logger.info(f"♻️ Mensagem duplicada ignorada: {message_id}")
+                return {
+                    "status": "duplicate",
+                    "message": "Mensagem já recebida",
+                    "response": message_idempotency.cached_response(message_id)
+                }
+
+        job = inbound_queue.enqueue(db, webhook_data)
+        inbound_worker_pool.notify()
+
+        # Registro e job já commitados: reentregas podem ser barradas no LRU
+        if message_id:
+            message_idempotency.remember(message_id)
+
+        logger.info(f"📩 Webhook enfileirado de {webhook_data.remoteJid} - Tipo: {webhook_data.message.type} - Job: {job.id}")
 
         return {
-            "status": "success",
-            "message": "Mensagem processada com sucesso",
-            "user_id": user.id,
-            "processed": True
+            "status": "queued",
+            "message": "Mensagem recebida",
+            "job_id": job.id
         }
 
     except Exception as e:
@@ -124,10 +83,36 @@ Entre em contato conosco para mais informações sobre como ativar."""
         )
 
 
+@router.post("/finmec/{message_id}/replay")
+async def replay_message_response(
+    message_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Reenvia no WhatsApp a resposta original de uma mensagem já processada
+
+    POST /webhook/finmec/{message_id}/replay
+    """
+    record = message_idempotency.get(db, message_id)
+
+    if not record or not record.response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resposta não encontrada para esta mensagem"
+        )
+
+    outbound_dispatcher.send(db, record.remote_jid, record.response)
+
+    return {
+        "status": "success",
+        "message_id": message_id,
+        "response": record.response
+    }
+
+
 @router.post("/ativacao")
 async def webhook_user_activation(
     activation_data: UserActivationRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -196,14 +181,8 @@ Agora você pode começar a usar o sistema de controle financeiro via WhatsApp!
 
 Digite *ajuda* para ver os comandos disponíveis."""
 
-        # 4. Enviar mensagem via WhatsApp (em background)
-        background_tasks.add_task(
-            uazapi_client.send_text,
-            telefone,
-            welcome_message,
-            read_chat=True,
-            link_preview=True
-        )
+        # 4. Enviar mensagem via WhatsApp (fila de saída)
+        outbound_dispatcher.send(db, remote_jid, welcome_message)
 
         logger.info(f"✅ Usuário ativado e mensagem enviada: {telefone}")
 
@@ -232,6 +211,7 @@ async def test_webhook():
         "message": "Webhook está funcionando!",
         "endpoints": [
             "/webhook/finmec - Recebe mensagens do WhatsApp",
+            "/webhook/finmec/{message_id}/replay - Reenvia a resposta de uma mensagem",
             "/webhook/ativacao - Ativa usuários"
         ]
     }
@@ -0,0 +1,123 @@
+"""
+Circuit breaker para integrações externas
+
+Acompanha o resultado das últimas chamadas (janela deslizante). Quando a
+taxa de falhas passa do limite, o circuito abre e as chamadas falham na
+hora (sem esperar timeouts) durante o tempo de resfriamento; depois, uma
+chamada de teste (meio-aberto) decide se o circuito fecha ou abre de novo.
+
+Métricas (app.core.metrics), com o nome do breaker como prefixo:
+    <nome>.breaker_state     gauge: 0 fechado, 1 meio-aberto, 2 aberto
+    <nome>.breaker_opened    contador de aberturas
+    <nome>.breaker_rejected  chamadas recusadas com o circuito aberto
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from app.core.metrics import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """
+    Chamada recusada: circuito aberto
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por taxa de falhas em janela deslizante
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown_seconds: float = 30.0
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+
+        self._results: deque = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+        metrics.set_gauge(f"{name}.breaker_state", _STATE_GAUGE[CLOSED])
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str):
+        self._state = state
+        metrics.set_gauge(f"{self.name}.breaker_state", _STATE_GAUGE[state])
+
+    def before_call(self):
+        """
+        Verifica se a chamada pode seguir
+
+        Raises:
+            CircuitOpenError: Circuito aberto (ou chamada de teste já em andamento)
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            # Uma chamada de teste por vez; se ela não reportar o resultado
+            # (ex.: tarefa cancelada), outra é liberada após o resfriamento
+            now = time.monotonic()
+            if state == HALF_OPEN and (
+                self._trial_started is None or now - self._trial_started >= self.cooldown_seconds
+            ):
+                self._trial_started = now
+                return
+
+        metrics.increment(f"{self.name}.breaker_rejected")
+        raise CircuitOpenError(f"{self.name}: circuito aberto")
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._results.clear()
+                self._trial_started = None
+                self._set_state(CLOSED)
+            self._results.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_started = None
+                self._open()
+                return
+
+            self._results.append(False)
+            failures = self._results.count(False)
+            if (
+                self._state == CLOSED
+                and len(self._results) >= self.min_calls
+                and failures / len(self._results) >= self.failure_rate
+            ):
+                self._open()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+        metrics.increment(f"{self.name}.breaker_opened")
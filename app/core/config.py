@@ -53,6 +53,81 @@ class Settings(BaseSettings):
     # N8n Webhooks
     N8N_WEBHOOK_BASE_URL: Optional[str] = None
 
+    # Fila de entrada do webhook (/webhook/finmec)
+    INBOUND_WORKERS: int = 4
+    INBOUND_MAX_ATTEMPTS: int = 5
+    INBOUND_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    INBOUND_RETRY_BACKOFF_SECONDS: int = 10
+    INBOUND_POLL_INTERVAL_SECONDS: float = 1.0
+
+    # Fila de saída (respostas enviadas pelo WhatsApp)
+    OUTBOUND_WORKERS: int = 4
+    OUTBOUND_CLAIM_BATCH: int = 10
+    OUTBOUND_MAX_ATTEMPTS: int = 6
+    OUTBOUND_VISIBILITY_TIMEOUT_SECONDS: int = 120
+    OUTBOUND_RETRY_BACKOFF_SECONDS: float = 2.0
+    OUTBOUND_RETRY_MAX_SECONDS: float = 300.0
+    OUTBOUND_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOUND_RATE_PER_SECOND: float = 10.0
+    OUTBOUND_BURST: int = 20
+    OUTBOUND_RECIPIENT_RATE_PER_SECOND: float = 1.0
+    OUTBOUND_RECIPIENT_BURST: int = 3
+    OUTBOUND_MAX_MESSAGE_CHARS: int = 4096
+
+    # Idempotência do webhook (por ID da mensagem do WhatsApp)
+    IDEMPOTENCY_LRU_SIZE: int = 10000
+    IDEMPOTENCY_TTL_HOURS: int = 72
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: int = 3600
+
+    # Agrupamento de rajadas por usuário na fila de entrada (0 = desativado)
+    COALESCE_WINDOW_MS: int = 0
+    COALESCE_MAX_WAIT_MS: int = 5000
+
+    # Memória de conversa do agente
+    MEMORY_TOKEN_BUDGET: int = 1500
+    MEMORY_SUMMARY_MAX_TOKENS: int = 300
+
+    # Fast path (registro de transações simples sem LLM)
+    FAST_PATH_ENABLED: bool = True
+    FAST_PATH_MIN_CONFIDENCE: float = 0.85
+
+    # Conferência periódica dos saldos das carteiras (0 = desativado)
+    WALLET_RECONCILE_INTERVAL_SECONDS: int = 86400
+    WALLET_RECONCILE_AUTOFIX: bool = False
+
+    # Cliente HTTP da Uazapi (pool de conexões compartilhado)
+    UAZAPI_MAX_CONNECTIONS: int = 20
+    UAZAPI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    UAZAPI_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    UAZAPI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    UAZAPI_HTTP2: bool = False
+
+    # Mídias recebidas (download em streaming para arquivo temporário)
+    MEDIA_MAX_BYTES: int = 20 * 1024 * 1024
+    MEDIA_SPOOL_MEMORY_BYTES: int = 1024 * 1024
+
+    # Cache das análises de mídia por fileSha256 (LRU em memória + banco com TTL)
+    MEDIA_CACHE_LRU_SIZE: int = 2000
+    MEDIA_CACHE_TTL_DAYS: int = 30
+    MEDIA_CACHE_SWEEP_INTERVAL_SECONDS: int = 3600
+
+    # Cliente HTTP do Gemini (pool, novas tentativas e circuit breaker)
+    GEMINI_MAX_CONNECTIONS: int = 10
+    GEMINI_TIMEOUT_SECONDS: float = 25.0
+    GEMINI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    GEMINI_MAX_RETRIES: int = 2
+    GEMINI_RETRY_BASE_SECONDS: float = 0.5
+    GEMINI_RETRY_MAX_SECONDS: float = 8.0
+    GEMINI_DEADLINE_SECONDS: float = 45.0  # Todas as tentativas de uma chamada
+    GEMINI_BREAKER_FAILURE_RATE: float = 0.5
+    GEMINI_BREAKER_WINDOW: int = 20
+    GEMINI_BREAKER_MIN_CALLS: int = 6
+    GEMINI_BREAKER_COOLDOWN_SECONDS: float = 30.0
+
+    # Gráficos em imagem (processos de renderização e cache em bytes)
+    CHART_RENDER_WORKERS: int = 2
+    CHART_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
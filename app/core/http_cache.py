@@ -0,0 +1,71 @@
+"""
+GET condicional (ETag / If-None-Match) nas consultas do dashboard
+
+A ETag vem da versão dos dados do usuário (User.data_version), incrementada
+a cada escrita em transações, lembretes e carteiras. Se o cliente já tem a
+versão atual, a resposta é 304 sem consultar as transações: apenas a busca
+do usuário pela API key.
+"""
+from datetime import date
+from fastapi import Depends, Request, Response
+
+from app.core.security import get_current_user
+from app.models import User
+
+# Clientes devem revalidar sempre (a resposta muda a cada escrita)
+CACHE_CONTROL = "private, no-cache"
+
+
+class NotModified(Exception):
+    """
+    A versão do cliente é a atual: responder 304
+    """
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def user_etag(user: User) -> str:
+    """
+    ETag fraca da versão dos dados do usuário
+    Inclui a data de hoje: consultas sem data usam o dia/mês atual
+    """
+    return f'W/"{user.id}-{user.data_version or 0}-{date.today():%Y%m%d}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+) -> str:
+    """
+    Dependency: define ETag e Cache-Control na resposta e interrompe com
+    NotModified se o If-None-Match do cliente corresponder
+
+    Returns:
+        ETag (para endpoints que devolvem Response diretamente)
+    """
+    etag = user_etag(current_user)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise NotModified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return etag
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    """
+    Exception handler: 304 sem corpo
+    """
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": CACHE_CONTROL})
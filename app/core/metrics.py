@@ -0,0 +1,64 @@
+"""
+Métricas simples em memória (contadores e gauges)
+Expostas em GET /metrics
+"""
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    """
+    Registro de métricas do processo (thread-safe)
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1):
+        """
+        Incrementa um contador
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        """
+        Define o valor atual de um gauge
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name: str) -> float:
+        """
+        Valor atual de um contador ou gauge
+        """
+        with self._lock:
+            if name in self._gauges:
+                return self._gauges[name]
+            return self._counters.get(name, 0)
+
+    def ratio(self, hits: str, misses: str) -> float:
+        """
+        Taxa de acerto entre dois contadores (0 a 1)
+        """
+        with self._lock:
+            h = self._counters.get(hits, 0)
+            m = self._counters.get(misses, 0)
+        return h / (h + m) if (h + m) else 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Cópia de todas as métricas
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges)
+            }
+
+
+# Instância global
+metrics = Metrics()
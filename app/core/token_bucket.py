@@ -0,0 +1,56 @@
+"""
+Token bucket assíncrono para limitar a taxa de chamadas
+
+O balde enche a `rate` fichas por segundo até `burst`; cada chamada consome
+uma ficha e, com o balde vazio, espera (asyncio.sleep) até a próxima.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Limite de taxa com rajada (uso em um único event loop)
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def full(self) -> bool:
+        """
+        Balde cheio (sem uso recente; pode ser descartado)
+        """
+        self._refill()
+        return self._tokens >= self.burst
+
+    def reserve(self) -> float:
+        """
+        Consome uma ficha e devolve quantos segundos esperar por ela (0 se disponível).
+        A ficha fica reservada: chamadas seguintes esperam a vez delas.
+        """
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def acquire(self) -> float:
+        """
+        Espera por uma ficha
+
+        Returns:
+            Segundos esperados
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
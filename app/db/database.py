@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.query_counter import install_query_counter
 
 # Ajustar URL do banco para SQLAlchemy 1.4+
 # Converte postgres:// para postgresql:// se necessário
@@ -16,6 +17,9 @@ engine = create_engine(
     echo=settings.DEBUG
 )
 
+# Contagem de consultas por requisição (X-Query-Count em modo DEBUG)
+install_query_counter(engine)
+
 # Criar SessionLocal para interagir com o banco
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -1,18 +1,38 @@
 """
 Script para inicializar o banco de dados
 """
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from app.db.database import engine, Base
 from app.models import Category, PaymentMethod, TransactionType
 from loguru import logger
 
 
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
 def init_db():
     """
-    Cria todas as tabelas no banco de dados
+    Cria todas as tabelas no banco de dados e sincroniza as migrações.
+    Banco novo: create_all já inclui tabelas e índices, então só marca a revisão atual.
+    Banco existente: aplica apenas as migrações pendentes (alembic upgrade head);
+    create_all não roda antes, senão as tabelas novas já existiriam quando a
+    migração fosse criá-las (e o backfill da 0002 não rodaria).
     """
+    alembic_config = Config(str(ALEMBIC_INI))
+
+    if inspect(engine).has_table("transactions"):
+        logger.info("Aplicando migrações pendentes...")
+        command.upgrade(alembic_config, "head")
+        logger.info("✅ Migrações sincronizadas!")
+        return
+
     logger.info("Criando tabelas no banco de dados...")
     Base.metadata.create_all(bind=engine)
+    command.stamp(alembic_config, "head")
     logger.info("✅ Tabelas criadas com sucesso!")
 
 
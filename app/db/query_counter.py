@@ -0,0 +1,54 @@
+"""
+Contador de consultas SQL por escopo (requisição, turno do agente, script)
+
+    with QueryCounter() as counter:
+        ...
+    counter.count  # consultas executadas dentro do bloco
+
+Usa um ContextVar, então requisições concorrentes não se misturam.
+Contadores aninhados somam no contador externo ao sair do bloco.
+Em modo DEBUG, app.main devolve o total no cabeçalho X-Query-Count.
+"""
+from contextvars import ContextVar
+from typing import Optional, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_current: ContextVar[Optional["QueryCounter"]] = ContextVar("query_counter", default=None)
+
+
+class QueryCounter:
+    """
+    Conta as consultas executadas no escopo atual
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+        self._token = None
+        self._parent: Optional["QueryCounter"] = None
+
+    def __enter__(self) -> "QueryCounter":
+        self._parent = _current.get()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        if self._parent is not None:
+            self._parent.count += self.count
+            self._parent.statements.extend(self.statements)
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+def install_query_counter(engine: Engine):
+    """
+    Registra o contador no engine (custo desprezível fora de um QueryCounter)
+    """
+    event.listen(engine, "before_cursor_execute", _on_execute)
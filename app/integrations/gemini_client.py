@@ -1,11 +1,73 @@
 """
 Integração com Google Gemini API
 Baseado no fluxo N8n: [FLUXO PRINCIPAL] - ImageMessage e DocumentMessage processing
+
+Um httpx.AsyncClient compartilhado (pool de conexões), aberto no startup e
+fechado no shutdown. Respostas 429/5xx e falhas de rede são repetidas com
+backoff exponencial com jitter; se a taxa de falhas passar do limite, o
+circuit breaker abre e as chamadas falham na hora (CircuitOpenError), sem
+prender os workers do webhook esperando timeouts. Todas as tentativas de uma
+chamada (e as esperas entre elas) cabem em GEMINI_DEADLINE_SECONDS; timeouts
+de leitura (modelo lento) não são repetidos.
+
+Métricas: gemini.requests, gemini.retries, gemini.failures e as do breaker
+(gemini.breaker_state, gemini.breaker_opened, gemini.breaker_rejected).
+
+Mídias recebidas como arquivo (ex.: baixadas em streaming) são codificadas
+em base64 aos poucos, durante o envio do corpo da requisição: o base64 do
+arquivo inteiro nunca fica em memória.
 """
+import asyncio
+import base64
+import json
+import random
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, AsyncIterator
 from loguru import logger
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.core.config import settings
+from app.core.metrics import metrics
+
+# Status que valem nova tentativa (limite de taxa e erros do servidor)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Marcador do campo de mídia no JSON, substituído pelo base64 durante o envio
+MEDIA_MARKER = "__finmec_media__"
+# Bytes lidos por vez (múltiplo de 3: os pedaços em base64 não têm padding)
+BASE64_CHUNK_SIZE = 3 * 16 * 1024
+
+
+async def _json_with_media(prefix: bytes, media: BinaryIO, suffix: bytes) -> AsyncIterator[bytes]:
+    """
+    Corpo JSON com o arquivo codificado em base64 pedaço por pedaço
+    """
+    yield prefix
+    media.seek(0)
+    while True:
+        chunk = media.read(BASE64_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield base64.b64encode(chunk)
+    yield suffix
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    # Timeouts e falhas de conexão
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """
+    Espera pedida pelo servidor (cabeçalho Retry-After em segundos), se houver
+    """
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    try:
+        return float(error.response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
 
 
 class GeminiClient:
@@ -17,20 +79,153 @@ class GeminiClient:
         self.api_key = settings.GEMINI_API_KEY
         self.model = "gemini-2.0-flash-exp"
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.max_retries = settings.GEMINI_MAX_RETRIES
+        self.breaker = CircuitBreaker(
+            "gemini",
+            failure_rate=settings.GEMINI_BREAKER_FAILURE_RATE,
+            window=settings.GEMINI_BREAKER_WINDOW,
+            min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+            cooldown_seconds=settings.GEMINI_BREAKER_COOLDOWN_SECONDS
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            params={"key": self.api_key},
+            limits=httpx.Limits(
+                max_connections=settings.GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GEMINI_MAX_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(
+                settings.GEMINI_TIMEOUT_SECONDS,
+                connect=settings.GEMINI_CONNECT_TIMEOUT_SECONDS
+            )
+        )
+
+    async def start(self):
+        """
+        Abre o cliente HTTP compartilhado (startup da aplicação)
+        """
+        if self._client is None:
+            self._client = self._create_client()
+            logger.info(f"🔮 Cliente Gemini iniciado (até {settings.GEMINI_MAX_CONNECTIONS} conexões)")
+
+    async def stop(self):
+        """
+        Fecha o cliente e as conexões abertas (shutdown da aplicação)
+        """
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+            logger.info("🛑 Cliente Gemini encerrado")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Cliente compartilhado (criado sob demanda fora da aplicação, ex.: scripts)
+        """
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """
+        Espera antes da nova tentativa: exponencial com jitter ("full jitter"),
+        respeitando o Retry-After do servidor dentro do teto configurado
+        """
+        ceiling = min(settings.GEMINI_RETRY_MAX_SECONDS, settings.GEMINI_RETRY_BASE_SECONDS * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, settings.GEMINI_RETRY_MAX_SECONDS))
+        return delay
+
+    async def _generate(self, payload: Dict[str, Any], media: Optional[BinaryIO] = None) -> Dict[str, Any]:
+        """
+        POST generateContent com novas tentativas e circuit breaker
+
+        Args:
+            payload: Corpo da requisição
+            media: Arquivo que substitui MEDIA_MARKER no payload (codificado
+                em base64 durante o envio, de novo a cada tentativa)
+
+        Raises:
+            CircuitOpenError: Gemini indisponível (circuito aberto)
+            httpx.HTTPError: Erro definitivo, tentativas ou prazo total esgotados
+        """
+        path = f"/models/{self.model}:generateContent"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.GEMINI_DEADLINE_SECONDS
+
+        if media is not None:
+            prefix, suffix = (part.encode() for part in json.dumps(payload).split(MEDIA_MARKER))
+            media.seek(0, 2)
+            size = media.tell()
+            headers = {
+                "Content-Type": "application/json",
+                "Content-Length": str(len(prefix) + 4 * ((size + 2) // 3) + len(suffix))
+            }
+
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            metrics.increment("gemini.requests")
+            try:
+                if media is None:
+                    request = self.client.post(path, json=payload)
+                else:
+                    request = self.client.post(
+                        path, content=_json_with_media(prefix, media, suffix), headers=headers
+                    )
+                try:
+                    response = await asyncio.wait_for(request, timeout=deadline - loop.time())
+                except asyncio.TimeoutError as e:
+                    raise httpx.ReadTimeout(f"Prazo total de {settings.GEMINI_DEADLINE_SECONDS}s esgotado") from e
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                if not _is_retryable(e):
+                    # Erro da requisição (4xx): o serviço está respondendo
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                metrics.increment("gemini.failures")
+
+                # Sem nova tentativa: esgotadas, modelo lento (timeout de
+                # leitura) ou a espera passaria do prazo total
+                delay = self._backoff(attempt, e)
+                if (attempt == self.max_retries
+                        or isinstance(e, httpx.ReadTimeout)
+                        or loop.time() + delay >= deadline):
+                    raise
+
+                metrics.increment("gemini.retries")
+                logger.warning(
+                    f"⚠️ Gemini falhou ({e.__class__.__name__}); "
+                    f"tentativa {attempt + 2}/{self.max_retries + 1} em {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return response.json()
 
     async def analyze_image(
         self,
-        image_base64: str,
-        mime_type: str,
-        prompt: Optional[str] = None
+        image_base64: Optional[str] = None,
+        mime_type: str = "image/jpeg",
+        prompt: Optional[str] = None,
+        image_file: Optional[BinaryIO] = None
     ) -> str:
         """
         Analisa imagem usando Gemini Vision
 
         Args:
-            image_base64: Imagem em base64
+            image_base64: Imagem em base64 (ou use image_file)
             mime_type: Tipo MIME (image/png, image/jpeg, etc.)
             prompt: Prompt customizado (opcional)
+            image_file: Arquivo da imagem (codificado em base64 durante o envio)
 
         Returns:
             Texto extraído/analisado da imagem
@@ -48,8 +243,6 @@ Regras importantes:
 3. Se não houver itens com preço, responda: "Não encontrei itens com preço nesta imagem"
 4. Seja preciso com os valores encontrados"""
 
-        url = f"{self.base_url}/models/{self.model}:generateContent"
-
         payload = {
             "contents": [
                 {
@@ -58,7 +251,7 @@ Regras importantes:
                         {
                             "inline_data": {
                                 "mime_type": mime_type,
-                                "data": image_base64
+                                "data": MEDIA_MARKER if image_file is not None else image_base64
                             }
                         }
                     ]
@@ -67,20 +260,16 @@ Regras importantes:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    url,
-                    params={"key": self.api_key},
-                    json=payload
-                )
-                response.raise_for_status()
-                data = response.json()
+            data = await self._generate(payload, media=image_file)
 
-                # Extrair texto da resposta
-                text = data["candidates"][0]["content"]["parts"][0]["text"]
-                logger.info(f"✅ Imagem analisada: {text[:100]}...")
-                return text
+            # Extrair texto da resposta
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+            logger.info(f"✅ Imagem analisada: {text[:100]}...")
+            return text
 
+        except CircuitOpenError:
+            logger.warning("⚡ Gemini indisponível (circuito aberto): análise de imagem recusada")
+            raise
         except httpx.HTTPError as e:
             logger.error(f"❌ Erro ao analisar imagem: {e}")
             raise
@@ -90,17 +279,19 @@ Regras importantes:
 
     async def analyze_document(
         self,
-        document_base64: str,
-        mime_type: str,
-        prompt: Optional[str] = None
+        document_base64: Optional[str] = None,
+        mime_type: str = "application/pdf",
+        prompt: Optional[str] = None,
+        document_file: Optional[BinaryIO] = None
     ) -> str:
         """
         Analisa documento (PDF) usando Gemini
 
         Args:
-            document_base64: Documento em base64
+            document_base64: Documento em base64 (ou use document_file)
             mime_type: Tipo MIME (application/pdf, etc.)
             prompt: Prompt customizado (opcional)
+            document_file: Arquivo do documento (codificado em base64 durante o envio)
 
         Returns:
             Texto extraído/analisado do documento
@@ -118,7 +309,7 @@ Formate como:
 Comprei [item] por [valor] em [data se disponível]."""
 
         # Usa o mesmo método de análise (Gemini suporta PDFs)
-        return await self.analyze_image(document_base64, mime_type, prompt)
+        return await self.analyze_image(document_base64, mime_type, prompt, image_file=document_file)
 
     async def generate_text(
         self,
@@ -135,8 +326,6 @@ Comprei [item] por [valor] em [data se disponível]."""
         Returns:
             Texto gerado
         """
-        url = f"{self.base_url}/models/{self.model}:generateContent"
-
         payload = {
             "contents": [
                 {
@@ -151,19 +340,15 @@ Comprei [item] por [valor] em [data se disponível]."""
         }
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    url,
-                    params={"key": self.api_key},
-                    json=payload
-                )
-                response.raise_for_status()
-                data = response.json()
+            data = await self._generate(payload)
 
-                text = data["candidates"][0]["content"]["parts"][0]["text"]
-                logger.info(f"✅ Texto gerado ({len(text)} chars)")
-                return text
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+            logger.info(f"✅ Texto gerado ({len(text)} chars)")
+            return text
 
+        except CircuitOpenError:
+            logger.warning("⚡ Gemini indisponível (circuito aberto): geração de texto recusada")
+            raise
         except httpx.HTTPError as e:
             logger.error(f"❌ Erro ao gerar texto: {e}")
             raise
@@ -4,7 +4,7 @@ Baseado no fluxo N8n: [FLUXO PRINCIPAL] - AudioMessage processing
 """
 import base64
 import io
-from typing import Optional
+from typing import Optional, BinaryIO
 from openai import AsyncOpenAI
 from loguru import logger
 from app.core.config import settings
@@ -21,35 +21,39 @@ class OpenAIClient:
 
     async def transcribe_audio(
         self,
-        audio_base64: str,
+        audio_base64: Optional[str] = None,
         filename: str = "audio.mp3",
-        language: str = "pt"
+        language: str = "pt",
+        audio_file: Optional[BinaryIO] = None
     ) -> str:
         """
         Transcreve áudio usando Whisper API
 
         Args:
-            audio_base64: Áudio em base64
+            audio_base64: Áudio em base64 (ou use audio_file)
             filename: Nome do arquivo (deve ter extensão correta)
             language: Idioma do áudio (pt, en, es, etc.)
+            audio_file: Arquivo de áudio já aberto (ex.: mídia baixada em
+                streaming); enviado sem cópia em memória
 
         Returns:
             Texto transcrito
         """
         try:
-            # Decodificar base64 para bytes
-            audio_bytes = base64.b64decode(audio_base64)
+            if audio_file is None:
+                # Decodificar base64 para arquivo em memória
+                audio_file = io.BytesIO(base64.b64decode(audio_base64))
 
-            # Criar arquivo em memória
-            audio_file = io.BytesIO(audio_bytes)
-            audio_file.name = filename
+            audio_file.seek(0, io.SEEK_END)
+            size = audio_file.tell()
+            audio_file.seek(0)
 
-            logger.info(f"🎤 Transcrevendo áudio ({len(audio_bytes)} bytes)...")
+            logger.info(f"🎤 Transcrevendo áudio ({size} bytes)...")
 
-            # Transcrever usando Whisper
+            # Transcrever usando Whisper (nome com a extensão define o formato)
             transcription = await self.client.audio.transcriptions.create(
                 model=self.transcription_model,
-                file=audio_file,
+                file=(filename, audio_file),
                 language=language
             )
 
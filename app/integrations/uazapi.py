@@ -1,13 +1,71 @@
 """
 Integração com Uazapi (WhatsApp API)
 Baseado no fluxo N8n: [FLUXO PRINCIPAL]
+
+Um único httpx.AsyncClient por processo (pool de conexões com keep-alive),
+aberto no startup e fechado no shutdown da aplicação: as chamadas reutilizam
+as conexões TCP/TLS em vez de abrir uma nova a cada envio.
+
+Mídias recebidas são baixadas pelo link (return_link) em streaming para um
+SpooledTemporaryFile: em memória até MEDIA_SPOOL_MEMORY_BYTES, depois em
+disco, com limite de MEDIA_MAX_BYTES.
 """
 import asyncio
+import tempfile
+from dataclasses import dataclass
+from urllib.parse import urlsplit
 import httpx
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, BinaryIO
 from loguru import logger
 from app.core.config import settings
 
+# Timeout de leitura/escrita por endpoint (segundos)
+ENDPOINT_TIMEOUTS = {
+    "/send/text": 30.0,
+    "/send/media": 60.0,
+    "/message/download": 60.0,
+    "/sender/simple": 30.0,
+}
+DEFAULT_TIMEOUT = 30.0
+
+# Leitura do arquivo de mídia pelo link (segundos)
+MEDIA_DOWNLOAD_TIMEOUT = 60.0
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+
+class MediaTooLargeError(Exception):
+    """
+    Mídia maior que MEDIA_MAX_BYTES
+    """
+
+
+@dataclass
+class DownloadedMedia:
+    """
+    Mídia baixada em arquivo temporário (posicionado no início).
+    Use com `with` para liberar o arquivo.
+    """
+    file: BinaryIO
+    mimetype: str
+    size: int
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "DownloadedMedia":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
 
 class UazapiClient:
     """
@@ -22,6 +80,66 @@ class UazapiClient:
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+        self.http2 = settings.UAZAPI_HTTP2
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        if self.http2 and not _http2_available():
+            logger.warning("⚠️ UAZAPI_HTTP2 ativo, mas o pacote h2 não está instalado; usando HTTP/1.1")
+            self.http2 = False
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.UAZAPI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UAZAPI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.UAZAPI_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=settings.UAZAPI_CONNECT_TIMEOUT_SECONDS)
+        )
+
+    async def start(self):
+        """
+        Abre o cliente HTTP compartilhado (startup da aplicação)
+        """
+        if self._client is None:
+            self._client = self._create_client()
+            logger.info(
+                f"📡 Cliente Uazapi iniciado (até {settings.UAZAPI_MAX_CONNECTIONS} conexões, "
+                f"HTTP/2: {'sim' if self.http2 else 'não'})"
+            )
+
+    async def stop(self):
+        """
+        Fecha o cliente e as conexões abertas (shutdown da aplicação)
+        """
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+            logger.info("🛑 Cliente Uazapi encerrado")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Cliente compartilhado (criado sob demanda fora da aplicação, ex.: scripts)
+        """
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST no endpoint com o timeout configurado para ele
+        """
+        timeout = httpx.Timeout(
+            ENDPOINT_TIMEOUTS.get(path, DEFAULT_TIMEOUT),
+            connect=settings.UAZAPI_CONNECT_TIMEOUT_SECONDS
+        )
+        response = await self.client.post(path, json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
 
     async def send_text(
         self,
@@ -45,7 +163,6 @@ class UazapiClient:
         # Limpar número (remover @s.whatsapp.net se existir)
         clean_number = number.split("@")[0] if "@" in number else number
 
-        url = f"{self.base_url}/send/text"
         payload = {
             "number": clean_number,
             "text": text,
@@ -54,11 +171,9 @@ class UazapiClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                logger.info(f"✅ Mensagem enviada para {clean_number}")
-                return response.json()
+            data = await self._post("/send/text", payload)
+            logger.info(f"✅ Mensagem enviada para {clean_number}")
+            return data
         except httpx.HTTPError as e:
             logger.error(f"❌ Erro ao enviar mensagem: {e}")
             raise
@@ -76,7 +191,7 @@ class UazapiClient:
         Args:
             number: Número do destinatário
             media_type: Tipo de mídia (image, audio, document, video)
-            file_url: URL do arquivo
+            file_url: URL do arquivo ou conteúdo em base64
             caption: Legenda/texto da mídia
 
         Returns:
@@ -84,7 +199,6 @@ class UazapiClient:
         """
         clean_number = number.split("@")[0] if "@" in number else number
 
-        url = f"{self.base_url}/send/media"
         payload = {
             "number": clean_number,
             "type": media_type,
@@ -95,11 +209,9 @@ class UazapiClient:
             payload["text"] = caption
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                logger.info(f"✅ Mídia ({media_type}) enviada para {clean_number}")
-                return response.json()
+            data = await self._post("/send/media", payload)
+            logger.info(f"✅ Mídia ({media_type}) enviada para {clean_number}")
+            return data
         except httpx.HTTPError as e:
             logger.error(f"❌ Erro ao enviar mídia: {e}")
             raise
@@ -121,7 +233,6 @@ class UazapiClient:
         Returns:
             Dict com base64Data e mimetype
         """
-        url = f"{self.base_url}/message/download"
         payload = {
             "id": message_id,
             "return_base64": return_base64,
@@ -129,16 +240,79 @@ class UazapiClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"✅ Mídia baixada: {data.get('mimetype', 'unknown')}")
-                return data
+            data = await self._post("/message/download", payload)
+            logger.info(f"✅ Mídia baixada: {data.get('mimetype', 'unknown')}")
+            return data
         except httpx.HTTPError as e:
             logger.error(f"❌ Erro ao baixar mídia: {e}")
             raise
 
+    async def download_media_file(
+        self,
+        message_id: str,
+        max_bytes: Optional[int] = None
+    ) -> DownloadedMedia:
+        """
+        Baixa a mídia de uma mensagem recebida em streaming, sem base64:
+        pede o link à Uazapi e grava os bytes em um SpooledTemporaryFile
+
+        Args:
+            message_id: ID da mensagem
+            max_bytes: Tamanho máximo aceito (padrão MEDIA_MAX_BYTES)
+
+        Returns:
+            DownloadedMedia com o arquivo temporário, mimetype e tamanho
+
+        Raises:
+            MediaTooLargeError: Mídia acima do limite (o download é interrompido)
+        """
+        max_bytes = max_bytes or settings.MEDIA_MAX_BYTES
+
+        data = await self.download_media(message_id, return_base64=False, return_link=True)
+        url = data.get("fileURL") or data.get("fileUrl") or data.get("url")
+        if not url:
+            raise ValueError("Uazapi não retornou o link da mídia")
+
+        request = self.client.build_request(
+            "GET",
+            url,
+            timeout=httpx.Timeout(MEDIA_DOWNLOAD_TIMEOUT, connect=settings.UAZAPI_CONNECT_TIMEOUT_SECONDS)
+        )
+        # O token da Uazapi só vai para o próprio servidor da Uazapi
+        if urlsplit(url).netloc and urlsplit(url).netloc != urlsplit(self.base_url).netloc:
+            del request.headers["token"]
+
+        file = tempfile.SpooledTemporaryFile(max_size=settings.MEDIA_SPOOL_MEMORY_BYTES)
+        size = 0
+        try:
+            response = await self.client.send(request, stream=True)
+            try:
+                response.raise_for_status()
+
+                declared = int(response.headers.get("Content-Length") or 0)
+                if declared > max_bytes:
+                    raise MediaTooLargeError(f"Mídia de {declared} bytes (limite {max_bytes})")
+
+                async for chunk in response.aiter_bytes(MEDIA_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise MediaTooLargeError(f"Mídia acima de {max_bytes} bytes")
+                    file.write(chunk)
+            finally:
+                await response.aclose()
+        except BaseException:
+            file.close()
+            raise
+
+        file.seek(0)
+        mimetype = (
+            data.get("mimetype")
+            or response.headers.get("Content-Type", "").split(";")[0]
+            or "application/octet-stream"
+        )
+        logger.info(f"✅ Mídia baixada por streaming: {mimetype}, {size} bytes")
+        return DownloadedMedia(file=file, mimetype=mimetype, size=size)
+
     async def schedule_message(
         self,
         numbers: List[str],
@@ -163,7 +337,6 @@ class UazapiClient:
         Returns:
             Resposta da API Uazapi
         """
-        url = f"{self.base_url}/sender/simple"
         payload = {
             "numbers": numbers,
             "type": "text",
@@ -178,18 +351,16 @@ class UazapiClient:
 
         try:
             # Retry logic: 3 tentativas com delay de 3 segundos
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for attempt in range(3):
-                    try:
-                        response = await client.post(url, headers=self.headers, json=payload)
-                        response.raise_for_status()
-                        logger.info(f"✅ Mensagem agendada para {len(numbers)} número(s)")
-                        return response.json()
-                    except httpx.HTTPError as e:
-                        if attempt == 2:  # última tentativa
-                            raise
-                        logger.warning(f"⚠️ Tentativa {attempt + 1} falhou, aguardando 3s...")
-                        await asyncio.sleep(3)
+            for attempt in range(3):
+                try:
+                    data = await self._post("/sender/simple", payload)
+                    logger.info(f"✅ Mensagem agendada para {len(numbers)} número(s)")
+                    return data
+                except httpx.HTTPError as e:
+                    if attempt == 2:  # última tentativa
+                        raise
+                    logger.warning(f"⚠️ Tentativa {attempt + 1} falhou, aguardando 3s...")
+                    await asyncio.sleep(3)
         except httpx.HTTPError as e:
             logger.error(f"❌ Erro ao agendar mensagem: {e}")
             raise
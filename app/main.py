@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.http_cache import NotModified, not_modified_handler
+from app.db.query_counter import QueryCounter
 from loguru import logger
 
 # Importar routers
@@ -29,8 +32,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Query-Count", "ETag"],
 )
 
+# GET condicional: If-None-Match com a versão atual responde 304
+app.add_exception_handler(NotModified, not_modified_handler)
+
+
+if settings.DEBUG:
+    @app.middleware("http")
+    async def count_queries(request, call_next):
+        """
+        Informa no cabeçalho X-Query-Count quantas consultas SQL a requisição executou
+        """
+        with QueryCounter() as counter:
+            response = await call_next(request)
+        response.headers["X-Query-Count"] = str(counter.count)
+        return response
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -41,6 +60,42 @@ async def startup_event():
     logger.info(f"🔧 Modo Debug: {settings.DEBUG}")
     logger.info(f"🌐 Host: {settings.HOST}:{settings.PORT}")
 
+    # Cliente HTTP compartilhado da Uazapi (pool de conexões)
+    from app.integrations.uazapi import uazapi_client
+    await uazapi_client.start()
+
+    # Cliente HTTP compartilhado do Gemini (análise de imagens e documentos)
+    from app.integrations.gemini_client import gemini_client
+    await gemini_client.start()
+
+    # Compilar o grafo do agente uma única vez
+    from app.services.langgraph_agent import financial_agent
+    financial_agent.warmup()
+
+    # Iniciar workers da fila de saída (respostas pelo WhatsApp)
+    from app.services.outbound_queue import outbound_dispatcher
+    await outbound_dispatcher.start()
+
+    # Iniciar workers da fila de entrada do webhook
+    from app.services.inbound_queue import inbound_worker_pool
+    await inbound_worker_pool.start()
+
+    # Limpeza periódica dos registros de idempotência (TTL)
+    from app.services.idempotency import message_idempotency
+    message_idempotency.start()
+
+    # Limpeza periódica do cache de análises de mídia (TTL)
+    from app.services.media_cache import media_analysis_cache
+    media_analysis_cache.start()
+
+    # Conferência periódica dos saldos das carteiras
+    from app.services.wallet_reconciliation import wallet_reconciliation
+    wallet_reconciliation.start()
+
+    # Pool de processos da renderização de gráficos
+    from app.services.chart_renderer import chart_renderer
+    chart_renderer.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -49,6 +104,32 @@ async def shutdown_event():
     """
     logger.info(f"🛑 Encerrando {settings.APP_NAME}")
 
+    from app.services.inbound_queue import inbound_worker_pool
+    await inbound_worker_pool.stop()
+
+    from app.services.idempotency import message_idempotency
+    await message_idempotency.stop()
+
+    from app.services.media_cache import media_analysis_cache
+    await media_analysis_cache.stop()
+
+    from app.services.wallet_reconciliation import wallet_reconciliation
+    await wallet_reconciliation.stop()
+
+    from app.services.chart_renderer import chart_renderer
+    await chart_renderer.stop()
+
+    # Depois da fila de entrada: respostas não enviadas ficam na tabela
+    from app.services.outbound_queue import outbound_dispatcher
+    await outbound_dispatcher.stop()
+
+    # Depois dos workers: envios pendentes ainda usam os clientes
+    from app.integrations.gemini_client import gemini_client
+    await gemini_client.stop()
+
+    from app.integrations.uazapi import uazapi_client
+    await uazapi_client.stop()
+
 
 @app.get("/")
 async def root():
@@ -75,6 +156,14 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Métricas internas do processo (contadores e gauges)
+    """
+    return metrics.snapshot()
+
+
 # Incluir routers
 app.include_router(transactions.router, prefix="/api/transactions", tags=["Transações"])
 app.include_router(categories.router, prefix="/api/categories", tags=["Categorias"])
@@ -7,6 +7,12 @@ from app.models.category import Category, TransactionType
 from app.models.payment_method import PaymentMethod
 from app.models.transaction import Transaction
 from app.models.reminder import Reminder
+from app.models.inbound_job import InboundJob, InboundJobStatus
+from app.models.processed_message import ProcessedMessage
+from app.models.conversation_memory import ConversationMemory
+from app.models.monthly_aggregate import MonthlyAggregate
+from app.models.outbound_message import OutboundMessage, OutboundMessageStatus
+from app.models.media_analysis import MediaAnalysis
 
 __all__ = [
     "User",
@@ -15,5 +21,13 @@ __all__ = [
     "TransactionType",
     "PaymentMethod",
     "Transaction",
-    "Reminder"
+    "Reminder",
+    "InboundJob",
+    "InboundJobStatus",
+    "ProcessedMessage",
+    "ConversationMemory",
+    "MonthlyAggregate",
+    "OutboundMessage",
+    "OutboundMessageStatus",
+    "MediaAnalysis"
 ]
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class ConversationMemory(Base):
+    """
+    Memória de conversa do agente por usuário
+    Guarda um resumo acumulado + as mensagens recentes (JSON) dentro do
+    orçamento de tokens configurado em MEMORY_TOKEN_BUDGET.
+    """
+    __tablename__ = "conversation_memories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+
+    # Resumo das mensagens antigas
+    summary = Column(Text, nullable=True)
+    # Incrementada a cada resumo gravado (controle otimista, ver save_turn)
+    summary_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Mensagens recentes: [{"role": "human|ai", "content": "..."}]
+    messages = Column(Text, nullable=False, default="[]")
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ConversationMemory user={self.user_id}>"
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class InboundJobStatus:
+    """
+    Estados de um job da fila de entrada
+    """
+    PENDING = "pending"          # Aguardando worker
+    PROCESSING = "processing"    # Reservado por um worker (até locked_until)
+    DONE = "done"                # Processado com sucesso
+    DEAD = "dead"                # Esgotou as tentativas (dead-letter)
+
+
+class InboundJob(Base):
+    """
+    Job da fila durável de mensagens recebidas pelo webhook /webhook/finmec
+    """
+    __tablename__ = "inbound_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Origem da mensagem
+    remote_jid = Column(String, nullable=False, index=True)
+    message_id = Column(String, nullable=True)
+
+    # Corpo do webhook (JSON)
+    payload = Column(Text, nullable=False)
+
+    # Controle da fila
+    status = Column(String, nullable=False, default=InboundJobStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<InboundJob {self.id} - {self.status}>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class MediaAnalysis(Base):
+    """
+    Resultado da análise de uma mídia (transcrição ou extração), endereçado
+    pelo conteúdo: a mesma mídia encaminhada de novo não é baixada nem
+    analisada outra vez enquanto o registro não expirar.
+    """
+    __tablename__ = "media_analyses"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Tipo + versão do prompt/modelo + fileSha256 da mídia
+    cache_key = Column(String, nullable=False, unique=True)
+    kind = Column(String, nullable=False)
+
+    # Texto produzido pelo Whisper ou pelo Gemini
+    result = Column(Text, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<MediaAnalysis {self.cache_key}>"
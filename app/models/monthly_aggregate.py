@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from app.db.database import Base
+
+
+class MonthlyAggregate(Base):
+    """
+    Totais mensais por usuário, categoria e tipo (rollup de transactions)
+    Mantido incrementalmente pelo TransactionService; permite responder
+    resumos e gráficos do mês sem varrer as transações.
+    """
+    __tablename__ = "monthly_aggregates"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # Primeiro dia do mês
+    month = Column(Date, primary_key=True)
+
+    # 0 = sem categoria (NULL não participa da chave primária)
+    category_id = Column(Integer, primary_key=True, default=0)
+
+    transaction_type = Column(String, primary_key=True)  # 'expense' ou 'income'
+
+    total_amount = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<MonthlyAggregate user={self.user_id} {self.month} cat={self.category_id} {self.transaction_type}>"
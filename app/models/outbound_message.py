@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class OutboundMessageStatus:
+    """
+    Estados de uma mensagem da fila de saída
+    """
+    PENDING = "pending"          # Aguardando envio (ou nova tentativa em available_at)
+    SENDING = "sending"          # Reservada por um worker (até locked_until)
+    DEAD = "dead"                # Esgotou as tentativas ou foi recusada pela Uazapi
+
+    # Mensagens enviadas são removidas da tabela
+
+
+class OutboundMessage(Base):
+    """
+    Mensagem de texto da fila durável de envio para o WhatsApp (Uazapi /send/text)
+    """
+    __tablename__ = "outbound_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Destinatário (ordem FIFO por remote_jid, pelo id)
+    remote_jid = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+
+    # Controle da fila
+    status = Column(String, nullable=False, default=OutboundMessageStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Próxima mensagem disponível (em ordem de id, sem ordenação)
+        Index("ix_outbound_messages_status_id", "status", "id"),
+        # Mensagens anteriores do mesmo destinatário (ordem FIFO)
+        Index("ix_outbound_messages_jid_id", "remote_jid", "id"),
+    )
+
+    def __repr__(self):
+        return f"<OutboundMessage {self.id} - {self.status}>"
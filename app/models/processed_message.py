@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class ProcessedMessage(Base):
+    """
+    Registro de mensagens do WhatsApp já recebidas (idempotência do webhook)
+    A unicidade de message_id impede o processamento duplicado de reentregas.
+    """
+    __tablename__ = "processed_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # ID da mensagem no WhatsApp
+    message_id = Column(String, nullable=False, unique=True)
+    remote_jid = Column(String, nullable=False)
+
+    # Resposta enviada ao usuário (para replay)
+    response = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ProcessedMessage {self.message_id}>"
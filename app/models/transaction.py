@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Date, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -50,5 +50,22 @@ class Transaction(Base):
     category = relationship("Category", back_populates="transactions")
     payment_method = relationship("PaymentMethod", back_populates="transactions")
 
+    # Índices dos padrões de acesso (migrações alembic 0001 e 0003)
+    __table_args__ = (
+        # Recentes, listagem e resumo por período
+        Index("ix_transactions_user_date_created", user_id, transaction_date.desc(), created_at.desc()),
+        # Paginação por keyset em (transaction_date, id) (migração 0003)
+        Index("ix_transactions_user_date_id", user_id, transaction_date.desc(), id.desc()),
+        # Saldo e conferência por carteira
+        Index("ix_transactions_wallet_id", wallet_id),
+        # Gráficos por tipo/categoria no período
+        Index(
+            "ix_transactions_user_type_date",
+            user_id, transaction_type, transaction_date,
+            postgresql_include=["category_id", "amount"]
+        ),
+        Index("ix_transactions_category_id", category_id),
+    )
+
     def __repr__(self):
         return f"<Transaction {self.title} - R$ {self.amount}>"
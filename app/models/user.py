@@ -28,6 +28,10 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
 
+    # Versão dos dados do usuário: incrementada a cada escrita em transações,
+    # lembretes e carteiras (ETag das consultas do dashboard)
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Domínio personalizado (se houver)
     domain = Column(String, nullable=True)
 
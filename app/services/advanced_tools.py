@@ -2,22 +2,22 @@
 Tools Avançadas - Relatórios e Lembretes
 Baseado nos subworkflows do N8n: [RELATORIO DETALHADO] e [INCLUI LEMBRETES]
 """
-from typing import Optional
+from typing import Optional, Annotated
 from datetime import datetime, date, timedelta
-from langchain_core.tools import tool
-from sqlalchemy.orm import Session
+from langchain_core.tools import tool, InjectedToolArg
 from loguru import logger
 
-from app.models import User, Category, Transaction, Reminder
+from app.models import Reminder
 from app.services.transaction_service import transaction_service
+from app.services.user_service import user_service
+from app.services.tool_runtime import ToolContext
 from app.integrations.uazapi import uazapi_client
 from app.integrations.gemini_client import gemini_client
 
 
 @tool
 def relatorio_detalhado(
-    user_id: int,
-    db: Session,
+    ctx: Annotated[ToolContext, InjectedToolArg],
     data_inicio: str,
     data_fim: str,
     categoria_nome: Optional[str] = None
@@ -27,8 +27,7 @@ def relatorio_detalhado(
     Baseado no subworkflow N8n: [RELATORIO DETALHADO]
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
         data_inicio: Data inicial no formato YYYY-MM-DD ou DD/MM/YYYY
         data_fim: Data final no formato YYYY-MM-DD ou DD/MM/YYYY
         categoria_nome: Nome da categoria para filtrar (opcional)
@@ -39,7 +38,7 @@ def relatorio_detalhado(
     try:
         logger.info(f"📊 Gerando relatório detalhado: {data_inicio} a {data_fim}")
 
-        user = db.query(User).filter(User.id == user_id).first()
+        user = ctx.user
         if not user:
             return "Erro: Usuário não encontrado."
 
@@ -60,9 +59,7 @@ def relatorio_detalhado(
         # Buscar categoria se fornecida
         category_id = None
         if categoria_nome:
-            category = db.query(Category).filter(
-                Category.name.ilike(f"%{categoria_nome}%")
-            ).first()
+            category = ctx.find_category(categoria_nome)
             if category:
                 category_id = category.id
             else:
@@ -70,7 +67,7 @@ def relatorio_detalhado(
 
         # Buscar transações
         transactions = transaction_service.get_all(
-            db,
+            ctx.db,
             user,
             start_date=start_date,
             end_date=end_date,
@@ -100,8 +97,7 @@ Período: {start_date.strftime('%d/%m/%Y')} até {end_date.strftime('%d/%m/%Y')}
         if receitas:
             relatorio += "🟢 **RECEITAS:**\n\n"
             for t in receitas:
-                cat = db.query(Category).filter(Category.id == t.category_id).first() if t.category_id else None
-                cat_nome = cat.name if cat else "Sem categoria"
+                cat_nome = ctx.category_name(t.category_id)
                 valor_fmt = f"R$ {t.amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
                 relatorio += f"• *{t.title}*\n"
                 relatorio += f"  {valor_fmt} | {t.transaction_date.strftime('%d/%m/%Y')} | {cat_nome}\n\n"
@@ -110,8 +106,7 @@ Período: {start_date.strftime('%d/%m/%Y')} até {end_date.strftime('%d/%m/%Y')}
         if despesas:
             relatorio += "🔴 **DESPESAS:**\n\n"
             for t in despesas:
-                cat = db.query(Category).filter(Category.id == t.category_id).first() if t.category_id else None
-                cat_nome = cat.name if cat else "Sem categoria"
+                cat_nome = ctx.category_name(t.category_id)
                 valor_fmt = f"R$ {t.amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
                 relatorio += f"• *{t.title}*\n"
                 relatorio += f"  {valor_fmt} | {t.transaction_date.strftime('%d/%m/%Y')} | {cat_nome}\n\n"
@@ -136,8 +131,7 @@ Período: {start_date.strftime('%d/%m/%Y')} até {end_date.strftime('%d/%m/%Y')}
 
 @tool
 async def insere_lembrete(
-    user_id: int,
-    db: Session,
+    ctx: Annotated[ToolContext, InjectedToolArg],
     titulo: str,
     descricao: str,
     data_lembrete: str
@@ -147,8 +141,7 @@ async def insere_lembrete(
     Baseado no subworkflow N8n: [INCLUI LEMBRETES]
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
         titulo: Título do lembrete
         descricao: Descrição detalhada do lembrete
         data_lembrete: Data e hora do lembrete (YYYY-MM-DD HH:MM ou DD/MM/YYYY HH:MM)
@@ -159,7 +152,7 @@ async def insere_lembrete(
     try:
         logger.info(f"🔔 Criando lembrete: {titulo}")
 
-        user = db.query(User).filter(User.id == user_id).first()
+        user = ctx.user
         if not user:
             return "Erro: Usuário não encontrado."
 
@@ -188,7 +181,7 @@ async def insere_lembrete(
 
         # 1. Inserir no banco de dados
         reminder = Reminder(
-            user_id=user_id,
+            user_id=user.id,
             title=titulo,
             description=descricao,
             reminder_date=reminder_datetime,
@@ -196,9 +189,10 @@ async def insere_lembrete(
             is_sent=False
         )
 
-        db.add(reminder)
-        db.commit()
-        db.refresh(reminder)
+        ctx.db.add(reminder)
+        user_service.bump_data_version(ctx.db, user.id)
+        ctx.db.commit()
+        ctx.db.refresh(reminder)
 
         # 2. Agendar via Uazapi
         # Converter para timestamp Unix em milissegundos
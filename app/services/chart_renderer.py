@@ -0,0 +1,241 @@
+"""
+Gráficos em imagem (PNG) para envio pelo WhatsApp
+Baseado no fluxo N8n: [FLUXO PRINCIPAL] - gráficos enviados por /send/media
+
+A renderização (matplotlib) roda em um pool de processos, para não bloquear
+o event loop. As imagens ficam em cache por (usuário, gráfico, período,
+versão dos dados do usuário), com limite de memória e descarte LRU: o mesmo
+gráfico pedido de novo sem escritas novas não consulta o banco nem é
+renderizado outra vez.
+"""
+import asyncio
+import base64
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Optional, Dict, Tuple, Callable
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.integrations.uazapi import uazapi_client
+from app.models import User
+from app.services.transaction_service import transaction_service
+from app.utils.charts import warmup, render_bar_chart, render_pizza_chart
+
+MONTH_NAMES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+]
+
+# Gráficos disponíveis
+CHART_TYPES = ("bar", "pizza")
+
+
+class ChartImageCache:
+    """
+    Cache LRU de imagens limitado pelo total de bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._images: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key: Tuple, image: bytes):
+        if len(image) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._images[key] = image
+            self._size += len(image)
+
+            while self._size > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._size -= len(evicted)
+                metrics.increment("chart_cache.evictions")
+
+            metrics.set_gauge("chart_cache.bytes", self._size)
+            metrics.set_gauge("chart_cache.items", len(self._images))
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._size = 0
+        metrics.set_gauge("chart_cache.bytes", 0)
+        metrics.set_gauge("chart_cache.items", 0)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+class ChartRenderer:
+    """
+    Renderização de gráficos em processos separados, com cache das imagens
+    """
+
+    def __init__(self, max_workers: int = None, cache_bytes: int = None):
+        self.max_workers = max_workers or settings.CHART_RENDER_WORKERS
+        self.cache = ChartImageCache(cache_bytes or settings.CHART_CACHE_MAX_BYTES)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    def start(self):
+        """
+        Cria o pool de processos (spawn: processos limpos, sem herdar
+        threads e conexões do servidor)
+        """
+        if self._pool is not None:
+            return
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warmup
+        )
+        logger.info(f"🖼️ Renderização de gráficos iniciada ({self.max_workers} processo(s))")
+
+    async def stop(self):
+        """
+        Encerra o pool de processos
+        """
+        if self._pool is None:
+            return
+
+        pool, self._pool = self._pool, None
+        await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+        logger.info("🛑 Renderização de gráficos encerrada")
+
+    async def _render(self, key: Tuple, prepare: Callable[[], tuple]) -> bytes:
+        """
+        Imagem do cache ou renderizada no pool (pedidos simultâneos do
+        mesmo gráfico compartilham a mesma renderização)
+
+        Args:
+            key: Chave do cache, com a versão dos dados do usuário
+            prepare: Consulta os dados apenas se não houver cache;
+                devolve (função de renderização, *argumentos)
+        """
+        image = self.cache.get(key)
+        if image is not None:
+            metrics.increment("chart_cache.hits")
+            return image
+
+        metrics.increment("chart_cache.misses")
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        if self._pool is None:
+            self.start()
+
+        render_fn, *args = prepare()
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, render_fn, *args)
+        self._inflight[key] = future
+        try:
+            image = await future
+        finally:
+            self._inflight.pop(key, None)
+
+        self.cache.put(key, image)
+        metrics.increment("chart_cache.renders")
+        return image
+
+    async def bar_chart(
+        self,
+        db: Session,
+        user: User,
+        target_date: Optional[date] = None,
+        descricao: Optional[str] = None
+    ) -> bytes:
+        """
+        Receitas x despesas dos últimos 7 dias até a data (mesmos dados de GET /api/charts/bar)
+        """
+        end_date = target_date or date.today()
+        start_date = end_date - timedelta(days=6)
+
+        def prepare():
+            series = transaction_service.get_series(
+                db, user, start_date, end_date, bucket="day", title_filter=descricao
+            )
+            labels = [date.fromisoformat(day).strftime("%d/%m") for day in series["dates"]]
+            title = f"Receitas x Despesas - {start_date.strftime('%d/%m')} a {end_date.strftime('%d/%m/%Y')}"
+            return render_bar_chart, title, labels, series["income"], series["expense"]
+
+        key = (user.id, "bar", start_date, end_date, descricao or "", user.data_version)
+        return await self._render(key, prepare)
+
+    async def pizza_chart(
+        self,
+        db: Session,
+        user: User,
+        target_date: Optional[date] = None,
+        transaction_type: str = "expense"
+    ) -> bytes:
+        """
+        Distribuição por categoria no mês da data (mesmos dados de GET /api/charts/pizza)
+        """
+        month = (target_date or date.today()).replace(day=1)
+
+        def prepare():
+            distribution = transaction_service.get_category_distribution(db, user, month, transaction_type)
+            type_name = "Receitas" if transaction_type == "income" else "Despesas"
+            title = f"{type_name} por categoria - {MONTH_NAMES[month.month - 1]}/{month.year}"
+            return (
+                render_pizza_chart,
+                title,
+                [name for name, _ in distribution],
+                [amount for _, amount in distribution]
+            )
+
+        key = (user.id, "pizza", month, transaction_type, user.data_version)
+        return await self._render(key, prepare)
+
+    async def send_chart(
+        self,
+        db: Session,
+        user: User,
+        chart: str,
+        target_date: Optional[date] = None,
+        caption: Optional[str] = None
+    ) -> dict:
+        """
+        Renderiza (ou busca no cache) e envia o gráfico pelo WhatsApp
+        """
+        if chart not in CHART_TYPES:
+            raise ValueError(f"Gráfico inválido: {chart}")
+
+        if chart == "bar":
+            image = await self.bar_chart(db, user, target_date)
+        else:
+            image = await self.pizza_chart(db, user, target_date)
+
+        return await uazapi_client.send_media(
+            number=user.remote_jid,
+            media_type="image",
+            file_url=base64.b64encode(image).decode("ascii"),
+            caption=caption
+        )
+
+
+# Instância global
+chart_renderer = ChartRenderer()
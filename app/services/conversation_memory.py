@@ -0,0 +1,203 @@
+"""
+Memória de conversa do agente com janela limitada por tokens
+Baseado no Chat Memory do N8n: [FLUXO PRINCIPAL]
+
+Apenas as mensagens recentes que cabem em MEMORY_TOKEN_BUDGET são enviadas
+ao LLM; as mais antigas são condensadas em um resumo acumulado, de modo que
+o tamanho do prompt se mantém estável conforme a conversa cresce.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Awaitable, Callable
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.models import ConversationMemory
+
+# Função que recebe (resumo atual, mensagens descartadas) e devolve o novo resumo
+Summarizer = Callable[[Optional[str], List[dict]], Awaitable[str]]
+
+# Tentativas de gravar o resumo quando outro turno resume ao mesmo tempo
+MAX_SUMMARY_ATTEMPTS = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa rápida de tokens (~4 caracteres por token + overhead da mensagem)
+    """
+    return len(text or "") // 4 + 4
+
+
+@dataclass
+class ConversationWindow:
+    """
+    Janela de conversa: resumo acumulado + mensagens recentes
+    """
+    summary: Optional[str] = None
+    messages: List[dict] = field(default_factory=list)
+
+    def tokens(self) -> int:
+        """
+        Tokens de histórico que seriam enviados ao LLM
+        """
+        total = estimate_tokens(self.summary) if self.summary else 0
+        return total + sum(estimate_tokens(m["content"]) for m in self.messages)
+
+    def append_turn(self, human_text: str, ai_text: str, budget: int) -> List[dict]:
+        """
+        Adiciona um turno e remove os turnos mais antigos que excedem o orçamento.
+        Ao estourar, corta até metade do orçamento para que o resumo seja
+        refeito apenas a cada alguns turnos.
+
+        Returns:
+            Mensagens removidas (a serem incorporadas ao resumo)
+        """
+        self.messages.append({"role": "human", "content": human_text})
+        self.messages.append({"role": "ai", "content": ai_text})
+
+        overflow: List[dict] = []
+        if self.tokens() <= budget:
+            return overflow
+
+        # Sempre manter ao menos o último turno
+        while len(self.messages) > 2 and self.tokens() > budget // 2:
+            overflow.extend(self.messages[:2])
+            del self.messages[:2]
+
+        return overflow
+
+    def as_messages(self) -> List[BaseMessage]:
+        """
+        Mensagens recentes no formato LangChain
+        """
+        return [
+            HumanMessage(content=m["content"]) if m["role"] == "human" else AIMessage(content=m["content"])
+            for m in self.messages
+        ]
+
+
+class ConversationMemoryService:
+    """
+    Persistência da janela de conversa por usuário
+    """
+
+    @staticmethod
+    def load(db: Session, user_id: int) -> ConversationWindow:
+        """
+        Carrega a janela de conversa do usuário
+        """
+        memory = db.query(ConversationMemory).filter(
+            ConversationMemory.user_id == user_id
+        ).first()
+
+        if not memory:
+            return ConversationWindow()
+
+        return ConversationWindow(
+            summary=memory.summary,
+            messages=json.loads(memory.messages or "[]")
+        )
+
+    @staticmethod
+    def _pending(messages: List[dict], overflow: List[dict]) -> List[dict]:
+        """
+        Parte do excedente que ainda abre a janela gravada (outro turno pode
+        ter resumido o começo dela)
+        """
+        for start in range(len(overflow) + 1):
+            rest = overflow[start:]
+            if messages[:len(rest)] == rest:
+                return rest
+        return []
+
+    @staticmethod
+    async def save_turn(
+        db: Session,
+        user_id: int,
+        human_text: str,
+        ai_text: str,
+        summarizer: Optional[Summarizer] = None
+    ):
+        """
+        Registra um turno (mensagem do usuário + resposta) e aplica o orçamento
+
+        O turno é gravado em uma transação curta; o resumo (chamada ao LLM)
+        roda fora dela. O excedente continua na janela gravada até o resumo
+        ser gravado junto com a sua remoção, apenas se summary_version não
+        mudou: se o resumo falhar, o próximo turno resume de novo. Se outro
+        turno resumiu no meio, o que sobrou do excedente é resumido de novo
+        sobre o resumo atual.
+        """
+        memory = db.query(ConversationMemory).filter(
+            ConversationMemory.user_id == user_id
+        ).with_for_update().first()
+
+        if not memory:
+            memory = ConversationMemory(user_id=user_id, messages="[]", summary_version=0)
+            db.add(memory)
+
+        window = ConversationWindow(
+            summary=memory.summary,
+            messages=json.loads(memory.messages or "[]")
+        )
+
+        overflow = window.append_turn(human_text, ai_text, settings.MEMORY_TOKEN_BUDGET)
+
+        kept = overflow + window.messages if summarizer else window.messages
+        memory.messages = json.dumps(kept, ensure_ascii=False)
+        summary, version = memory.summary, memory.summary_version or 0
+        db.commit()
+
+        if not overflow or not summarizer:
+            return
+
+        for _ in range(MAX_SUMMARY_ATTEMPTS):
+            try:
+                summary = await summarizer(summary, overflow)
+            except Exception as e:
+                logger.error(f"❌ Erro ao resumir conversa: {e}")
+                return
+
+            memory = db.query(ConversationMemory).filter(
+                ConversationMemory.user_id == user_id
+            ).with_for_update().first()
+            if memory is None:
+                db.rollback()
+                return
+
+            messages = json.loads(memory.messages or "[]")
+            if memory.summary_version == version and messages[:len(overflow)] == overflow:
+                memory.summary = summary
+                memory.summary_version = version + 1
+                memory.messages = json.dumps(messages[len(overflow):], ensure_ascii=False)
+                db.commit()
+                logger.info(f"🧠 {len(overflow)} mensagem(ns) antigas condensadas no resumo do usuário {user_id}")
+                return
+
+            # Outro turno gravou um resumo enquanto este era gerado
+            overflow = ConversationMemoryService._pending(messages, overflow)
+            summary, version = memory.summary, memory.summary_version
+            db.commit()
+            if not overflow:
+                return
+
+        logger.warning(
+            f"⚠️ Resumo da conversa do usuário {user_id} adiado após {MAX_SUMMARY_ATTEMPTS} conflitos "
+            f"(mensagens mantidas na janela)"
+        )
+
+    @staticmethod
+    def clear(db: Session, user_id: int):
+        """
+        Apaga a memória de conversa do usuário
+        """
+        db.query(ConversationMemory).filter(
+            ConversationMemory.user_id == user_id
+        ).delete(synchronize_session=False)
+        db.commit()
+
+
+# Instância global
+conversation_memory = ConversationMemoryService()
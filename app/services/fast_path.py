@@ -0,0 +1,321 @@
+"""
+Fast path determinístico para mensagens simples de receita/despesa
+Ex: "gastei 45,90 no mercado", "recebi 3000 de salário ontem"
+
+Quando o parser tem confiança suficiente, a transação é criada direto pelo
+TransactionService e a confirmação usa o mesmo template do agente, sem
+chamar o LLM. Qualquer outra mensagem segue para o LangGraph Agent.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models import User, Category, PaymentMethod
+from app.schemas.transaction import TransactionCreate
+from app.services.transaction_service import transaction_service
+
+
+# Palavras-chave do SYSTEM_PROMPT (sem acentos)
+EXPENSE_KEYWORDS = ["gastei", "paguei", "comprei", "conta", "boleto", "fatura", "compra"]
+INCOME_KEYWORDS = ["recebi", "ganhei", "salario", "pagamento", "renda", "lucro", "venda", "deposito"]
+
+# Verbos que indicam claramente a intenção de registrar
+STRONG_VERBS = {"gastei", "paguei", "comprei", "recebi", "ganhei"}
+
+# Apelidos -> categoria (nomes de app.db.init_db)
+CATEGORY_ALIASES = {
+    "Alimentação": [
+        "mercado", "supermercado", "restaurante", "almoco", "jantar", "lanche", "lanchonete",
+        "ifood", "delivery", "padaria", "acougue", "feira", "pizza", "cafe", "comida"
+    ],
+    "Saúde": ["farmacia", "remedio", "consulta", "medico", "exame", "dentista", "plano de saude", "hospital"],
+    "Educação": ["escola", "curso", "livro", "livros", "faculdade", "mensalidade", "material escolar"],
+    "Moradia": ["aluguel", "condominio", "agua", "luz", "energia", "gas", "internet", "iptu"],
+    "Transporte": [
+        "combustivel", "gasolina", "etanol", "uber", "onibus", "metro",
+        "estacionamento", "pedagio", "mecanico", "taxi"
+    ],
+    "Lazer": ["cinema", "viagem", "netflix", "spotify", "streaming", "show", "bar", "balada", "jogo"],
+    "Vestuário": ["roupa", "roupas", "sapato", "tenis", "camisa", "calca", "vestido"],
+    "Salário": ["salario"],
+    "Freelance": ["freela", "freelance", "projeto"],
+    "Investimentos": ["investimento", "investimentos", "dividendos", "rendimento", "rendimentos"],
+}
+
+PAYMENT_ALIASES = {
+    "PIX": ["pix"],
+    "Dinheiro": ["dinheiro", "especie"],
+    "Cartão de Crédito": ["cartao de credito", "credito"],
+    "Cartão de Débito": ["cartao de debito", "debito"],
+    "Boleto": ["boleto"],
+    "Transferência Bancária": ["transferencia", "ted", "doc"],
+}
+
+# Mensagens que o parser nunca deve tratar
+_REJECT_WORDS = {"nao", "quanto", "quantos", "qual", "quais", "como", "muda", "altera", "apaga", "exclui", "cancela"}
+
+_DATE_DMY = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+_DATE_DAY = re.compile(r"\bdia\s+(\d{1,2})\b")
+# O valor termina em fronteira de palavra ou em um multiplicador colado ("5k", "2mil")
+_AMOUNT = re.compile(r"(?:r\$\s*)?\b(\d{1,3}(?:\.\d{3})+|\d+)(?:[,.](\d{1,2}))?(?:\b|(?=(?:k|mil)\b))(?:\s*(?:reais|real|conto|contos))?")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Quantificadores logo após o valor: "5 mil" é multiplicado; "10%", "3 x",
+# "2 milhões" mudam o sentido do número e ficam com o agente
+_QUANTITY = re.compile(r"\s*(mil|k|%|x|vezes|mi|milhao|milhoes|bi|bilhao|bilhoes)(?!\w)")
+_MULTIPLIERS = {"mil": 1000, "k": 1000}
+
+
+@dataclass
+class ParsedTransaction:
+    """
+    Resultado do parser do fast path
+    """
+    description: str
+    amount: float
+    transaction_type: str
+    transaction_date: date
+    category_name: Optional[str]
+    payment_method_name: Optional[str]
+    confidence: float
+
+
+def normalize_text(text: str) -> str:
+    """
+    Minúsculas e sem acentos
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _has_word(text: str, phrase: str) -> bool:
+    return re.search(rf"\b{re.escape(phrase)}\b", text) is not None
+
+
+def _original_span(raw: str, phrase: str) -> str:
+    """
+    Trecho da mensagem original (com acentos) correspondente à frase normalizada
+    """
+    normalized = normalize_text(raw)
+    match = re.search(rf"\b{re.escape(phrase)}\b", normalized)
+    if match and len(normalized) == len(raw):
+        return raw[match.start():match.end()]
+    return phrase
+
+
+def _find_alias(text: str, aliases: dict) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Primeiro apelido encontrado (frases mais longas primeiro)
+    Returns: (nome canônico, apelido encontrado)
+    """
+    candidates = sorted(
+        ((alias, name) for name, names in aliases.items() for alias in names),
+        key=lambda x: len(x[0]),
+        reverse=True
+    )
+    for alias, name in candidates:
+        if _has_word(text, alias):
+            return name, alias
+    return None, None
+
+
+class FastPathParser:
+    """
+    Parser baseado em regras para mensagens PT-BR simples
+    """
+
+    @staticmethod
+    def _parse_date(text: str, today: date) -> Tuple[date, str]:
+        """
+        Extrai data relativa/explícita e devolve o texto sem ela
+        """
+        if _has_word(text, "anteontem"):
+            return today - timedelta(days=2), re.sub(r"\banteontem\b", " ", text)
+        if _has_word(text, "ontem"):
+            return today - timedelta(days=1), re.sub(r"\bontem\b", " ", text)
+        if _has_word(text, "hoje"):
+            return today, re.sub(r"\bhoje\b", " ", text)
+
+        match = _DATE_DMY.search(text)
+        if match:
+            day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+            year = int(year) if year else today.year
+            if year < 100:
+                year += 2000
+            try:
+                return date(year, month, day), text[:match.start()] + " " + text[match.end():]
+            except ValueError:
+                pass
+
+        match = _DATE_DAY.search(text)
+        if match:
+            day = int(match.group(1))
+            try:
+                parsed = date(today.year, today.month, day)
+                # "dia 28" no início do mês se refere ao mês passado
+                if parsed > today:
+                    last_month = today.replace(day=1) - timedelta(days=1)
+                    parsed = date(last_month.year, last_month.month, day)
+                return parsed, text[:match.start()] + " " + text[match.end():]
+            except ValueError:
+                pass
+
+        return today, text
+
+    @staticmethod
+    def _parse_amount(text: str) -> Optional[float]:
+        """
+        Único valor da mensagem, ou None se houver zero ou vários números
+        ou um quantificador que o parser não interpreta
+        """
+        if len(_NUMBER.findall(text)) != 1:
+            return None
+
+        match = _AMOUNT.search(text)
+        if not match:
+            return None
+
+        integer, cents = match.group(1), match.group(2)
+        value = float(integer.replace(".", ""))
+        if cents:
+            value += float(cents.ljust(2, "0")) / 100
+
+        quantity = _QUANTITY.match(text, match.end())
+        if quantity:
+            if quantity.group(1) not in _MULTIPLIERS:
+                return None
+            value *= _MULTIPLIERS[quantity.group(1)]
+
+        return value if value > 0 else None
+
+    @staticmethod
+    def parse(text: str, today: Optional[date] = None) -> Optional[ParsedTransaction]:
+        """
+        Interpreta a mensagem. Retorna None se não parecer uma transação simples.
+        """
+        today = today or date.today()
+        raw = (text or "").strip()
+
+        # Listas (ex: nota fiscal) e perguntas ficam com o agente
+        if not raw or "\n" in raw or "?" in raw or len(raw) > 120:
+            return None
+
+        normalized = normalize_text(raw)
+        words = re.findall(r"\w+", normalized)
+        if _REJECT_WORDS.intersection(words):
+            return None
+
+        expense_hits = [k for k in EXPENSE_KEYWORDS if _has_word(normalized, k)]
+        income_hits = [k for k in INCOME_KEYWORDS if _has_word(normalized, k)]
+
+        # "paguei a conta" é despesa; "recebi o pagamento" é receita
+        if STRONG_VERBS.intersection(expense_hits) and not STRONG_VERBS.intersection(income_hits):
+            transaction_type = "expense"
+        elif STRONG_VERBS.intersection(income_hits) and not STRONG_VERBS.intersection(expense_hits):
+            transaction_type = "income"
+        elif expense_hits and not income_hits:
+            transaction_type = "expense"
+        elif income_hits and not expense_hits:
+            transaction_type = "income"
+        else:
+            return None
+
+        transaction_date, remaining = FastPathParser._parse_date(normalized, today)
+
+        payment_name, payment_alias = _find_alias(remaining, PAYMENT_ALIASES)
+        if payment_alias:
+            remaining = re.sub(rf"\b{re.escape(payment_alias)}\b", " ", remaining)
+
+        category_name, category_alias = _find_alias(remaining, CATEGORY_ALIASES)
+
+        amount = FastPathParser._parse_amount(
+            re.sub(rf"\b{re.escape(category_alias)}\b", " ", remaining) if category_alias else remaining
+        )
+        if amount is None:
+            return None
+
+        # Pontuação de confiança
+        confidence = 0.35  # tipo identificado por palavra-chave
+        if STRONG_VERBS.intersection(expense_hits + income_hits):
+            confidence += 0.1
+        confidence += 0.35  # exatamente um valor
+        if category_name:
+            confidence += 0.2
+
+        description = (
+            _original_span(raw, category_alias).capitalize() if category_alias
+            else category_name or "Transação"
+        )
+
+        return ParsedTransaction(
+            description=description,
+            amount=round(amount, 2),
+            transaction_type=transaction_type,
+            transaction_date=transaction_date,
+            category_name=category_name,
+            payment_method_name=payment_name,
+            confidence=round(min(confidence, 1.0), 2)
+        )
+
+
+class FastPathService:
+    """
+    Executa o fast path e mantém o contador de acertos
+    """
+
+    @staticmethod
+    def try_handle(db: Session, user: User, text: str) -> Optional[str]:
+        """
+        Registra a transação sem LLM quando o parser é confiável
+
+        Returns:
+            Mensagem de confirmação ou None (seguir para o agente)
+        """
+        if not settings.FAST_PATH_ENABLED:
+            return None
+
+        from app.services.langgraph_tools import formatar_confirmacao_transacao
+
+        parsed = FastPathParser.parse(text)
+
+        if not parsed or parsed.confidence < settings.FAST_PATH_MIN_CONFIDENCE:
+            metrics.increment("fast_path.misses")
+            metrics.set_gauge("fast_path.hit_rate", metrics.ratio("fast_path.hits", "fast_path.misses"))
+            return None
+
+        category = db.query(Category).filter(Category.name == parsed.category_name).first() if parsed.category_name else None
+        payment_method = db.query(PaymentMethod).filter(PaymentMethod.name == parsed.payment_method_name).first() if parsed.payment_method_name else None
+
+        transaction_data = TransactionCreate(
+            title=parsed.description,
+            amount=parsed.amount,
+            transaction_type=parsed.transaction_type,
+            transaction_date=parsed.transaction_date,
+            category_id=category.id if category else None,
+            payment_method_id=payment_method.id if payment_method else None,
+            is_recurring=False,
+            is_confirmed=True
+        )
+
+        transaction = transaction_service.create(db, user, transaction_data)
+
+        metrics.increment("fast_path.hits")
+        metrics.set_gauge("fast_path.hit_rate", metrics.ratio("fast_path.hits", "fast_path.misses"))
+        logger.info(f"⚡ Fast path registrou transação {transaction.id} (confiança {parsed.confidence})")
+
+        return formatar_confirmacao_transacao(
+            transaction,
+            category.name if category else None,
+            payment_method.name if payment_method else None
+        )
+
+
+# Instâncias globais
+fast_path_parser = FastPathParser()
+fast_path = FastPathService()
@@ -0,0 +1,159 @@
+"""
+Idempotência do webhook por ID da mensagem do WhatsApp
+Duas camadas:
+1. LRU em memória com os IDs vistos recentemente (sem acesso ao banco)
+2. Tabela processed_messages com message_id único e expiração (TTL)
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models import ProcessedMessage
+
+# Marcador de "vista, mas ainda sem resposta" no LRU
+_PENDING = object()
+
+
+class MessageIdempotency:
+    """
+    Deduplicação de mensagens reentregues pela Uazapi
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or settings.IDEMPOTENCY_LRU_SIZE
+        self._seen: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _remember(self, message_id: str, response: object = _PENDING):
+        with self._lock:
+            self._seen[message_id] = response
+            self._seen.move_to_end(message_id)
+            while len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+
+    def seen_recently(self, message_id: str) -> bool:
+        """
+        Consulta apenas o LRU em memória
+        """
+        with self._lock:
+            if message_id in self._seen:
+                self._seen.move_to_end(message_id)
+                return True
+            return False
+
+    def cached_response(self, message_id: str) -> Optional[str]:
+        """
+        Resposta guardada no LRU (None se ainda não processada)
+        """
+        with self._lock:
+            response = self._seen.get(message_id)
+        return None if response is _PENDING else response
+
+    def register(self, db: Session, message_id: str, remote_jid: str) -> bool:
+        """
+        Registra a mensagem na tabela processed_messages.
+        Faz apenas flush: o commit acontece junto com o enfileiramento.
+        Deve ser a primeira escrita da sessão (duplicatas fazem rollback).
+        Mensagens novas só entram no LRU por remember(), após o commit.
+
+        Returns:
+            True se a mensagem é nova, False se é duplicada
+        """
+        record = ProcessedMessage(
+            message_id=message_id,
+            remote_jid=remote_jid,
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        )
+
+        try:
+            db.add(record)
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            existing = self.get(db, message_id)
+            self._remember(message_id, existing.response if existing and existing.response else _PENDING)
+            return False
+
+        return True
+
+    def remember(self, message_id: str):
+        """
+        Marca a mensagem como vista no LRU.
+        Chamar só depois do commit do registro: se a transação falhar, a
+        reentrega da Uazapi precisa ser aceita.
+        """
+        self._remember(message_id)
+
+    @staticmethod
+    def get(db: Session, message_id: str) -> Optional[ProcessedMessage]:
+        """
+        Busca registro da mensagem processada
+        """
+        return db.query(ProcessedMessage).filter(
+            ProcessedMessage.message_id == message_id
+        ).first()
+
+    def record_response(self, db: Session, message_id: str, response: str):
+        """
+        Guarda a resposta enviada ao usuário para permitir replay
+        """
+        db.query(ProcessedMessage).filter(
+            ProcessedMessage.message_id == message_id
+        ).update({ProcessedMessage.response: response}, synchronize_session=False)
+        db.commit()
+
+        self._remember(message_id, response)
+
+    @staticmethod
+    def sweep_expired(db: Session) -> int:
+        """
+        Remove registros expirados (TTL)
+        """
+        result = db.execute(
+            delete(ProcessedMessage).where(
+                ProcessedMessage.expires_at < datetime.now(timezone.utc)
+            )
+        )
+        db.commit()
+        return result.rowcount or 0
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS)
+            db = SessionLocal()
+            try:
+                removed = self.sweep_expired(db)
+                if removed:
+                    logger.info(f"🧹 {removed} registro(s) de idempotência expirados removidos")
+            except Exception as e:
+                logger.error(f"❌ Erro na limpeza de idempotência: {e}")
+            finally:
+                db.close()
+
+    def start(self):
+        """
+        Inicia a limpeza periódica (startup da aplicação)
+        """
+        self._sweeper = asyncio.create_task(self._sweep_loop(), name="idempotency-sweeper")
+
+    async def stop(self):
+        """
+        Encerra a limpeza periódica (shutdown da aplicação)
+        """
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+
+# Instância global
+message_idempotency = MessageIdempotency()
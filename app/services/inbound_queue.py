@@ -0,0 +1,307 @@
+"""
+Fila durável de mensagens recebidas + pool de workers
+O webhook /webhook/finmec apenas persiste o payload (InboundJob) e responde 202;
+os workers drenam a fila com entrega at-least-once, visibility timeout
+e dead-letter após INBOUND_MAX_ATTEMPTS tentativas.
+
+Os jobs de um mesmo remote_jid são processados um de cada vez e em ordem:
+um job só é reservado se não houver outro do usuário em processamento nem
+um anterior ainda disponível, mesmo com vários workers.
+
+Com COALESCE_WINDOW_MS > 0, as mensagens em rajada do mesmo remote_jid são
+agrupadas na reserva: o grupo só fica disponível quando o usuário fica em
+silêncio pela janela (ou após COALESCE_MAX_WAIT_MS) e todos os jobs do grupo
+continuam reservados até o turno combinado ser concluído.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List
+from sqlalchemy import select, and_, or_, exists
+from sqlalchemy.orm import Session, aliased
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.database import SessionLocal
+from app.models import InboundJob, InboundJobStatus
+from app.schemas.webhook import WebhookRequest
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class InboundQueue:
+    """
+    Operações da fila de entrada sobre a tabela inbound_jobs
+    """
+
+    @staticmethod
+    def enqueue(db: Session, webhook_data: WebhookRequest) -> InboundJob:
+        """
+        Persiste o webhook como job pendente
+        """
+        job = InboundJob(
+            remote_jid=webhook_data.remoteJid,
+            message_id=webhook_data.message.id,
+            payload=webhook_data.model_dump_json(),
+            status=InboundJobStatus.PENDING,
+            attempts=0,
+            available_at=_utcnow()
+        )
+
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        return job
+
+    @staticmethod
+    def _available(now: datetime, job=InboundJob):
+        """
+        Jobs elegíveis: pendentes disponíveis ou em processamento com prazo
+        expirado (worker morreu)
+        """
+        return or_(
+            and_(
+                job.status == InboundJobStatus.PENDING,
+                job.available_at <= now
+            ),
+            and_(
+                job.status == InboundJobStatus.PROCESSING,
+                job.locked_until < now
+            )
+        )
+
+    @staticmethod
+    def _next_in_line(now: datetime):
+        """
+        Job é a vez do seu remote_jid: nenhum outro do usuário em processamento
+        e nenhum anterior ainda disponível (um worker concorrente que acabou de
+        bloquear o anterior também o vê disponível e pula este)
+        """
+        sibling = aliased(InboundJob)
+        in_flight = exists().where(
+            sibling.remote_jid == InboundJob.remote_jid,
+            sibling.status == InboundJobStatus.PROCESSING,
+            sibling.locked_until >= now
+        )
+        earlier = exists().where(
+            sibling.remote_jid == InboundJob.remote_jid,
+            sibling.id < InboundJob.id,
+            InboundQueue._available(now, sibling)
+        )
+        return and_(~in_flight, ~earlier)
+
+    @staticmethod
+    def _burst_ready(now: datetime, window: float):
+        """
+        Rajada do mesmo remote_jid pronta para o turno combinado: sem
+        mensagem nova dentro da janela (ou esperando há mais que o teto)
+        """
+        sibling = aliased(InboundJob)
+        burst_open = exists().where(
+            sibling.remote_jid == InboundJob.remote_jid,
+            sibling.status == InboundJobStatus.PENDING,
+            sibling.available_at > now - timedelta(seconds=window),
+            sibling.available_at <= now
+        )
+        max_wait = timedelta(milliseconds=settings.COALESCE_MAX_WAIT_MS)
+        return or_(
+            ~burst_open,
+            InboundJob.available_at <= now - max_wait,
+            InboundJob.status == InboundJobStatus.PROCESSING
+        )
+
+    @staticmethod
+    def claim(db: Session, visibility_timeout: int) -> List[InboundJob]:
+        """
+        Reserva o próximo job disponível por visibility_timeout segundos,
+        respeitando a ordem de cada remote_jid. Com o agrupamento ativo, reserva junto os demais jobs disponíveis do
+        mesmo remote_jid (em ordem de id). No PostgreSQL usa FOR UPDATE SKIP LOCKED.
+
+        Returns:
+            Jobs reservados (lista vazia se não houver job pronto)
+        """
+        now = _utcnow()
+        window = settings.COALESCE_WINDOW_MS / 1000
+
+        query = select(InboundJob).where(
+            InboundQueue._available(now),
+            InboundQueue._next_in_line(now)
+        )
+        if window > 0:
+            query = query.where(InboundQueue._burst_ready(now, window))
+        query = query.order_by(InboundJob.id).limit(1).with_for_update(skip_locked=True)
+
+        first = db.scalars(query).first()
+        if not first:
+            db.rollback()
+            return []
+
+        jobs = [first]
+        if window > 0:
+            jobs = list(db.scalars(
+                select(InboundJob).where(
+                    InboundJob.remote_jid == first.remote_jid,
+                    InboundQueue._available(now)
+                ).order_by(InboundJob.id).with_for_update(skip_locked=True)
+            ))
+
+        claimed = []
+        for job in jobs:
+            # Reentregas que já esgotaram as tentativas vão para dead-letter
+            if job.attempts >= settings.INBOUND_MAX_ATTEMPTS:
+                job.status = InboundJobStatus.DEAD
+                job.last_error = job.last_error or "Visibility timeout esgotado"
+                logger.error(f"💀 Job {job.id} movido para dead-letter")
+                continue
+
+            job.status = InboundJobStatus.PROCESSING
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=visibility_timeout)
+            claimed.append(job)
+
+        db.commit()
+        for job in claimed:
+            db.refresh(job)
+
+        if window > 0 and claimed:
+            metrics.increment("coalescer.agent_turns")
+            metrics.increment("coalescer.invocations_saved", len(claimed) - 1)
+            if len(claimed) > 1:
+                logger.info(f"🧩 {len(claimed)} mensagens de {first.remote_jid} agrupadas em um turno")
+
+        return claimed
+
+    @staticmethod
+    def complete(db: Session, jobs: List[InboundJob]):
+        """
+        Marca os jobs como concluídos
+        """
+        for job in jobs:
+            job.status = InboundJobStatus.DONE
+            job.locked_until = None
+            job.last_error = None
+        db.commit()
+
+    @staticmethod
+    def fail(db: Session, jobs: List[InboundJob], error: str):
+        """
+        Registra falha: reagenda com backoff exponencial ou move para dead-letter
+        """
+        for job in jobs:
+            job.last_error = error[:2000]
+            job.locked_until = None
+
+            if job.attempts >= settings.INBOUND_MAX_ATTEMPTS:
+                job.status = InboundJobStatus.DEAD
+                logger.error(f"💀 Job {job.id} movido para dead-letter após {job.attempts} tentativas")
+            else:
+                delay = settings.INBOUND_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+                job.status = InboundJobStatus.PENDING
+                job.available_at = _utcnow() + timedelta(seconds=delay)
+                logger.warning(f"⚠️ Job {job.id} falhou (tentativa {job.attempts}), nova tentativa em {delay}s")
+
+        db.commit()
+
+
+class InboundWorkerPool:
+    """
+    Pool de workers assíncronos que drenam a fila de entrada
+    """
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def notify(self):
+        """
+        Acorda os workers ociosos (chamado após enfileirar)
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, workers: int = None):
+        """
+        Inicia os workers (startup da aplicação)
+        """
+        workers = workers or settings.INBOUND_WORKERS
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(n), name=f"inbound-worker-{n}")
+            for n in range(workers)
+        ]
+        logger.info(f"📥 Fila de entrada iniciada com {workers} worker(s)")
+
+    async def stop(self):
+        """
+        Encerra os workers (shutdown da aplicação).
+        Jobs interrompidos voltam à fila ao expirar o visibility timeout.
+        """
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("📥 Fila de entrada encerrada")
+
+    async def _run(self, worker_id: int):
+        """
+        Loop do worker: reservar, processar, confirmar
+        """
+        while not self._stopping:
+            try:
+                processed = await self._process_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro no worker {worker_id}: {e}", exc_info=True)
+                processed = False
+
+            if not processed:
+                # Fila vazia (ou rajadas ainda abertas): aguardar novo job,
+                # o intervalo de polling ou o fim da janela de agrupamento
+                timeout = settings.INBOUND_POLL_INTERVAL_SECONDS
+                if settings.COALESCE_WINDOW_MS > 0:
+                    timeout = min(timeout, settings.COALESCE_WINDOW_MS / 1000)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _process_next(self) -> bool:
+        """
+        Processa um job (ou uma rajada agrupada) da fila.
+        Retorna False se não havia job pronto.
+        """
+        from app.services.webhook_service import webhook_service
+
+        db = SessionLocal()
+        try:
+            jobs = InboundQueue.claim(db, settings.INBOUND_VISIBILITY_TIMEOUT_SECONDS)
+            if not jobs:
+                return False
+
+            job_ids = ", ".join(str(job.id) for job in jobs)
+            try:
+                webhooks = [WebhookRequest.model_validate_json(job.payload) for job in jobs]
+                await webhook_service.handle_messages(db, webhooks)
+            except Exception as e:
+                logger.error(f"❌ Erro ao processar job(s) {job_ids}: {e}", exc_info=True)
+                db.rollback()
+                InboundQueue.fail(db, jobs, str(e))
+            else:
+                InboundQueue.complete(db, jobs)
+
+            return True
+        finally:
+            db.close()
+
+
+# Instâncias globais
+inbound_queue = InboundQueue()
+inbound_worker_pool = InboundWorkerPool()
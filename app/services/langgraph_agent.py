@@ -2,17 +2,21 @@
 LangGraph Agent - Agente de IA para controle financeiro
 Baseado no AI Agent do N8n: [FLUXO PRINCIPAL]
 """
-from typing import TypedDict, Annotated, Sequence
+import threading
+from types import MappingProxyType
+from typing import TypedDict, Annotated, Sequence, Mapping, Any
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langchain_core.tools import BaseTool
 from sqlalchemy.orm import Session
 from loguru import logger
 
 from app.core.config import settings
 from app.models import User
+from app.services.conversation_memory import conversation_memory
+from app.services.tool_runtime import ToolContext, ToolRuntime
 
 
 # System Prompt baseado no N8n
@@ -54,9 +58,10 @@ Quando inserir uma transação, use EXATAMENTE este formato:
 2. Se a data não for mencionada, use a data atual
 3. Valores devem ser números positivos
 4. Seja cordial e use emojis para melhor visualização
-5. Se o usuário enviar uma lista de itens (ex: de uma nota fiscal), registre cada item como uma transação separada
+5. Se o usuário enviar uma lista de itens (ex: de uma nota fiscal), registre cada item como uma transação separada, todos de uma vez com a ferramenta insere_transacoes_em_lote
 6. Quando não tiver certeza, pergunte ao usuário
 7. Use as ferramentas disponíveis para consultar categorias, saldo, etc
+8. Quando o usuário pedir um gráfico, envie a imagem com a ferramenta envia_grafico (não descreva o gráfico em texto)
 
 **Tratamento de Imagens/Áudios:**
 - Quando receber texto extraído de imagem ou áudio transcrito, processe normalmente
@@ -69,6 +74,19 @@ Quando inserir uma transação, use EXATAMENTE este formato:
 - Sempre confirme ações realizadas"""
 
 
+# Prompt para condensar mensagens antigas da memória de conversa
+SUMMARY_PROMPT = """Atualize o resumo da conversa entre o usuário e o assistente financeiro.
+Mantenha apenas fatos úteis para as próximas mensagens: transações registradas
+(com código), categorias, valores, datas e pedidos em aberto. Responda só com o
+resumo, em português, com no máximo {max_tokens} tokens.
+
+Resumo atual:
+{summary}
+
+Novas mensagens:
+{messages}"""
+
+
 class AgentState(TypedDict):
     """
     Estado do agente LangGraph
@@ -81,8 +99,15 @@ class AgentState(TypedDict):
 class FinancialAgent:
     """
     Agente financeiro usando LangGraph
+
+    O grafo é compilado uma única vez (no startup ou no primeiro uso) e
+    compartilhado entre requisições concorrentes. Nada específico do usuário
+    fica no grafo: user_id viaja no estado e o ToolContext do turno (sessão
+    do banco + dados memoizados) em config["configurable"]["tool_context"].
     """
 
+    GRAPH_NAME = "financeiro"
+
     def __init__(self):
         # Modelo OpenAI baseado no N8n: gpt-4o-mini-2024-07-18
         self.llm = ChatOpenAI(
@@ -91,63 +116,57 @@ class FinancialAgent:
             temperature=0.7
         )
 
-        self.graph = None
+        # Registro imutável de grafos compilados (nome -> grafo)
+        self._graphs: Mapping[str, Any] = MappingProxyType({})
+        self._lock = threading.Lock()
 
-    def create_tools_for_user(self, user_id: int, db: Session) -> list:
+    def get_tools(self) -> list:
         """
-        Cria ferramentas específicas para o usuário.
-        Injeta user_id e db nas funções.
+        Retorna as tools do agente.
+        O ToolContext é injetado em tempo de execução
+        e não faz parte do schema enviado ao LLM.
         """
-        from app.services import langgraph_tools
-        from functools import partial
-
-        # Criar versões parciais das tools com user_id e db injetados
-        tools = []
-
-        # Lista de todas as tools
-        tool_functions = [
-            langgraph_tools.lista_todas_categorias,
-            langgraph_tools.busca_informacoes_carteira_atual,
-            langgraph_tools.insere_transacao,
-            langgraph_tools.transacoes_recentes,
-            langgraph_tools.resumo_mes_atual,
-            langgraph_tools.consulta_forma_pagamento
-        ]
+        from app.services.langgraph_tools import get_all_tools
 
-        for tool_func in tool_functions:
-            # Criar wrapper que injeta user_id e db
-            tools.append(tool_func)
-
-        return tools
+        return get_all_tools()
 
     def build_graph(self, tools: list):
         """
-        Constrói o grafo LangGraph com as tools
+        Constrói e compila o grafo LangGraph com as tools
         """
         # Bind tools ao LLM
         llm_with_tools = self.llm.bind_tools(tools)
+        runtime = ToolRuntime(tools)
 
         # Definir o grafo
         workflow = StateGraph(AgentState)
 
         # Nó do agente
-        def agent_node(state: AgentState):
+        async def agent_node(state: AgentState):
             """Nó principal do agente"""
             messages = state["messages"]
 
-            # Adicionar system prompt se for a primeira mensagem
-            if len(messages) == 1:
-                messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
+            # Adicionar system prompt se ainda não estiver no histórico
+            if not isinstance(messages[0], SystemMessage):
+                messages = [SystemMessage(content=SYSTEM_PROMPT)] + list(messages)
 
-            response = llm_with_tools.invoke(messages)
-            return {"messages": messages + [response]}
+            response = await llm_with_tools.ainvoke(messages)
+            return {"messages": list(messages) + [response]}
 
         # Nó de ferramentas
-        tool_node = ToolNode(tools)
+        async def tools_node(state: AgentState, config: RunnableConfig):
+            """
+            Executa as tool calls com o ToolContext do turno (config)
+            """
+            tool_messages = await runtime.execute(
+                state["messages"][-1].tool_calls,
+                config["configurable"]["tool_context"]
+            )
+            return {"messages": list(state["messages"]) + tool_messages}
 
         # Adicionar nós
         workflow.add_node("agent", agent_node)
-        workflow.add_node("tools", tool_node)
+        workflow.add_node("tools", tools_node)
 
         # Definir roteamento
         def should_continue(state: AgentState):
@@ -167,7 +186,65 @@ class FinancialAgent:
         workflow.add_edge("tools", "agent")
 
         # Compilar
-        self.graph = workflow.compile()
+        return workflow.compile()
+
+    def warmup(self):
+        """
+        Compila os grafos uma única vez e publica o registro imutável.
+        Chamado no startup da aplicação; chamadas repetidas não recompilam.
+        """
+        with self._lock:
+            if self._graphs:
+                return
+
+            graphs = {self.GRAPH_NAME: self.build_graph(self.get_tools())}
+            self._graphs = MappingProxyType(graphs)
+            logger.info(f"✅ Grafos do agente compilados: {list(graphs)}")
+
+    async def summarize_history(self, summary: str, messages: list) -> str:
+        """
+        Condensa mensagens antigas da memória no resumo acumulado
+        """
+        transcript = "\n".join(
+            f"{'Usuário' if m['role'] == 'human' else 'Assistente'}: {m['content']}"
+            for m in messages
+        )
+        prompt = SUMMARY_PROMPT.format(
+            max_tokens=settings.MEMORY_SUMMARY_MAX_TOKENS,
+            summary=summary or "(vazio)",
+            messages=transcript
+        )
+
+        response = await self.llm.ainvoke(
+            [HumanMessage(content=prompt)],
+            max_tokens=settings.MEMORY_SUMMARY_MAX_TOKENS
+        )
+        return response.content
+
+    async def remember(self, db: Session, user: User, message_text: str, response: str):
+        """
+        Registra o turno na memória de conversa do usuário
+        """
+        try:
+            await conversation_memory.save_turn(
+                db,
+                user.id,
+                message_text,
+                response,
+                summarizer=self.summarize_history
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Erro ao salvar memória de conversa: {e}")
+
+    @property
+    def graph(self):
+        """
+        Grafo compilado compartilhado entre requisições
+        """
+        if not self._graphs:
+            self.warmup()
+        return self._graphs[self.GRAPH_NAME]
 
     async def process_message(
         self,
@@ -189,21 +266,29 @@ class FinancialAgent:
         try:
             logger.info(f"🤖 Agent processando mensagem de {user.remote_jid}")
 
-            # Criar tools específicas para este usuário
-            tools = self.create_tools_for_user(user.id, db)
-
-            # Construir grafo com as tools
-            self.build_graph(tools)
+            # Histórico limitado: resumo no system prompt + mensagens recentes
+            window = conversation_memory.load(db, user.id)
+            system_prompt = SYSTEM_PROMPT
+            if window.summary:
+                system_prompt += f"\n\n**Resumo da conversa até aqui:**\n{window.summary}"
 
             # Estado inicial
             initial_state = {
-                "messages": [HumanMessage(content=message_text)],
+                "messages": [
+                    SystemMessage(content=system_prompt),
+                    *window.as_messages(),
+                    HumanMessage(content=message_text)
+                ],
                 "user_id": user.id,
                 "user_remote_jid": user.remote_jid
             }
 
-            # Executar o grafo
-            result = await self.graph.ainvoke(initial_state)
+            # Executar o grafo (dados da requisição seguem no estado/config)
+            tool_context = ToolContext(db=db, user_id=user.id, user=user)
+            result = await self.graph.ainvoke(
+                initial_state,
+                config={"configurable": {"tool_context": tool_context}}
+            )
 
             # Extrair resposta final
             final_message = result["messages"][-1]
@@ -214,6 +299,8 @@ class FinancialAgent:
                 response = str(final_message)
 
             logger.info(f"✅ Agent respondeu: {response[:100]}...")
+
+            await self.remember(db, user, message_text, response)
             return response
 
         except Exception as e:
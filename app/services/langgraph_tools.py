@@ -2,33 +2,59 @@
 LangGraph Tools - Ferramentas que o Agent pode usar
 Baseado nas tools do N8n: [FLUXO PRINCIPAL] - AI Agent tools
 """
-from typing import Dict, Any, List, Optional
+import json
+from typing import Dict, Any, List, Optional, Annotated
 from datetime import date, datetime, timedelta
-from langchain_core.tools import tool
-from sqlalchemy.orm import Session
+from langchain_core.tools import tool, InjectedToolArg
+from pydantic import BaseModel, Field
 from loguru import logger
 
-from app.models import User, Category, PaymentMethod, Transaction, Wallet, Reminder
-from app.services.transaction_service import transaction_service
+from app.models import Transaction
+from app.services.transaction_service import transaction_service, consecutive_periods
+from app.services.chart_renderer import chart_renderer
+from app.services.tool_runtime import ToolContext
 from app.schemas.transaction import TransactionCreate
 from app.schemas.reminder import ReminderCreate
 
 
+def formatar_confirmacao_transacao(
+    transaction: Transaction,
+    categoria_nome: Optional[str] = None,
+    forma_pagamento_nome: Optional[str] = None
+) -> str:
+    """
+    Mensagem de confirmação de transação inserida (template do N8n).
+    Compartilhada entre a tool insere_transacao e o fast path.
+    """
+    emoji = "🟢" if transaction.transaction_type == "income" else "🔴"
+    tipo_texto = "RECEITA" if transaction.transaction_type == "income" else "DESPESA"
+    valor_formatado = f"R$ {transaction.amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    data_formatada = transaction.transaction_date.strftime("%d/%m/%Y")
+
+    return f"""{emoji} **{tipo_texto} INSERIDA COM SUCESSO**
+
+*{transaction.title}*
+💰 {valor_formatado}
+🗓 {data_formatada}
+📊 {categoria_nome or "Sem categoria"}
+📍 Forma de pagamento: {forma_pagamento_nome or "Não especificado"}
+🔍 Código: {transaction.id}"""
+
+
 @tool
-def lista_todas_categorias(user_id: int, db: Session) -> str:
+def lista_todas_categorias(ctx: Annotated[ToolContext, InjectedToolArg]) -> str:
     """
     Lista todas as categorias disponíveis para classificar transações.
     Útil quando o usuário quer saber quais categorias existem.
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
 
     Returns:
         String formatada com lista de categorias
     """
     try:
-        categories = db.query(Category).filter(Category.is_active == True).all()
+        categories = ctx.categories
 
         if not categories:
             return "Nenhuma categoria encontrada."
@@ -47,25 +73,18 @@ def lista_todas_categorias(user_id: int, db: Session) -> str:
 
 
 @tool
-def busca_informacoes_carteira_atual(user_id: int, db: Session) -> str:
+def busca_informacoes_carteira_atual(ctx: Annotated[ToolContext, InjectedToolArg]) -> str:
     """
     Busca informações da carteira principal do usuário (saldo atual).
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
 
     Returns:
         String formatada com informações da carteira
     """
     try:
-        wallet = db.query(Wallet).filter(
-            Wallet.user_id == user_id,
-            Wallet.is_default == True
-        ).first()
-
-        if not wallet:
-            wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
+        wallet = ctx.wallet
 
         if not wallet:
             return "Nenhuma carteira encontrada."
@@ -84,8 +103,7 @@ Criada em: {wallet.created_at.strftime('%d/%m/%Y')}"""
 
 @tool
 def insere_transacao(
-    user_id: int,
-    db: Session,
+    ctx: Annotated[ToolContext, InjectedToolArg],
     descricao: str,
     valor: float,
     tipo: str,
@@ -97,8 +115,7 @@ def insere_transacao(
     Insere uma nova transação financeira (receita ou despesa).
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
         descricao: Descrição da transação
         valor: Valor da transação
         tipo: "receita" ou "despesa"
@@ -110,7 +127,7 @@ def insere_transacao(
         Mensagem de confirmação formatada para WhatsApp
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = ctx.user
         if not user:
             return "Erro: Usuário não encontrado."
 
@@ -128,23 +145,9 @@ def insere_transacao(
         except:
             parsed_date = date.today()
 
-        # Buscar categoria por nome
-        category_id = None
-        if categoria_nome:
-            category = db.query(Category).filter(
-                Category.name.ilike(f"%{categoria_nome}%")
-            ).first()
-            if category:
-                category_id = category.id
-
-        # Buscar forma de pagamento por nome
-        payment_method_id = None
-        if forma_pagamento_nome:
-            payment_method = db.query(PaymentMethod).filter(
-                PaymentMethod.name.ilike(f"%{forma_pagamento_nome}%")
-            ).first()
-            if payment_method:
-                payment_method_id = payment_method.id
+        # Buscar categoria e forma de pagamento por nome (memoizadas no turno)
+        category = ctx.find_category(categoria_nome)
+        payment_method = ctx.find_payment_method(forma_pagamento_nome)
 
         # Criar transação
         transaction_data = TransactionCreate(
@@ -153,9 +156,9 @@ def insere_transacao(
             amount=abs(valor),
             transaction_type=transaction_type,
             transaction_date=parsed_date,
-            category_id=category_id,
-            payment_method_id=payment_method_id,
-            wallet_id=None,  # Vai usar carteira padrão
+            category_id=category.id if category else None,
+            payment_method_id=payment_method.id if payment_method else None,
+            wallet_id=ctx.wallet.id if ctx.wallet else None,
             notes=None,
             receipt_url=None,
             tags=None,
@@ -163,50 +166,132 @@ def insere_transacao(
             is_confirmed=True
         )
 
-        transaction = transaction_service.create(db, user, transaction_data)
+        transaction = transaction_service.create(ctx.db, user, transaction_data)
+
+        return formatar_confirmacao_transacao(
+            transaction,
+            category.name if category else None,
+            payment_method.name if payment_method else None
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao inserir transação: {e}")
+        return f"Erro ao inserir transação: {str(e)}"
+
+
+class ItemTransacaoLote(BaseModel):
+    """
+    Item de uma transação em lote (ex: item de nota fiscal)
+    """
+    descricao: str = Field(..., description="Descrição do item")
+    valor: float = Field(..., gt=0, description="Valor do item")
+    categoria_nome: Optional[str] = Field(None, description="Nome da categoria (opcional)")
+
+
+@tool
+def insere_transacoes_em_lote(
+    ctx: Annotated[ToolContext, InjectedToolArg],
+    itens: List[ItemTransacaoLote],
+    tipo: str,
+    data_transacao: str,
+    forma_pagamento_nome: Optional[str] = None
+) -> str:
+    """
+    Insere várias transações de uma só vez (ex: todos os itens de uma nota fiscal).
+    Prefira esta ferramenta a chamar insere_transacao várias vezes.
+
+    Args:
+        ctx: Contexto do turno (injetado, não visível ao LLM)
+        itens: Lista de itens com descricao, valor e categoria_nome (opcional)
+        tipo: "receita" ou "despesa" (vale para todos os itens)
+        data_transacao: Data no formato YYYY-MM-DD ou DD/MM/YYYY
+        forma_pagamento_nome: Nome da forma de pagamento (opcional)
+
+    Returns:
+        Resumo compacto das transações inseridas
+    """
+    try:
+        user = ctx.user
+        if not user:
+            return "Erro: Usuário não encontrado."
+
+        if not itens:
+            return "Nenhum item informado."
+
+        transaction_type = "income" if tipo.lower() in ["receita", "renda", "ganho"] else "expense"
+
+        try:
+            if "/" in data_transacao:
+                parsed_date = datetime.strptime(data_transacao, "%d/%m/%Y").date()
+            else:
+                parsed_date = datetime.strptime(data_transacao, "%Y-%m-%d").date()
+        except ValueError:
+            parsed_date = date.today()
+
+        payment_method = ctx.find_payment_method(forma_pagamento_nome)
+
+        transactions_data = []
+        totals_by_category: Dict[str, float] = {}
+        for item in itens:
+            category = ctx.find_category(item.categoria_nome)
+            transactions_data.append(TransactionCreate(
+                title=item.descricao,
+                amount=abs(item.valor),
+                transaction_type=transaction_type,
+                transaction_date=parsed_date,
+                category_id=category.id if category else None,
+                payment_method_id=payment_method.id if payment_method else None,
+                wallet_id=ctx.wallet.id if ctx.wallet else None,
+                is_recurring=False,
+                is_confirmed=True
+            ))
+            category_name = category.name if category else "Sem categoria"
+            totals_by_category[category_name] = totals_by_category.get(category_name, 0.0) + abs(item.valor)
+
+        ids = transaction_service.create_many(ctx.db, user, transactions_data)
 
-        # Formatar resposta baseada no template do N8n
         emoji = "🟢" if transaction_type == "income" else "🔴"
-        tipo_texto = "RECEITA" if transaction_type == "income" else "DESPESA"
-        valor_formatado = f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        data_formatada = parsed_date.strftime("%d/%m/%Y")
+        tipo_texto = "RECEITAS INSERIDAS" if transaction_type == "income" else "DESPESAS INSERIDAS"
+        total = sum(totals_by_category.values())
+        total_formatado = f"R$ {total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-        categoria_texto = db.query(Category).filter(Category.id == category_id).first().name if category_id else "Sem categoria"
-        pagamento_texto = db.query(PaymentMethod).filter(PaymentMethod.id == payment_method_id).first().name if payment_method_id else "Não especificado"
+        result = f"""{emoji} **{len(ids)} {tipo_texto} COM SUCESSO**
 
-        return f"""{emoji} **{tipo_texto} INSERIDA COM SUCESSO**
+💰 Total: {total_formatado}
+🗓 {parsed_date.strftime("%d/%m/%Y")}
+📍 Forma de pagamento: {payment_method.name if payment_method else "Não especificado"}
+"""
+        for category_name, valor in sorted(totals_by_category.items(), key=lambda x: x[1], reverse=True):
+            valor_formatado = f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+            result += f"📊 {category_name}: {valor_formatado}\n"
 
-*{descricao}*
-💰 {valor_formatado}
-🗓 {data_formatada}
-📊 {categoria_texto}
-📍 Forma de pagamento: {pagamento_texto}
-🔍 Código: {transaction.id}"""
+        result += f"🔍 Códigos: {', '.join(str(i) for i in ids)}"
+        return result
 
     except Exception as e:
-        logger.error(f"Erro ao inserir transação: {e}")
-        return f"Erro ao inserir transação: {str(e)}"
+        ctx.db.rollback()
+        logger.error(f"Erro ao inserir transações em lote: {e}")
+        return f"Erro ao inserir transações em lote: {str(e)}"
 
 
 @tool
-def transacoes_recentes(user_id: int, db: Session, limite: int = 5) -> str:
+def transacoes_recentes(ctx: Annotated[ToolContext, InjectedToolArg], limite: int = 5) -> str:
     """
     Busca as transações mais recentes do usuário.
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
         limite: Número máximo de transações (padrão 5)
 
     Returns:
         String formatada com lista de transações recentes
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = ctx.user
         if not user:
             return "Erro: Usuário não encontrado."
 
-        transactions = transaction_service.get_recent(db, user, limit=limite)
+        transactions = transaction_service.get_recent(ctx.db, user, limit=limite)
 
         if not transactions:
             return "Você ainda não tem transações registradas."
@@ -219,8 +304,7 @@ def transacoes_recentes(user_id: int, db: Session, limite: int = 5) -> str:
             valor_formatado = f"R$ {t.amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
             data_formatada = t.transaction_date.strftime("%d/%m/%Y")
 
-            categoria = db.query(Category).filter(Category.id == t.category_id).first() if t.category_id else None
-            categoria_nome = categoria.name if categoria else "Sem categoria"
+            categoria_nome = ctx.category_name(t.category_id)
 
             result += f"""{emoji} *{t.title}*
 Valor: {valor_formatado} ({tipo})
@@ -238,19 +322,18 @@ ID: {t.id}
 
 
 @tool
-def resumo_mes_atual(user_id: int, db: Session) -> str:
+def resumo_mes_atual(ctx: Annotated[ToolContext, InjectedToolArg]) -> str:
     """
     Retorna resumo financeiro do mês atual (receitas, despesas, saldo).
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
 
     Returns:
         String formatada com resumo do mês
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = ctx.user
         if not user:
             return "Erro: Usuário não encontrado."
 
@@ -264,7 +347,7 @@ def resumo_mes_atual(user_id: int, db: Session) -> str:
             end_date = date(today.year, today.month + 1, 1) - timedelta(days=1)
 
         # Buscar resumo
-        summary = transaction_service.get_summary(db, user, start_date, end_date)
+        summary = transaction_service.get_summary(ctx.db, user, start_date, end_date)
 
         receitas_formatado = f"R$ {summary['total_income']:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
         despesas_formatado = f"R$ {summary['total_expense']:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -288,21 +371,18 @@ def resumo_mes_atual(user_id: int, db: Session) -> str:
 
 
 @tool
-def consulta_forma_pagamento(user_id: int, db: Session) -> str:
+def consulta_forma_pagamento(ctx: Annotated[ToolContext, InjectedToolArg]) -> str:
     """
     Lista todos os métodos de pagamento disponíveis.
 
     Args:
-        user_id: ID do usuário
-        db: Sessão do banco de dados
+        ctx: Contexto do turno (injetado, não visível ao LLM)
 
     Returns:
         String formatada com lista de métodos
     """
     try:
-        payment_methods = db.query(PaymentMethod).filter(
-            PaymentMethod.is_active == True
-        ).all()
+        payment_methods = ctx.payment_methods
 
         if not payment_methods:
             return "Nenhum método de pagamento encontrado."
@@ -319,21 +399,140 @@ def consulta_forma_pagamento(user_id: int, db: Session) -> str:
         return "Erro ao buscar métodos de pagamento."
 
 
+@tool
+async def envia_grafico(
+    ctx: Annotated[ToolContext, InjectedToolArg],
+    tipo: str = "pizza",
+    data: Optional[str] = None
+) -> str:
+    """
+    Envia um gráfico em imagem para o usuário pelo WhatsApp.
+
+    Args:
+        ctx: Contexto do turno (injetado, não visível ao LLM)
+        tipo: "pizza" (despesas do mês por categoria) ou "barras" (receitas x despesas dos últimos 7 dias)
+        data: Data de referência (YYYY-MM-DD ou DD/MM/YYYY). Se não informada, usa hoje
+
+    Returns:
+        Confirmação do envio
+    """
+    try:
+        user = ctx.user
+        if not user:
+            return "Erro: Usuário não encontrado."
+
+        chart = {"pizza": "pizza", "barras": "bar", "bar": "bar"}.get(tipo.lower().strip())
+        if not chart:
+            return "Tipo de gráfico inválido. Use 'pizza' ou 'barras'."
+
+        target_date = None
+        if data:
+            try:
+                if "/" in data:
+                    target_date = datetime.strptime(data, "%d/%m/%Y").date()
+                else:
+                    target_date = datetime.strptime(data, "%Y-%m-%d").date()
+            except ValueError:
+                return "Data inválida. Use o formato DD/MM/YYYY ou YYYY-MM-DD."
+
+        await chart_renderer.send_chart(ctx.db, user, chart, target_date)
+
+        return "📊 Gráfico enviado."
+
+    except Exception as e:
+        logger.error(f"Erro ao enviar gráfico: {e}")
+        return "Erro ao gerar ou enviar o gráfico."
+
+
+# Categorias enviadas ao LLM na comparação (as de maior variação)
+COMPARISON_MAX_CATEGORIES = 8
+
+
+@tool
+def compara_periodos(
+    ctx: Annotated[ToolContext, InjectedToolArg],
+    agrupamento: str = "mes",
+    quantidade: int = 2,
+    tipo: str = "despesa"
+) -> str:
+    """
+    Compara gastos (ou receitas) por categoria entre os últimos períodos.
+    Use para perguntas como "gastei mais esse mês que no passado?".
+
+    Args:
+        ctx: Contexto do turno (injetado, não visível ao LLM)
+        agrupamento: "semana", "mes" ou "ano"
+        quantidade: Quantidade de períodos, incluindo o atual (2 a 12)
+        tipo: "despesa" ou "receita"
+
+    Returns:
+        JSON compacto: totais por período (do mais antigo ao atual), variação
+        do último período em valor e % e as categorias com maior variação
+    """
+    try:
+        user = ctx.user
+        if not user:
+            return "Erro: Usuário não encontrado."
+
+        bucket = {"semana": "week", "mes": "month", "mês": "month", "ano": "year"}.get(agrupamento.lower().strip())
+        if not bucket:
+            return "Agrupamento inválido. Use 'semana', 'mes' ou 'ano'."
+
+        transaction_type = "income" if tipo.lower().startswith("receita") else "expense"
+        today = date.today()
+
+        periods = consecutive_periods(today, bucket, max(2, min(quantidade, 12)))
+        comparison = transaction_service.compare_periods(ctx.db, user, periods, transaction_type)
+
+        categories = sorted(
+            comparison["categories"],
+            key=lambda c: abs(c["deltas"][-1] or 0),
+            reverse=True
+        )[:COMPARISON_MAX_CATEGORIES]
+
+        latest = comparison["periods"][-1]
+        return json.dumps({
+            "tipo": "receita" if transaction_type == "income" else "despesa",
+            "hoje": today.isoformat(),
+            "periodo_atual_parcial": latest["end"] > today,
+            "periodos": [
+                {"de": p["start"].isoformat(), "ate": p["end"].isoformat(), "total": round(p["total"], 2)}
+                for p in comparison["periods"]
+            ],
+            "variacao": latest["delta"],
+            "variacao_pct": latest["change"],
+            "categorias": [
+                {
+                    "nome": c["name"],
+                    "totais": [round(t, 2) for t in c["totals"]],
+                    "variacao": c["deltas"][-1],
+                    "variacao_pct": c["changes"][-1]
+                }
+                for c in categories
+            ]
+        }, ensure_ascii=False, separators=(",", ":"))
+
+    except Exception as e:
+        logger.error(f"Erro ao comparar períodos: {e}")
+        return "Erro ao comparar períodos."
+
+
 # Exportar lista de tools para o LangGraph Agent
-def get_all_tools(user_id: int, db: Session) -> List:
+def get_all_tools() -> List:
     """
-    Retorna lista de todas as tools disponíveis com contexto do usuário.
+    Retorna lista de todas as tools disponíveis.
 
-    IMPORTANTE: No LangGraph, precisamos usar ferramentas sem estado.
-    Vamos criar wrappers que injetam user_id e db automaticamente.
+    As tools não guardam estado: recebem um ToolContext (InjectedToolArg)
+    preenchido pelo ToolRuntime a cada turno do agente.
     """
-    # TODO: Implementar wrappers que injetam user_id e db
-    # Por enquanto, retornamos a lista básica
     return [
         lista_todas_categorias,
         busca_informacoes_carteira_atual,
         insere_transacao,
+        insere_transacoes_em_lote,
         transacoes_recentes,
         resumo_mes_atual,
-        consulta_forma_pagamento
+        consulta_forma_pagamento,
+        envia_grafico,
+        compara_periodos
     ]
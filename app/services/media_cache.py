@@ -0,0 +1,233 @@
+"""
+Cache das análises de mídia (transcrições do Whisper e extrações do Gemini)
+endereçado pelo conteúdo: fileSha256 da mídia + versão do prompt/modelo.
+
+Duas camadas:
+1. LRU em memória (sem acesso ao banco)
+2. Tabela media_analyses com expiração (TTL), compartilhada entre processos
+
+A mesma mídia encaminhada de novo (boleto, comprovante, encaminhamentos em
+grupo) não é baixada nem analisada outra vez. Mudar o prompt ou o modelo
+muda a versão e invalida as entradas antigas.
+
+Métricas: media_cache.hits (media_cache.memory_hits + media_cache.db_hits),
+media_cache.misses e o gauge media_cache.hit_rate.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.database import SessionLocal
+from app.models import MediaAnalysis
+from app.schemas.webhook import WhatsAppMediaInfo
+
+
+def prompt_version(*parts: str) -> str:
+    """
+    Versão curta do prompt e do modelo usados na análise
+    """
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:12]
+
+
+class MediaAnalysisCache:
+    """
+    Resultados de análise de mídia por hash do conteúdo
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or settings.MEDIA_CACHE_LRU_SIZE
+        self._entries: "OrderedDict[str, Tuple[str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def key(kind: str, message_data: Dict[str, Any], *version_parts: str) -> Optional[str]:
+        """
+        Chave do cache para a mídia da mensagem
+
+        Args:
+            kind: audio, image ou document (campo <kind>Message do webhook)
+            message_data: Dados da mensagem do webhook
+            version_parts: Modelo e prompt usados na análise
+
+        Returns:
+            Chave, ou None se o webhook não trouxe o fileSha256
+        """
+        media = message_data.get(f"{kind}Message") or {}
+        sha256 = WhatsAppMediaInfo.model_validate(media).fileSha256 or message_data.get("fileSha256")
+        if not sha256:
+            return None
+        return f"{kind}:{prompt_version(*version_parts)}:{sha256}"
+
+    def _remember(self, key: str, result: str, expires_at: datetime):
+        with self._lock:
+            self._entries[key] = (result, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _count(self, counter: Optional[str]):
+        if counter:
+            metrics.increment("media_cache.hits")
+            metrics.increment(counter)
+        else:
+            metrics.increment("media_cache.misses")
+        metrics.set_gauge("media_cache.hit_rate", round(metrics.ratio("media_cache.hits", "media_cache.misses"), 4))
+
+    @staticmethod
+    def _load(key: str, now: datetime) -> Optional[Tuple[str, datetime]]:
+        """
+        Resultado e expiração guardados no banco (executado em thread)
+        """
+        db = SessionLocal()
+        try:
+            record = db.query(MediaAnalysis).filter(
+                MediaAnalysis.cache_key == key,
+                MediaAnalysis.expires_at > now
+            ).first()
+        except Exception as e:
+            logger.error(f"❌ Erro ao consultar cache de mídia: {e}")
+            return None
+        finally:
+            db.close()
+
+        if record is None:
+            return None
+
+        expires_at = record.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return record.result, expires_at
+
+    @staticmethod
+    def _store(key: str, result: str, expires_at: datetime):
+        """
+        Grava o resultado no banco (executado em thread; falhas não propagam)
+        """
+        db = SessionLocal()
+        try:
+            record = db.query(MediaAnalysis).filter(MediaAnalysis.cache_key == key).first()
+            if record is None:
+                db.add(MediaAnalysis(
+                    cache_key=key,
+                    kind=key.split(":", 1)[0],
+                    result=result,
+                    expires_at=expires_at
+                ))
+            else:
+                # Registro expirado ainda não removido pela limpeza
+                record.result = result
+                record.expires_at = expires_at
+            db.commit()
+        except IntegrityError:
+            # Outro worker guardou a mesma mídia ao mesmo tempo
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Erro ao guardar análise de mídia no cache: {e}")
+        finally:
+            db.close()
+
+    async def get(self, key: Optional[str]) -> Optional[str]:
+        """
+        Resultado guardado para a chave (memória, depois banco) ou None
+        """
+        if key is None:
+            return None
+
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+
+        if entry is not None:
+            self._count("media_cache.memory_hits")
+            return entry[0]
+
+        # Consulta síncrona do SQLAlchemy fora do event loop
+        stored = await asyncio.to_thread(self._load, key, now)
+        if stored is None:
+            self._count(None)
+            return None
+
+        result, expires_at = stored
+        self._remember(key, result, expires_at)
+        self._count("media_cache.db_hits")
+        return result
+
+    async def put(self, key: Optional[str], result: str):
+        """
+        Guarda o resultado nas duas camadas (falhas no banco não propagam)
+        """
+        if key is None or not result:
+            return
+
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.MEDIA_CACHE_TTL_DAYS)
+        self._remember(key, result, expires_at)
+        await asyncio.to_thread(self._store, key, result, expires_at)
+
+    def clear_memory(self):
+        """
+        Esvazia apenas o LRU em memória
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def sweep_expired(db: Session) -> int:
+        """
+        Remove registros expirados (TTL)
+        """
+        result = db.execute(
+            delete(MediaAnalysis).where(
+                MediaAnalysis.expires_at < datetime.now(timezone.utc)
+            )
+        )
+        db.commit()
+        return result.rowcount or 0
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.MEDIA_CACHE_SWEEP_INTERVAL_SECONDS)
+            db = SessionLocal()
+            try:
+                removed = await asyncio.to_thread(self.sweep_expired, db)
+                if removed:
+                    logger.info(f"🧹 {removed} análise(s) de mídia expiradas removidas do cache")
+            except Exception as e:
+                logger.error(f"❌ Erro na limpeza do cache de mídia: {e}")
+            finally:
+                db.close()
+
+    def start(self):
+        """
+        Inicia a limpeza periódica (startup da aplicação)
+        """
+        self._sweeper = asyncio.create_task(self._sweep_loop(), name="media-cache-sweeper")
+
+    async def stop(self):
+        """
+        Encerra a limpeza periódica (shutdown da aplicação)
+        """
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+
+# Instância global
+media_analysis_cache = MediaAnalysisCache()
@@ -1,14 +1,58 @@
 """
 Processadores de mensagens do WhatsApp
 Baseado no fluxo N8n: [FLUXO PRINCIPAL] - Message routing logic
+
+Áudios, imagens e documentos são baixados em streaming para um arquivo
+temporário (uazapi_client.download_media_file) e entregues como arquivo ao
+Whisper e ao Gemini, sem cópias em base64 na memória.
+
+O resultado da análise fica no cache por fileSha256 (media_analysis_cache):
+a mesma mídia reencaminhada não é baixada nem analisada de novo.
 """
-import base64
 from typing import Dict, Any, Optional
 from loguru import logger
 
-from app.integrations.uazapi import uazapi_client
+from app.core.config import settings
+from app.integrations.uazapi import uazapi_client, MediaTooLargeError
 from app.integrations.openai_client import openai_client
 from app.integrations.gemini_client import gemini_client
+from app.services.media_cache import media_analysis_cache
+
+TRANSCRIPTION_LANGUAGE = "pt"
+
+# Prompt customizado para extrair itens e preços de imagens
+IMAGE_ANALYSIS_PROMPT = """Descreva todos os itens presentes nessa imagem que tenham um preço associado.
+Para cada item identificado, formate a saída da seguinte maneira:
+
+Comprei [nome do item] por [valor do item].
+
+Regras importantes:
+1. Use APENAS números para os valores (sem símbolos de moeda)
+2. Coloque cada item em uma nova linha
+3. Se não houver itens com preço, responda: "Não encontrei itens com preço nesta imagem"
+4. Seja preciso com os valores encontrados
+5. Se for uma nota fiscal ou cupom, extraia TODOS os itens listados"""
+
+# Prompt para extrair informações financeiras de documentos
+DOCUMENT_ANALYSIS_PROMPT = """Analise este documento e extraia todas as informações financeiras relevantes.
+Identifique:
+1. Descrição de produtos/serviços
+2. Valores
+3. Datas (se disponíveis)
+4. Categorias (se identificável: alimentação, saúde, etc)
+
+Formate como:
+Comprei [item] por [valor] em [data se disponível].
+
+Se for uma fatura ou boleto, extraia:
+- Valor total
+- Data de vencimento
+- Descrição do serviço/produto"""
+
+
+def _too_large_message(kind: str) -> str:
+    limit_mb = settings.MEDIA_MAX_BYTES // (1024 * 1024)
+    return f"Esse {kind} é muito grande para eu analisar (limite de {limit_mb} MB). Pode enviar um arquivo menor ou descrever as informações?"
 
 
 class MessageProcessor:
@@ -55,9 +99,10 @@ class MessageProcessor:
         Processa mensagem de áudio (AudioMessage)
 
         Fluxo:
-        1. Baixar áudio via Uazapi (base64)
-        2. Transcrever com OpenAI Whisper
-        3. Retornar transcrição
+        1. Consultar o cache pelo fileSha256 do áudio
+        2. Baixar áudio via Uazapi (streaming para arquivo temporário)
+        3. Transcrever com OpenAI Whisper
+        4. Guardar e retornar transcrição
 
         Args:
             message_data: Dados da mensagem do webhook
@@ -69,39 +114,47 @@ class MessageProcessor:
         try:
             logger.info(f"🎤 Processando mensagem de áudio: {message_id}")
 
-            # 1. Baixar áudio via Uazapi
-            media_data = await uazapi_client.download_media(
-                message_id=message_id,
-                return_base64=True
-            )
-
-            audio_base64 = media_data.get("base64Data")
-            mimetype = media_data.get("mimetype", "audio/mpeg")
-
-            if not audio_base64:
-                logger.error("❌ Áudio não retornou base64")
-                return "Não consegui processar o áudio. Tente enviar novamente."
-
-            # 2. Transcrever com OpenAI Whisper
-            # Determinar extensão baseada no mimetype
-            extension_map = {
-                "audio/mpeg": "mp3",
-                "audio/ogg": "ogg",
-                "audio/wav": "wav",
-                "audio/mp4": "m4a"
-            }
-            extension = extension_map.get(mimetype, "mp3")
-            filename = f"audio.{extension}"
-
-            transcription = await openai_client.transcribe_audio(
-                audio_base64=audio_base64,
-                filename=filename,
-                language="pt"
+            # 1. Mesmo áudio já transcrito (encaminhamentos)
+            cache_key = media_analysis_cache.key(
+                "audio", message_data, openai_client.transcription_model, TRANSCRIPTION_LANGUAGE
             )
+            cached = await media_analysis_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"♻️ Transcrição reaproveitada do cache: {message_id}")
+                return cached
+
+            # 2. Baixar áudio via Uazapi
+            with await uazapi_client.download_media_file(message_id) as media:
+                if not media.size:
+                    logger.error("❌ Áudio veio vazio")
+                    return "Não consegui processar o áudio. Tente enviar novamente."
+
+                # 3. Transcrever com OpenAI Whisper
+                # Determinar extensão baseada no mimetype
+                extension_map = {
+                    "audio/mpeg": "mp3",
+                    "audio/ogg": "ogg",
+                    "audio/wav": "wav",
+                    "audio/mp4": "m4a"
+                }
+                extension = extension_map.get(media.mimetype.split(";")[0], "mp3")
+                filename = f"audio.{extension}"
+
+                transcription = await openai_client.transcribe_audio(
+                    audio_file=media.file,
+                    filename=filename,
+                    language=TRANSCRIPTION_LANGUAGE
+                )
+
+            # 4. Guardar no cache
+            await media_analysis_cache.put(cache_key, transcription)
 
             logger.info(f"✅ Áudio transcrito com sucesso: {transcription[:100]}...")
             return transcription
 
+        except MediaTooLargeError as e:
+            logger.warning(f"⚠️ Áudio recusado: {e}")
+            return _too_large_message("áudio")
         except Exception as e:
             logger.error(f"❌ Erro ao processar áudio: {e}")
             return "Desculpe, tive um problema ao processar seu áudio. Pode tentar enviar novamente ou escrever a mensagem?"
@@ -112,9 +165,10 @@ class MessageProcessor:
         Processa mensagem de imagem (ImageMessage)
 
         Fluxo:
-        1. Baixar imagem via Uazapi (base64)
-        2. Analisar com Google Gemini Vision
-        3. Retornar itens e preços extraídos
+        1. Consultar o cache pelo fileSha256 da imagem
+        2. Baixar imagem via Uazapi (streaming para arquivo temporário)
+        3. Analisar com Google Gemini Vision
+        4. Guardar e retornar itens e preços extraídos
 
         Args:
             message_data: Dados da mensagem do webhook
@@ -126,42 +180,35 @@ class MessageProcessor:
         try:
             logger.info(f"🖼️ Processando mensagem de imagem: {message_id}")
 
-            # 1. Baixar imagem via Uazapi
-            media_data = await uazapi_client.download_media(
-                message_id=message_id,
-                return_base64=True
-            )
-
-            image_base64 = media_data.get("base64Data")
-            mimetype = media_data.get("mimetype", "image/jpeg")
-
-            if not image_base64:
-                logger.error("❌ Imagem não retornou base64")
-                return "Não consegui processar a imagem. Tente enviar novamente."
-
-            # 2. Analisar com Gemini Vision
-            # Prompt customizado para extrair itens e preços
-            prompt = """Descreva todos os itens presentes nessa imagem que tenham um preço associado.
-Para cada item identificado, formate a saída da seguinte maneira:
-
-Comprei [nome do item] por [valor do item].
-
-Regras importantes:
-1. Use APENAS números para os valores (sem símbolos de moeda)
-2. Coloque cada item em uma nova linha
-3. Se não houver itens com preço, responda: "Não encontrei itens com preço nesta imagem"
-4. Seja preciso com os valores encontrados
-5. Se for uma nota fiscal ou cupom, extraia TODOS os itens listados"""
-
-            analysis = await gemini_client.analyze_image(
-                image_base64=image_base64,
-                mime_type=mimetype,
-                prompt=prompt
-            )
+            # 1. Mesma imagem já analisada (encaminhamentos)
+            cache_key = media_analysis_cache.key("image", message_data, gemini_client.model, IMAGE_ANALYSIS_PROMPT)
+            cached = await media_analysis_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"♻️ Análise da imagem reaproveitada do cache: {message_id}")
+                return cached
+
+            # 2. Baixar imagem via Uazapi
+            with await uazapi_client.download_media_file(message_id) as media:
+                if not media.size:
+                    logger.error("❌ Imagem veio vazia")
+                    return "Não consegui processar a imagem. Tente enviar novamente."
+
+                # 3. Analisar com Gemini Vision
+                analysis = await gemini_client.analyze_image(
+                    mime_type=media.mimetype or "image/jpeg",
+                    prompt=IMAGE_ANALYSIS_PROMPT,
+                    image_file=media.file
+                )
+
+            # 4. Guardar no cache
+            await media_analysis_cache.put(cache_key, analysis)
 
             logger.info(f"✅ Imagem analisada com sucesso: {analysis[:100]}...")
             return analysis
 
+        except MediaTooLargeError as e:
+            logger.warning(f"⚠️ Imagem recusada: {e}")
+            return _too_large_message("arquivo")
         except Exception as e:
             logger.error(f"❌ Erro ao processar imagem: {e}")
             return "Desculpe, tive um problema ao analisar sua imagem. Pode tentar enviar novamente ou descrever os itens?"
@@ -172,9 +219,10 @@ Regras importantes:
         Processa mensagem de documento/PDF (DocumentMessage)
 
         Fluxo:
-        1. Baixar documento via Uazapi (base64)
-        2. Analisar com Google Gemini (suporta PDF)
-        3. Retornar informações extraídas
+        1. Consultar o cache pelo fileSha256 do documento
+        2. Baixar documento via Uazapi (streaming para arquivo temporário)
+        3. Analisar com Google Gemini (suporta PDF)
+        4. Guardar e retornar informações extraídas
 
         Args:
             message_data: Dados da mensagem do webhook
@@ -186,44 +234,35 @@ Regras importantes:
         try:
             logger.info(f"📄 Processando documento: {message_id}")
 
-            # 1. Baixar documento via Uazapi
-            media_data = await uazapi_client.download_media(
-                message_id=message_id,
-                return_base64=True
-            )
-
-            document_base64 = media_data.get("base64Data")
-            mimetype = media_data.get("mimetype", "application/pdf")
-
-            if not document_base64:
-                logger.error("❌ Documento não retornou base64")
-                return "Não consegui processar o documento. Tente enviar novamente."
-
-            # 2. Analisar com Gemini (suporta PDF)
-            prompt = """Analise este documento e extraia todas as informações financeiras relevantes.
-Identifique:
-1. Descrição de produtos/serviços
-2. Valores
-3. Datas (se disponíveis)
-4. Categorias (se identificável: alimentação, saúde, etc)
-
-Formate como:
-Comprei [item] por [valor] em [data se disponível].
-
-Se for uma fatura ou boleto, extraia:
-- Valor total
-- Data de vencimento
-- Descrição do serviço/produto"""
-
-            analysis = await gemini_client.analyze_document(
-                document_base64=document_base64,
-                mime_type=mimetype,
-                prompt=prompt
-            )
+            # 1. Mesmo documento já analisado (boletos e comprovantes reenviados)
+            cache_key = media_analysis_cache.key("document", message_data, gemini_client.model, DOCUMENT_ANALYSIS_PROMPT)
+            cached = await media_analysis_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"♻️ Análise do documento reaproveitada do cache: {message_id}")
+                return cached
+
+            # 2. Baixar documento via Uazapi
+            with await uazapi_client.download_media_file(message_id) as media:
+                if not media.size:
+                    logger.error("❌ Documento veio vazio")
+                    return "Não consegui processar o documento. Tente enviar novamente."
+
+                # 3. Analisar com Gemini (suporta PDF)
+                analysis = await gemini_client.analyze_document(
+                    mime_type=media.mimetype or "application/pdf",
+                    prompt=DOCUMENT_ANALYSIS_PROMPT,
+                    document_file=media.file
+                )
+
+            # 4. Guardar no cache
+            await media_analysis_cache.put(cache_key, analysis)
 
             logger.info(f"✅ Documento analisado com sucesso: {analysis[:100]}...")
             return analysis
 
+        except MediaTooLargeError as e:
+            logger.warning(f"⚠️ Documento recusado: {e}")
+            return _too_large_message("documento")
         except Exception as e:
             logger.error(f"❌ Erro ao processar documento: {e}")
             return "Desculpe, tive um problema ao analisar seu documento. Pode tentar enviar novamente ou descrever as informações?"
@@ -0,0 +1,336 @@
+"""
+Rollup mensal de transações (tabela monthly_aggregates)
+Chave: (usuário, mês, categoria, tipo) -> soma e quantidade
+
+Mantido incrementalmente pelo TransactionService na mesma transação do
+banco que altera as transações. Resumos e gráficos de meses inteiros leem
+daqui em tempo constante por mês, independente do histórico do usuário.
+
+Uso manual:
+    python -m app.services.monthly_aggregates rebuild [user_id]   # backfill
+    python -m app.services.monthly_aggregates check [user_id]     # consistência
+"""
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy import select, insert, update, delete, func, cast, Date
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.db.database import SessionLocal
+from app.models import MonthlyAggregate, Transaction
+
+# Tolerância para erros de arredondamento de ponto flutuante
+AMOUNT_TOLERANCE = 0.005
+
+_KEY_COLUMNS = ["user_id", "month", "category_id", "transaction_type"]
+
+
+def month_start(value: date) -> date:
+    """
+    Primeiro dia do mês da data
+    """
+    return value.replace(day=1)
+
+
+def is_whole_months(start_date: Optional[date], end_date: Optional[date]) -> bool:
+    """
+    True se o período começa no dia 1 e termina no último dia de um mês
+    (pode ser respondido inteiramente pelo rollup)
+    """
+    return (
+        start_date is not None
+        and end_date is not None
+        and start_date.day == 1
+        and (end_date + timedelta(days=1)).day == 1
+        and start_date <= end_date
+    )
+
+
+class AggregateDeltas:
+    """
+    Variações acumuladas do rollup, aplicadas em um único upsert
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[int, date, int, str], List] = defaultdict(lambda: [0.0, 0])
+
+    def add(
+        self,
+        user_id: int,
+        transaction_date: date,
+        category_id: Optional[int],
+        transaction_type: str,
+        amount: float,
+        count: int = 1
+    ):
+        delta = self._deltas[(user_id, month_start(transaction_date), category_id or 0, transaction_type)]
+        delta[0] += amount
+        delta[1] += count
+
+    def rows(self) -> List[dict]:
+        """
+        Linhas do upsert (variações nulas são descartadas)
+        """
+        return [
+            {
+                "user_id": user_id,
+                "month": month,
+                "category_id": category_id,
+                "transaction_type": transaction_type,
+                "total_amount": amount,
+                "transaction_count": count
+            }
+            for (user_id, month, category_id, transaction_type), (amount, count) in self._deltas.items()
+            if count or abs(amount) > AMOUNT_TOLERANCE
+        ]
+
+
+class MonthlyAggregateService:
+    """
+    Manutenção e leitura do rollup mensal
+    """
+
+    @staticmethod
+    def _month_expression(db: Session):
+        """
+        Expressão SQL do primeiro dia do mês de transaction_date
+        """
+        if db.get_bind().dialect.name == "sqlite":
+            return func.date(Transaction.transaction_date, "start of month")
+        return cast(func.date_trunc("month", Transaction.transaction_date), Date)
+
+    @staticmethod
+    def apply(db: Session, deltas: AggregateDeltas):
+        """
+        Soma as variações no rollup (upsert atômico, sem commit)
+        INSERT ... ON CONFLICT DO UPDATE SET total_amount = total_amount + excluded.total_amount
+        """
+        rows = deltas.rows()
+        if not rows:
+            return
+
+        dialect = db.get_bind().dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            insert_fn = postgresql_insert if dialect == "postgresql" else sqlite_insert
+            stmt = insert_fn(MonthlyAggregate).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=_KEY_COLUMNS,
+                set_={
+                    "total_amount": MonthlyAggregate.total_amount + stmt.excluded.total_amount,
+                    "transaction_count": MonthlyAggregate.transaction_count + stmt.excluded.transaction_count
+                }
+            )
+            db.execute(stmt)
+            return
+
+        # Outros bancos: UPDATE e, se não existir, INSERT
+        for row in rows:
+            result = db.execute(
+                update(MonthlyAggregate)
+                .where(*(getattr(MonthlyAggregate, column) == row[column] for column in _KEY_COLUMNS))
+                .values(
+                    total_amount=MonthlyAggregate.total_amount + row["total_amount"],
+                    transaction_count=MonthlyAggregate.transaction_count + row["transaction_count"]
+                )
+            )
+            if not result.rowcount:
+                db.execute(insert(MonthlyAggregate).values(**row))
+
+    @staticmethod
+    def get_totals(
+        db: Session,
+        user_id: int,
+        start_month: date,
+        end_month: date
+    ) -> dict:
+        """
+        Totais por tipo dos meses entre start_month e end_month (inclusive)
+        """
+        rows = db.execute(
+            select(
+                MonthlyAggregate.transaction_type,
+                func.sum(MonthlyAggregate.total_amount),
+                func.sum(MonthlyAggregate.transaction_count)
+            )
+            .where(
+                MonthlyAggregate.user_id == user_id,
+                MonthlyAggregate.month >= month_start(start_month),
+                MonthlyAggregate.month <= month_start(end_month)
+            )
+            .group_by(MonthlyAggregate.transaction_type)
+        ).all()
+
+        totals = {"income": 0.0, "expense": 0.0}
+        count = 0
+        for transaction_type, total, row_count in rows:
+            if transaction_type in totals:
+                totals[transaction_type] = float(total or 0)
+            count += int(row_count or 0)
+
+        return {
+            "total_income": totals["income"],
+            "total_expense": totals["expense"],
+            "balance": totals["income"] - totals["expense"],
+            "transaction_count": count
+        }
+
+    @staticmethod
+    def get_by_category(
+        db: Session,
+        user_id: int,
+        month: date,
+        transaction_type: Optional[str] = None
+    ) -> List[Tuple[Optional[int], float]]:
+        """
+        Totais do mês por categoria, do maior para o menor
+
+        Returns:
+            [(category_id ou None, total)]
+        """
+        query = select(
+            MonthlyAggregate.category_id,
+            func.sum(MonthlyAggregate.total_amount).label("total")
+        ).where(
+            MonthlyAggregate.user_id == user_id,
+            MonthlyAggregate.month == month_start(month),
+            MonthlyAggregate.transaction_count > 0
+        )
+
+        if transaction_type:
+            query = query.where(MonthlyAggregate.transaction_type == transaction_type)
+
+        rows = db.execute(
+            query.group_by(MonthlyAggregate.category_id).order_by(func.sum(MonthlyAggregate.total_amount).desc())
+        ).all()
+
+        return [(category_id or None, float(total)) for category_id, total in rows]
+
+    @staticmethod
+    def _expected_query(db: Session, user_id: Optional[int] = None):
+        """
+        Agregação das transações no formato do rollup
+        """
+        month = MonthlyAggregateService._month_expression(db)
+        category_id = func.coalesce(Transaction.category_id, 0)
+
+        query = select(
+            Transaction.user_id,
+            month,
+            category_id,
+            Transaction.transaction_type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        )
+
+        if user_id:
+            query = query.where(Transaction.user_id == user_id)
+
+        return query.group_by(Transaction.user_id, month, category_id, Transaction.transaction_type)
+
+    @staticmethod
+    def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+        """
+        Recria o rollup a partir das transações (backfill)
+
+        Returns:
+            Quantidade de linhas do rollup geradas
+        """
+        cleanup = delete(MonthlyAggregate)
+        if user_id:
+            cleanup = cleanup.where(MonthlyAggregate.user_id == user_id)
+        db.execute(cleanup)
+
+        db.execute(
+            insert(MonthlyAggregate).from_select(
+                _KEY_COLUMNS + ["total_amount", "transaction_count"],
+                MonthlyAggregateService._expected_query(db, user_id)
+            )
+        )
+        db.commit()
+
+        count_query = select(func.count()).select_from(MonthlyAggregate)
+        if user_id:
+            count_query = count_query.where(MonthlyAggregate.user_id == user_id)
+        rows = db.scalar(count_query)
+
+        logger.info(f"📦 Rollup mensal reconstruído: {rows} linha(s)")
+        return rows
+
+    @staticmethod
+    def check_consistency(db: Session, user_id: Optional[int] = None) -> List[dict]:
+        """
+        Compara o rollup com a agregação das transações
+
+        Returns:
+            Divergências encontradas (vazio se consistente)
+        """
+        def normalize(month):
+            return date.fromisoformat(month) if isinstance(month, str) else month
+
+        expected = {
+            (row[0], normalize(row[1]), row[2], row[3]): (float(row[4]), int(row[5]))
+            for row in db.execute(MonthlyAggregateService._expected_query(db, user_id)).all()
+        }
+
+        stored_query = select(
+            MonthlyAggregate.user_id,
+            MonthlyAggregate.month,
+            MonthlyAggregate.category_id,
+            MonthlyAggregate.transaction_type,
+            MonthlyAggregate.total_amount,
+            MonthlyAggregate.transaction_count
+        )
+        if user_id:
+            stored_query = stored_query.where(MonthlyAggregate.user_id == user_id)
+
+        stored = {
+            (row[0], normalize(row[1]), row[2], row[3]): (float(row[4]), int(row[5]))
+            for row in db.execute(stored_query).all()
+        }
+
+        drifts = []
+        for key in expected.keys() | stored.keys():
+            expected_amount, expected_count = expected.get(key, (0.0, 0))
+            stored_amount, stored_count = stored.get(key, (0.0, 0))
+
+            if stored_count != expected_count or abs(stored_amount - expected_amount) > AMOUNT_TOLERANCE:
+                drift = {
+                    "user_id": key[0],
+                    "month": key[1].isoformat(),
+                    "category_id": key[2] or None,
+                    "transaction_type": key[3],
+                    "stored": {"total": stored_amount, "count": stored_count},
+                    "expected": {"total": expected_amount, "count": expected_count}
+                }
+                drifts.append(drift)
+                logger.warning(f"⚠️ Rollup mensal divergente: {drift}")
+
+        if not drifts:
+            logger.info("✅ Rollup mensal consistente com as transações")
+
+        return drifts
+
+
+# Instância global
+monthly_aggregates = MonthlyAggregateService()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("rebuild", "check"):
+        print("Uso: python -m app.services.monthly_aggregates rebuild|check [user_id]")
+        sys.exit(2)
+
+    target_user = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    db = SessionLocal()
+    try:
+        if sys.argv[1] == "rebuild":
+            monthly_aggregates.rebuild(db, target_user)
+        else:
+            sys.exit(1 if monthly_aggregates.check_consistency(db, target_user) else 0)
+    finally:
+        db.close()
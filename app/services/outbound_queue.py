@@ -0,0 +1,381 @@
+"""
+Fila durável de mensagens enviadas ao WhatsApp + dispatcher
+As respostas são persistidas em outbound_messages (divididas no limite de
+tamanho do WhatsApp) e enviadas pelos workers do dispatcher:
+- ordem FIFO por remote_jid: só a mensagem mais antiga ainda não enviada de
+  cada destinatário pode ser reservada
+- token bucket por instância e por destinatário (limites da Uazapi)
+- novas tentativas com backoff exponencial e dead-letter após
+  OUTBOUND_MAX_ATTEMPTS; recusas definitivas (4xx) vão direto para dead-letter
+- entrega at-least-once: mensagens reservadas por um processo que morreu
+  voltam à fila ao expirar o visibility timeout
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict
+import httpx
+from sqlalchemy import select, exists
+from sqlalchemy.orm import Session, aliased
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.token_bucket import TokenBucket
+from app.db.database import SessionLocal
+from app.integrations.uazapi import uazapi_client
+from app.models import OutboundMessage, OutboundMessageStatus
+
+# Buckets de destinatários guardados antes de descartar os ociosos
+MAX_RECIPIENT_BUCKETS = 1000
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def split_message(text: str, limit: int) -> List[str]:
+    """
+    Divide o texto em partes de até `limit` caracteres, preferindo quebrar
+    entre parágrafos, depois entre linhas e por fim entre palavras
+    """
+    parts = []
+    text = text.strip()
+
+    while len(text) > limit:
+        window = text[:limit + 1]
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = window.rfind(separator)
+            # Evita partes muito curtas quando o separador está no começo
+            if cut > limit // 2:
+                break
+        if cut <= limit // 2:
+            cut = limit
+
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+
+    if text:
+        parts.append(text)
+    return parts
+
+
+def _is_permanent(error: Exception) -> bool:
+    """
+    Recusa da Uazapi que não muda com novas tentativas (ex.: número inválido)
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        code = error.response.status_code
+        return 400 <= code < 500 and code not in (408, 429)
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    try:
+        return float(error.response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class OutboundQueue:
+    """
+    Operações da fila de saída sobre a tabela outbound_messages
+    """
+
+    @staticmethod
+    def enqueue(db: Session, remote_jid: str, text: str) -> List[OutboundMessage]:
+        """
+        Persiste a resposta como mensagem(ns) pendente(s), dividida no limite
+        de tamanho do WhatsApp (as partes seguem a ordem dos ids)
+        """
+        parts = split_message(text, settings.OUTBOUND_MAX_MESSAGE_CHARS)
+        now = _utcnow()
+
+        messages = [
+            OutboundMessage(
+                remote_jid=remote_jid,
+                text=part,
+                status=OutboundMessageStatus.PENDING,
+                attempts=0,
+                available_at=now
+            )
+            for part in parts
+        ]
+        db.add_all(messages)
+        db.commit()
+
+        metrics.increment("outbound.enqueued", len(messages))
+        if len(messages) > 1:
+            metrics.increment("outbound.split")
+        return messages
+
+    @staticmethod
+    def claim(db: Session, visibility_timeout: int, limit: int = 1) -> List[OutboundMessage]:
+        """
+        Reserva até `limit` mensagens disponíveis por visibility_timeout segundos.
+        Só é elegível a mensagem sem nenhuma anterior pendente ou em envio para
+        o mesmo destinatário (FIFO por remote_jid), então o lote tem no máximo
+        uma mensagem por destinatário. No PostgreSQL usa FOR UPDATE SKIP LOCKED.
+        """
+        now = _utcnow()
+        earlier = aliased(OutboundMessage)
+
+        has_earlier = exists().where(
+            earlier.remote_jid == OutboundMessage.remote_jid,
+            earlier.id < OutboundMessage.id,
+            earlier.status.in_([OutboundMessageStatus.PENDING, OutboundMessageStatus.SENDING])
+        )
+
+        def next_messages(count: int, *conditions) -> List[OutboundMessage]:
+            # Uma consulta por status: percorre o índice (status, id) já em
+            # ordem e para ao completar o lote
+            query = select(OutboundMessage).where(
+                *conditions, ~has_earlier
+            ).order_by(OutboundMessage.id).limit(count).with_for_update(skip_locked=True)
+            return list(db.scalars(query))
+
+        # Reservas expiradas (worker morreu) primeiro, depois as pendentes
+        messages = next_messages(
+            limit,
+            OutboundMessage.status == OutboundMessageStatus.SENDING,
+            OutboundMessage.locked_until < now
+        )
+        if len(messages) < limit:
+            messages += next_messages(
+                limit - len(messages),
+                OutboundMessage.status == OutboundMessageStatus.PENDING,
+                OutboundMessage.available_at <= now
+            )
+        if not messages:
+            db.rollback()
+            return []
+
+        claimed = []
+        for message in messages:
+            # Reentregas que já esgotaram as tentativas vão para dead-letter
+            if message.attempts >= settings.OUTBOUND_MAX_ATTEMPTS:
+                message.status = OutboundMessageStatus.DEAD
+                message.last_error = message.last_error or "Visibility timeout esgotado"
+                metrics.increment("outbound.dead")
+                logger.error(f"💀 Mensagem de saída {message.id} movida para dead-letter")
+                continue
+
+            message.status = OutboundMessageStatus.SENDING
+            message.attempts += 1
+            message.locked_until = now + timedelta(seconds=visibility_timeout)
+            claimed.append(message)
+
+        db.commit()
+        return claimed
+
+    @staticmethod
+    def complete(db: Session, message: OutboundMessage):
+        """
+        Remove a mensagem enviada (a tabela guarda apenas o que não foi enviado).
+        O commit fica com quem chama (um por lote).
+        """
+        db.delete(message)
+        metrics.increment("outbound.sent")
+
+    @staticmethod
+    def fail(db: Session, message: OutboundMessage, error: Exception):
+        """
+        Registra falha: reagenda com backoff exponencial (com jitter) ou move
+        para dead-letter. As próximas mensagens do destinatário esperam.
+        O commit fica com quem chama (um por lote).
+        """
+        message.last_error = str(error)[:2000]
+        message.locked_until = None
+
+        if _is_permanent(error) or message.attempts >= settings.OUTBOUND_MAX_ATTEMPTS:
+            message.status = OutboundMessageStatus.DEAD
+            metrics.increment("outbound.dead")
+            logger.error(
+                f"💀 Mensagem de saída {message.id} para {message.remote_jid} movida para "
+                f"dead-letter após {message.attempts} tentativa(s): {error}"
+            )
+        else:
+            delay = min(
+                settings.OUTBOUND_RETRY_MAX_SECONDS,
+                settings.OUTBOUND_RETRY_BACKOFF_SECONDS * (2 ** (message.attempts - 1))
+            )
+            delay = random.uniform(delay / 2, delay)
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, settings.OUTBOUND_RETRY_MAX_SECONDS))
+
+            message.status = OutboundMessageStatus.PENDING
+            message.available_at = _utcnow() + timedelta(seconds=delay)
+            metrics.increment("outbound.retries")
+            logger.warning(
+                f"⚠️ Envio {message.id} falhou (tentativa {message.attempts}), "
+                f"nova tentativa em {delay:.1f}s: {error}"
+            )
+
+
+class OutboundDispatcher:
+    """
+    Pool de workers assíncronos que drenam a fila de saída respeitando os
+    limites de taxa da Uazapi
+    """
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._instance_bucket: Optional[TokenBucket] = None
+        self._recipient_buckets: Dict[str, TokenBucket] = {}
+
+    def send(self, db: Session, remote_jid: str, text: str) -> List[OutboundMessage]:
+        """
+        Enfileira uma resposta para o WhatsApp e acorda os workers
+        """
+        messages = OutboundQueue.enqueue(db, remote_jid, text)
+        self.notify()
+        return messages
+
+    def notify(self):
+        """
+        Acorda os workers ociosos (chamado após enfileirar)
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, workers: int = None):
+        """
+        Inicia os workers (startup da aplicação)
+        """
+        workers = workers or settings.OUTBOUND_WORKERS
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._instance_bucket = (
+            TokenBucket(settings.OUTBOUND_RATE_PER_SECOND, settings.OUTBOUND_BURST)
+            if settings.OUTBOUND_RATE_PER_SECOND > 0 else None
+        )
+        self._recipient_buckets = {}
+        self._tasks = [
+            asyncio.create_task(self._run(n), name=f"outbound-worker-{n}")
+            for n in range(workers)
+        ]
+        logger.info(
+            f"📤 Fila de saída iniciada com {workers} worker(s) "
+            f"({settings.OUTBOUND_RATE_PER_SECOND:g} msg/s por instância, "
+            f"{settings.OUTBOUND_RECIPIENT_RATE_PER_SECOND:g} msg/s por destinatário)"
+        )
+
+    async def stop(self):
+        """
+        Encerra os workers (shutdown da aplicação).
+        Mensagens não enviadas continuam na tabela e saem no próximo start.
+        """
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("📤 Fila de saída encerrada")
+
+    def _recipient_bucket(self, remote_jid: str) -> Optional[TokenBucket]:
+        if settings.OUTBOUND_RECIPIENT_RATE_PER_SECOND <= 0:
+            return None
+
+        bucket = self._recipient_buckets.get(remote_jid)
+        if bucket is None:
+            if len(self._recipient_buckets) >= MAX_RECIPIENT_BUCKETS:
+                # Buckets cheios equivalem a um novo: podem ser descartados
+                self._recipient_buckets = {
+                    jid: b for jid, b in self._recipient_buckets.items() if not b.full
+                }
+            bucket = TokenBucket(
+                settings.OUTBOUND_RECIPIENT_RATE_PER_SECOND,
+                settings.OUTBOUND_RECIPIENT_BURST
+            )
+            self._recipient_buckets[remote_jid] = bucket
+        return bucket
+
+    async def _throttle(self, remote_jid: str):
+        """
+        Espera a vez do envio: primeiro o limite do destinatário, depois o da instância
+        """
+        waited = 0.0
+        for bucket in (self._recipient_bucket(remote_jid), self._instance_bucket):
+            if bucket is not None:
+                waited += await bucket.acquire()
+
+        if waited > 0:
+            metrics.increment("outbound.throttled")
+            metrics.increment("outbound.throttled_seconds", waited)
+
+    async def _run(self, worker_id: int):
+        """
+        Loop do worker: reservar, aguardar limite de taxa, enviar, confirmar
+        """
+        while not self._stopping:
+            try:
+                processed = await self._process_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro no worker de saída {worker_id}: {e}", exc_info=True)
+                processed = False
+
+            if not processed:
+                # Fila vazia: aguardar nova mensagem ou o intervalo de polling
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        timeout=settings.OUTBOUND_POLL_INTERVAL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _deliver(self, message: OutboundMessage) -> Optional[Exception]:
+        """
+        Envia uma mensagem respeitando os limites de taxa; devolve o erro, se houver
+        """
+        await self._throttle(message.remote_jid)
+        try:
+            await uazapi_client.send_text(message.remote_jid, message.text)
+        except Exception as e:
+            return e
+        return None
+
+    async def _process_next(self) -> bool:
+        """
+        Envia um lote da fila (destinatários distintos, em paralelo) e registra
+        os resultados em um único commit. Retorna False se não havia mensagem disponível.
+        """
+        # Objetos seguem válidos após o commit da reserva (sem recarregar do banco)
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            messages = OutboundQueue.claim(
+                db,
+                settings.OUTBOUND_VISIBILITY_TIMEOUT_SECONDS,
+                limit=settings.OUTBOUND_CLAIM_BATCH
+            )
+            if not messages:
+                return False
+
+            errors = await asyncio.gather(*(self._deliver(message) for message in messages))
+
+            for message, error in zip(messages, errors, strict=True):
+                if error is None:
+                    OutboundQueue.complete(db, message)
+                else:
+                    OutboundQueue.fail(db, message, error)
+            db.commit()
+
+            # Próximas partes/mensagens dos mesmos destinatários já podem sair
+            self.notify()
+            return True
+        finally:
+            db.close()
+
+
+# Instâncias globais
+outbound_queue = OutboundQueue()
+outbound_dispatcher = OutboundDispatcher()
@@ -0,0 +1,385 @@
+"""
+Importação de extratos bancários (CSV e OFX)
+POST /api/transactions/import
+
+Permite trazer meses de histórico de uma vez, sem uma chamada ao LLM por
+transação: as linhas são interpretadas localmente, categorizadas pelos
+mesmos apelidos do fast path e inseridas em lotes (um commit por lote).
+Linhas que já existem (mesma data, valor e título) são reportadas e não
+são inseridas novamente.
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional, List, Dict, Iterator, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.models import User, Category, Transaction
+from app.schemas.transaction import TransactionCreate
+from app.services.fast_path import CATEGORY_ALIASES, normalize_text
+from app.services.transaction_service import transaction_service
+
+# Nomes de coluna reconhecidos automaticamente (normalizados, sem acentos)
+DEFAULT_COLUMNS = {
+    "date": ["data", "date", "data lancamento", "data da transacao", "dt"],
+    "title": ["descricao", "description", "historico", "title", "titulo", "memo", "lancamento"],
+    "amount": ["valor", "amount", "value", "valor (r$)", "quantia"],
+    "type": ["tipo", "type", "natureza", "d/c", "credito/debito"],
+}
+
+# Valores da coluna de tipo
+INCOME_VALUES = {"income", "receita", "entrada", "credito", "c", "cr", "credit"}
+EXPENSE_VALUES = {"expense", "despesa", "saida", "debito", "d", "db", "debit"}
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))", re.S | re.I)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+# Número só com agrupamentos de milhar pelo separador ("1.234.567", "1,234")
+_GROUPED = {separator: re.compile(r"\d{1,3}(?:" + re.escape(separator) + r"\d{3})+") for separator in ",."}
+
+
+class StatementImportError(ValueError):
+    """
+    Arquivo de extrato inválido ou sem as colunas obrigatórias
+    """
+
+
+@dataclass
+class ImportedRow:
+    """
+    Linha interpretada do extrato
+    """
+    line: int
+    transaction_date: date
+    title: str
+    amount: float
+    transaction_type: str
+
+
+@dataclass
+class ImportResult:
+    """
+    Resultado da importação
+    """
+    inserted: int = 0
+    duplicates: List[dict] = field(default_factory=list)
+    errors: List[dict] = field(default_factory=list)
+
+
+def _split_amount(text: str) -> Tuple[str, str]:
+    """
+    (parte inteira, casas decimais) sem separadores de milhar
+
+    Um único tipo de separador seguido sempre de três dígitos é agrupamento
+    de milhar: "1.234" e "1.234.567" (formato brasileiro, como no fast path)
+    ou "1,234,567". "1,234" pode ser 1234 ou 1,234 e é recusado.
+    """
+    if "," in text and "." in text:
+        # O último separador é o decimal
+        decimal = "," if text.rfind(",") > text.rfind(".") else "."
+    elif "," in text or "." in text:
+        separator = "," if "," in text else "."
+        if _GROUPED[separator].fullmatch(text):
+            if separator == "," and text.count(",") == 1:
+                raise ValueError(f"valor ambíguo: {text}")
+            return text.replace(separator, ""), ""
+        decimal = separator
+    else:
+        return text, ""
+
+    integer, _, cents = text.rpartition(decimal)
+    thousands = "." if decimal == "," else ","
+    if thousands in integer and not _GROUPED[thousands].fullmatch(integer):
+        raise ValueError(f"valor inválido: {text}")
+    integer = integer.replace(thousands, "")
+    if not integer.isdigit() or not cents.isdigit():
+        raise ValueError(f"valor inválido: {text}")
+    return integer, cents
+
+
+def _parse_amount(value: str) -> float:
+    """
+    Valor em formato brasileiro ("1.234,56", "1.234", "-45,90", "R$ 10") ou
+    americano ("1,234.56"); valores ambíguos geram ValueError
+    """
+    text = value.strip().replace("R$", "").replace(" ", "")
+    negative = text.startswith("-") or (text.startswith("(") and text.endswith(")"))
+    text = text.strip("-+()")
+
+    integer, cents = _split_amount(text)
+    if not integer.isdigit():
+        raise ValueError(f"valor inválido: {value}")
+
+    amount = float(f"{integer}.{cents}" if cents else integer)
+    if not amount:
+        raise ValueError("valor zerado")
+    return -amount if negative else amount
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> date:
+    """
+    Data em DD/MM/YYYY, DD/MM/YY, YYYY-MM-DD ou YYYYMMDD
+    (extratos repetem as mesmas datas em muitas linhas, daí o cache)
+    """
+    text = value.strip()[:10]
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y", "%Y%m%d"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {value}")
+
+
+def _resolve_type(amount: float, type_value: Optional[str]) -> str:
+    if type_value:
+        normalized = normalize_text(type_value.strip())
+        if normalized in INCOME_VALUES:
+            return "income"
+        if normalized in EXPENSE_VALUES:
+            return "expense"
+    return "expense" if amount < 0 else "income"
+
+
+def parse_csv(content: str, column_map: Optional[Dict[str, str]] = None) -> Iterator[Tuple[int, object]]:
+    """
+    Interpreta um CSV de extrato
+
+    Args:
+        content: Conteúdo do arquivo
+        column_map: {"date"|"title"|"amount"|"type": "nome da coluna no arquivo"}
+            Colunas não informadas são detectadas pelos nomes em DEFAULT_COLUMNS.
+            Sem coluna de tipo, valores negativos são despesas.
+
+    Yields:
+        (número da linha, ImportedRow ou mensagem de erro)
+    """
+    sample = content[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(io.StringIO(content), dialect)
+    header = next(reader, None)
+    if not header:
+        raise StatementImportError("Arquivo CSV vazio")
+
+    normalized_header = [normalize_text(h.strip()) for h in header]
+    column_map = column_map or {}
+
+    indexes = {}
+    for key, candidates in DEFAULT_COLUMNS.items():
+        wanted = [normalize_text(column_map[key])] if column_map.get(key) else candidates
+        indexes[key] = next((normalized_header.index(c) for c in wanted if c in normalized_header), None)
+
+    missing = [key for key in ("date", "title", "amount") if indexes[key] is None]
+    if missing:
+        raise StatementImportError(f"Colunas não encontradas no CSV: {', '.join(missing)}")
+
+    date_index, title_index, amount_index, type_index = (
+        indexes["date"], indexes["title"], indexes["amount"], indexes["type"]
+    )
+
+    for line, values in enumerate(reader, start=2):
+        if not any(v.strip() for v in values):
+            continue
+        try:
+            amount = _parse_amount(values[amount_index])
+            yield line, ImportedRow(
+                line=line,
+                transaction_date=_parse_date(values[date_index]),
+                title=values[title_index].strip() or "Transação importada",
+                amount=abs(amount),
+                transaction_type=_resolve_type(amount, values[type_index] if type_index is not None else None)
+            )
+        except (ValueError, IndexError) as e:
+            yield line, f"Linha inválida: {e}"
+
+
+def parse_ofx(content: str) -> Iterator[Tuple[int, object]]:
+    """
+    Interpreta um extrato OFX (SGML ou XML)
+
+    Yields:
+        (número da transação no arquivo, ImportedRow ou mensagem de erro)
+    """
+    blocks = _OFX_TRANSACTION.findall(content)
+    if not blocks and "<OFX>" not in content.upper():
+        raise StatementImportError("Arquivo OFX inválido")
+
+    for number, block in enumerate(blocks, start=1):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(block)}
+        try:
+            amount = _parse_amount(fields["TRNAMT"])
+            yield number, ImportedRow(
+                line=number,
+                transaction_date=_parse_date(fields["DTPOSTED"][:8]),
+                title=fields.get("MEMO") or fields.get("NAME") or "Transação importada",
+                amount=abs(amount),
+                transaction_type="expense" if amount < 0 else "income"
+            )
+        except (KeyError, ValueError) as e:
+            yield number, f"Transação inválida: {e}"
+
+
+class CategoryMatcher:
+    """
+    Categorização local pelo título: nomes das categorias + apelidos do fast path,
+    compilados em uma única expressão regular
+    """
+
+    def __init__(self, categories: List[Category]):
+        self._ids: Dict[str, int] = {normalize_text(c.name): c.id for c in categories}
+
+        for name, aliases in CATEGORY_ALIASES.items():
+            category_id = self._ids.get(normalize_text(name))
+            if category_id:
+                for alias in aliases:
+                    self._ids.setdefault(alias, category_id)
+
+        # Frases mais longas primeiro ("plano de saude" antes de "saude")
+        alternatives = sorted(self._ids, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(" + "|".join(map(re.escape, alternatives)) + r")\b") if alternatives else None
+
+    def match(self, title: str) -> Optional[int]:
+        if not self._pattern:
+            return None
+        found = self._pattern.search(normalize_text(title))
+        return self._ids[found.group(1)] if found else None
+
+
+class StatementImportService:
+    """
+    Importação em lote de extratos
+    """
+
+    @staticmethod
+    def _duplicate_key(transaction_date: date, amount: float, title: str) -> tuple:
+        return transaction_date, round(amount, 2), title.strip().lower()
+
+    @staticmethod
+    def _existing_keys(db: Session, user: User, start_date: date, end_date: date) -> Set[tuple]:
+        """
+        Chaves (data, valor, título) das transações já cadastradas no período do arquivo
+        (títulos normalizados em Python: o lower() do SQLite só converte ASCII)
+        """
+        rows = db.execute(
+            select(Transaction.transaction_date, Transaction.amount, Transaction.title)
+            .where(
+                Transaction.user_id == user.id,
+                Transaction.transaction_date >= start_date,
+                Transaction.transaction_date <= end_date
+            )
+        ).all()
+
+        return {StatementImportService._duplicate_key(d, a, t) for d, a, t in rows}
+
+    @staticmethod
+    def import_rows(
+        db: Session,
+        user: User,
+        parsed: Iterator[Tuple[int, object]],
+        wallet_id: Optional[int] = None,
+        batch_size: int = 5000
+    ) -> ImportResult:
+        """
+        Categoriza, remove duplicatas e insere as linhas em lotes
+        (TransactionService.create_many: um INSERT, um delta de saldo e um
+        commit por lote)
+        """
+        result = ImportResult()
+        rows: List[ImportedRow] = []
+
+        for line, row in parsed:
+            if isinstance(row, ImportedRow):
+                rows.append(row)
+            else:
+                result.errors.append({"linha": line, "erro": row})
+
+        if not rows:
+            return result
+
+        existing = StatementImportService._existing_keys(
+            db,
+            user,
+            min(r.transaction_date for r in rows),
+            max(r.transaction_date for r in rows)
+        )
+
+        matcher = CategoryMatcher(
+            db.query(Category).filter(Category.is_active == True).all()
+        )
+
+        batch: List[TransactionCreate] = []
+        for row in rows:
+            if StatementImportService._duplicate_key(row.transaction_date, row.amount, row.title) in existing:
+                result.duplicates.append({
+                    "linha": row.line,
+                    "data": row.transaction_date.isoformat(),
+                    "descricao": row.title,
+                    "valor": row.amount
+                })
+                continue
+
+            batch.append(TransactionCreate(
+                title=row.title,
+                amount=row.amount,
+                transaction_type=row.transaction_type,
+                transaction_date=row.transaction_date,
+                category_id=matcher.match(row.title),
+                wallet_id=wallet_id,
+                is_confirmed=True
+            ))
+
+            if len(batch) >= batch_size:
+                result.inserted += len(transaction_service.create_many(db, user, batch))
+                batch = []
+
+        if batch:
+            result.inserted += len(transaction_service.create_many(db, user, batch))
+
+        logger.info(
+            f"📥 Importação: {result.inserted} inserida(s), "
+            f"{len(result.duplicates)} duplicada(s), {len(result.errors)} erro(s)"
+        )
+        return result
+
+    @staticmethod
+    def import_file(
+        db: Session,
+        user: User,
+        filename: str,
+        content: bytes,
+        file_format: Optional[str] = None,
+        column_map: Optional[Dict[str, str]] = None,
+        wallet_id: Optional[int] = None
+    ) -> ImportResult:
+        """
+        Importa um arquivo CSV ou OFX (formato detectado pela extensão se não informado)
+        """
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            # Extratos de bancos brasileiros costumam vir em Latin-1
+            text = content.decode("latin-1")
+
+        file_format = (file_format or filename.rsplit(".", 1)[-1]).lower()
+
+        if file_format == "csv":
+            parsed = parse_csv(text, column_map)
+        elif file_format == "ofx":
+            parsed = parse_ofx(text)
+        else:
+            raise StatementImportError(f"Formato não suportado: {file_format}. Use CSV ou OFX.")
+
+        return StatementImportService.import_rows(db, user, parsed, wallet_id)
+
+
+# Instância global
+statement_import = StatementImportService()
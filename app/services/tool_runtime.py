@@ -0,0 +1,134 @@
+"""
+Runtime de execução das tools do agente
+As tools recebem um ToolContext injetado (InjectedToolArg): o LLM nunca vê
+user_id nem a sessão do banco, e os dados carregados (usuário, carteira,
+categorias, métodos de pagamento) são memoizados durante todo o turno.
+"""
+from functools import cached_property
+from typing import Optional, List, Dict, Any
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.models import User, Wallet, Category, PaymentMethod
+
+
+class ToolContext:
+    """
+    Contexto de um turno do agente, compartilhado entre todas as tool calls
+    """
+
+    def __init__(self, db: Session, user_id: int, user: Optional[User] = None):
+        self.db = db
+        self.user_id = user_id
+        if user is not None:
+            self.__dict__["user"] = user
+
+    @cached_property
+    def user(self) -> Optional[User]:
+        """
+        Usuário do turno
+        """
+        return self.db.query(User).filter(User.id == self.user_id).first()
+
+    @cached_property
+    def wallet(self) -> Optional[Wallet]:
+        """
+        Carteira padrão do usuário (ou a primeira, se não houver padrão)
+        """
+        wallet = self.db.query(Wallet).filter(
+            Wallet.user_id == self.user_id,
+            Wallet.is_default == True
+        ).first()
+
+        if not wallet:
+            wallet = self.db.query(Wallet).filter(Wallet.user_id == self.user_id).first()
+
+        return wallet
+
+    @cached_property
+    def categories(self) -> List[Category]:
+        """
+        Categorias ativas
+        """
+        return self.db.query(Category).filter(
+            Category.is_active == True
+        ).order_by(Category.id).all()
+
+    @cached_property
+    def payment_methods(self) -> List[PaymentMethod]:
+        """
+        Métodos de pagamento ativos
+        """
+        return self.db.query(PaymentMethod).filter(
+            PaymentMethod.is_active == True
+        ).order_by(PaymentMethod.id).all()
+
+    @cached_property
+    def _category_names(self) -> Dict[int, str]:
+        return {c.id: c.name for c in self.categories}
+
+    def find_category(self, nome: Optional[str]) -> Optional[Category]:
+        """
+        Categoria cujo nome contém o texto (sem diferenciar maiúsculas)
+        """
+        if not nome:
+            return None
+        nome = nome.lower()
+        return next((c for c in self.categories if nome in c.name.lower()), None)
+
+    def find_payment_method(self, nome: Optional[str]) -> Optional[PaymentMethod]:
+        """
+        Método de pagamento cujo nome contém o texto (sem diferenciar maiúsculas)
+        """
+        if not nome:
+            return None
+        nome = nome.lower()
+        return next((pm for pm in self.payment_methods if nome in pm.name.lower()), None)
+
+    def category_name(self, category_id: Optional[int]) -> str:
+        """
+        Nome da categoria pelo ID (sem consulta ao banco)
+        """
+        if not category_id:
+            return "Sem categoria"
+        return self._category_names.get(category_id, "Sem categoria")
+
+
+class ToolRuntime:
+    """
+    Executa as tool calls do LLM injetando o ToolContext do turno
+    """
+
+    def __init__(self, tools: List[BaseTool]):
+        self.tools_by_name: Dict[str, BaseTool] = {t.name: t for t in tools}
+
+    async def execute(self, tool_calls: List[Dict[str, Any]], context: ToolContext) -> List[ToolMessage]:
+        """
+        Executa as chamadas em sequência (compartilham a mesma sessão do banco)
+        """
+        tool_messages = []
+
+        for tool_call in tool_calls:
+            tool = self.tools_by_name.get(tool_call["name"])
+
+            if tool is None:
+                content = f"Erro: ferramenta '{tool_call['name']}' não existe."
+            else:
+                args = dict(tool_call["args"])
+                if "ctx" in tool.get_input_schema().model_fields:
+                    args["ctx"] = context
+                try:
+                    content = await tool.ainvoke(args)
+                except Exception as e:
+                    logger.error(f"❌ Erro na tool {tool_call['name']}: {e}")
+                    content = f"Erro ao executar {tool_call['name']}: {e}"
+
+            tool_messages.append(ToolMessage(
+                content=str(content),
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"]
+            ))
+
+        return tool_messages
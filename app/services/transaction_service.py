@@ -2,14 +2,95 @@
 Serviço de gerenciamento de transações
 Baseado na lógica do N8n: [FLUXO PRINCIPAL] - Transaction operations
 """
-from typing import Optional, List
+import base64
+import json
+from typing import Optional, List, Dict, Tuple, Iterator
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from app.models import Transaction, User, Category, PaymentMethod, Wallet
+from sqlalchemy import and_, or_, func, insert, update, select, case, true, tuple_, cast, literal, union_all, Date, Integer
+from app.models import Transaction, User, Category, PaymentMethod, Wallet, MonthlyAggregate
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.monthly_aggregates import monthly_aggregates, AggregateDeltas, is_whole_months
+from app.services.user_service import user_service
 from loguru import logger
 
+# Colunas de transactions incluídas na exportação (além dos nomes de categoria/pagamento)
+EXPORT_TRANSACTION_COLUMNS = [
+    "id", "transaction_date", "title", "description", "amount", "transaction_type",
+    "wallet_id", "notes", "tags", "is_recurring", "is_confirmed", "created_at"
+]
+EXPORT_COLUMNS = EXPORT_TRANSACTION_COLUMNS + ["category_name", "payment_method_name"]
+
+# Agrupamentos aceitos pelas séries temporais (GET /api/charts/series)
+SERIES_BUCKETS = ("day", "week", "month", "year")
+
+# Limite de pontos por série (ex.: ~13 anos por dia)
+MAX_SERIES_POINTS = 5000
+
+
+def bucket_start(value: date, bucket: str) -> date:
+    """
+    Início do intervalo (dia, semana iniciando na segunda, mês ou ano) que contém a data
+    """
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    if bucket == "year":
+        return value.replace(month=1, day=1)
+    return value
+
+
+def next_bucket_start(value: date, bucket: str) -> date:
+    """
+    Início do intervalo seguinte
+    """
+    if bucket == "week":
+        return value + timedelta(days=7)
+    if bucket == "month":
+        return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+    if bucket == "year":
+        return date(value.year + 1, 1, 1)
+    return value + timedelta(days=1)
+
+
+def series_buckets(start_date: date, end_date: date, bucket: str) -> List[date]:
+    """
+    Inícios de todos os intervalos entre as datas (preenchimento de lacunas)
+
+    Raises:
+        ValueError: Período invertido ou com mais de MAX_SERIES_POINTS intervalos
+    """
+    if start_date > end_date:
+        raise ValueError("data_inicio deve ser anterior a data_fim")
+
+    # Estimativa antes de gerar a lista (evita laços enormes)
+    days = (end_date - start_date).days
+    estimated = {"day": days, "week": days // 7, "month": days // 28, "year": days // 365}[bucket] + 1
+    if estimated > MAX_SERIES_POINTS:
+        raise ValueError(f"Período longo demais para agrupamento por {bucket} (máximo {MAX_SERIES_POINTS} pontos)")
+
+    buckets = []
+    current = bucket_start(start_date, bucket)
+    while current <= end_date:
+        buckets.append(current)
+        current = next_bucket_start(current, bucket)
+    return buckets
+
+
+def consecutive_periods(reference: date, bucket: str, count: int) -> List[Tuple[date, date]]:
+    """
+    Os últimos `count` intervalos (semana, mês ou ano) até o que contém a data,
+    do mais antigo para o mais recente; o último termina no fim do intervalo
+    """
+    start = bucket_start(reference, bucket)
+    periods = []
+    for _ in range(count):
+        periods.append((start, next_bucket_start(start, bucket) - timedelta(days=1)))
+        start = bucket_start(start - timedelta(days=1), bucket)
+    return periods[::-1]
+
 
 class TransactionService:
     """
@@ -53,16 +134,116 @@ class TransactionService:
         )
 
         db.add(transaction)
-        db.commit()
-        db.refresh(transaction)
 
-        # Atualizar saldo da carteira
+        # Atualizar saldo da carteira (mesma transação do banco)
         if wallet_id:
-            TransactionService._update_wallet_balance(db, wallet_id)
+            TransactionService._apply_wallet_delta(
+                db,
+                wallet_id,
+                TransactionService._signed_amount(transaction.amount, transaction.transaction_type)
+            )
+
+        # Atualizar rollup mensal
+        deltas = AggregateDeltas()
+        deltas.add(
+            user.id,
+            transaction.transaction_date,
+            transaction.category_id,
+            transaction.transaction_type,
+            transaction.amount
+        )
+        monthly_aggregates.apply(db, deltas)
+        user_service.bump_data_version(db, user.id)
+
+        db.commit()
+        db.refresh(transaction)
 
         logger.info(f"✅ Transação criada: {transaction.title} - R$ {transaction.amount}")
         return transaction
 
+    @staticmethod
+    def create_many(
+        db: Session,
+        user: User,
+        transactions_data: List[TransactionCreate]
+    ) -> List[int]:
+        """
+        Cria várias transações em um único INSERT
+        Usado pela tool insere_transacoes_em_lote (itens de nota fiscal)
+
+        Valida todos os itens antes de inserir e aplica um único delta
+        de saldo por carteira.
+
+        Returns:
+            IDs das transações criadas (na ordem recebida)
+        """
+        if not transactions_data:
+            return []
+
+        for data in transactions_data:
+            if data.transaction_type not in ("income", "expense"):
+                raise ValueError(f"Tipo de transação inválido: {data.transaction_type}")
+
+        default_wallet_id = None
+        if any(not data.wallet_id for data in transactions_data):
+            default_wallet = db.query(Wallet).filter(
+                Wallet.user_id == user.id,
+                Wallet.is_default == True
+            ).first()
+            default_wallet_id = default_wallet.id if default_wallet else None
+
+        rows = [
+            {
+                "user_id": user.id,
+                "title": data.title,
+                "description": data.description,
+                "amount": data.amount,
+                "transaction_type": data.transaction_type,
+                "transaction_date": data.transaction_date,
+                "category_id": data.category_id,
+                "payment_method_id": data.payment_method_id,
+                "wallet_id": data.wallet_id or default_wallet_id,
+                "notes": data.notes,
+                "receipt_url": data.receipt_url,
+                "tags": data.tags,
+                "is_recurring": data.is_recurring,
+                "is_confirmed": data.is_confirmed
+            }
+            for data in transactions_data
+        ]
+
+        # INSERT ... RETURNING direto na tabela (Core): evita o custo do bulk
+        # insert do ORM, que agrupa linhas por colunas preenchidas
+        table = Transaction.__table__
+        ids = list(db.execute(insert(table).returning(table.c.id), rows).scalars())
+
+        # Um único delta de saldo por carteira
+        deltas = defaultdict(float)
+        for row in rows:
+            if row["wallet_id"]:
+                deltas[row["wallet_id"]] += row["amount"] if row["transaction_type"] == "income" else -row["amount"]
+
+        for wallet_id, delta in deltas.items():
+            TransactionService._apply_wallet_delta(db, wallet_id, delta)
+
+        # Atualizar rollup mensal
+        aggregate_deltas = AggregateDeltas()
+        for row in rows:
+            aggregate_deltas.add(
+                user.id,
+                row["transaction_date"],
+                row["category_id"],
+                row["transaction_type"],
+                row["amount"]
+            )
+        monthly_aggregates.apply(db, aggregate_deltas)
+        user_service.bump_data_version(db, user.id)
+
+        db.commit()
+
+        logger.info(f"✅ {len(ids)} transações criadas em lote")
+        return ids
+
     @staticmethod
     def get_by_id(db: Session, user: User, transaction_id: int) -> Optional[Transaction]:
         """
@@ -91,6 +272,46 @@ class TransactionService:
             Transaction.created_at.desc()
         ).limit(limit).all()
 
+    @staticmethod
+    def _filter_conditions(
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        transaction_type: Optional[str] = None
+    ) -> list:
+        """
+        Condições WHERE dos filtros da listagem
+        """
+        conditions = [Transaction.user_id == user_id]
+
+        if start_date:
+            conditions.append(Transaction.transaction_date >= start_date)
+        if end_date:
+            conditions.append(Transaction.transaction_date <= end_date)
+        if category_id:
+            conditions.append(Transaction.category_id == category_id)
+        if transaction_type:
+            conditions.append(Transaction.transaction_type == transaction_type)
+
+        return conditions
+
+    @staticmethod
+    def _filtered_query(
+        db: Session,
+        user: User,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        transaction_type: Optional[str] = None
+    ):
+        """
+        Consulta de transações do usuário com os filtros da listagem
+        """
+        return db.query(Transaction).filter(*TransactionService._filter_conditions(
+            user.id, start_date, end_date, category_id, transaction_type
+        ))
+
     @staticmethod
     def get_all(
         db: Session,
@@ -106,28 +327,114 @@ class TransactionService:
         Busca todas as transações com filtros
         GET /api/transactions
         """
-        query = db.query(Transaction).filter(Transaction.user_id == user.id)
-
-        # Filtros
-        if start_date:
-            query = query.filter(Transaction.transaction_date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.transaction_date <= end_date)
-        if category_id:
-            query = query.filter(Transaction.category_id == category_id)
-        if transaction_type:
-            query = query.filter(Transaction.transaction_type == transaction_type)
+        query = TransactionService._filtered_query(
+            db, user, start_date, end_date, category_id, transaction_type
+        )
 
-        # Ordenação e paginação
-        query = query.order_by(Transaction.transaction_date.desc())
+        # Ordenação estável (id desempata transações do mesmo dia) e paginação
+        query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
 
-        if limit:
-            query = query.limit(limit)
         if offset:
             query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
 
         return query.all()
 
+    @staticmethod
+    def encode_cursor(transaction: Transaction) -> str:
+        """
+        Cursor opaco da posição (transaction_date, id)
+        """
+        payload = json.dumps([transaction.transaction_date.isoformat(), transaction.id])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[date, int]:
+        """
+        Decodifica o cursor. Levanta ValueError se inválido.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            transaction_date, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+            return date.fromisoformat(transaction_date), int(transaction_id)
+        except Exception as e:
+            raise ValueError(f"Cursor inválido: {cursor}") from e
+
+    @staticmethod
+    def get_page(
+        db: Session,
+        user: User,
+        limit: int,
+        cursor: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        transaction_type: Optional[str] = None
+    ) -> Tuple[List[Transaction], Optional[str]]:
+        """
+        Página de transações por keyset em (transaction_date, id), do mais recente
+        para o mais antigo. O custo não depende da profundidade da página.
+        GET /api/transactions?limit=50&cursor=...
+
+        Returns:
+            (transações, cursor da próxima página ou None)
+        """
+        query = TransactionService._filtered_query(
+            db, user, start_date, end_date, category_id, transaction_type
+        )
+
+        if cursor:
+            cursor_date, cursor_id = TransactionService.decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Transaction.transaction_date, Transaction.id) < tuple_(cursor_date, cursor_id)
+            )
+
+        transactions = query.order_by(
+            Transaction.transaction_date.desc(),
+            Transaction.id.desc()
+        ).limit(limit + 1).all()
+
+        if len(transactions) <= limit:
+            return transactions, None
+
+        transactions = transactions[:limit]
+        return transactions, TransactionService.encode_cursor(transactions[-1])
+
+    @staticmethod
+    def iter_export(
+        db: Session,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        transaction_type: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> Iterator[tuple]:
+        """
+        Linhas para exportação (na ordem de EXPORT_COLUMNS), lidas do banco
+        em lotes (cursor do lado do servidor com yield_per), sem criar objetos ORM.
+        GET /api/transactions/export
+        """
+        columns = [getattr(Transaction, column) for column in EXPORT_TRANSACTION_COLUMNS]
+
+        stmt = (
+            select(
+                *columns,
+                Category.name.label("category_name"),
+                PaymentMethod.name.label("payment_method_name")
+            )
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .outerjoin(PaymentMethod, PaymentMethod.id == Transaction.payment_method_id)
+            .where(*TransactionService._filter_conditions(
+                user_id, start_date, end_date, category_id, transaction_type
+            ))
+            .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        yield from db.execute(stmt)
+
     @staticmethod
     def update(
         db: Session,
@@ -143,19 +450,52 @@ class TransactionService:
         if not transaction:
             return None
 
+        old_wallet_id = transaction.wallet_id
+        old_amount = TransactionService._signed_amount(transaction.amount, transaction.transaction_type)
+
+        # Remover valores antigos do rollup mensal
+        aggregate_deltas = AggregateDeltas()
+        aggregate_deltas.add(
+            user.id,
+            transaction.transaction_date,
+            transaction.category_id,
+            transaction.transaction_type,
+            -transaction.amount,
+            -1
+        )
+
         # Atualizar apenas campos fornecidos
         update_data = transaction_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(transaction, field, value)
 
+        new_amount = TransactionService._signed_amount(transaction.amount, transaction.transaction_type)
+
+        # Atualizar saldo da(s) carteira(s) com a diferença entre valor antigo e novo
+        if old_wallet_id == transaction.wallet_id:
+            if old_wallet_id and new_amount != old_amount:
+                TransactionService._apply_wallet_delta(db, old_wallet_id, new_amount - old_amount)
+        else:
+            if old_wallet_id:
+                TransactionService._apply_wallet_delta(db, old_wallet_id, -old_amount)
+            if transaction.wallet_id:
+                TransactionService._apply_wallet_delta(db, transaction.wallet_id, new_amount)
+
+        # Somar valores novos no rollup mensal
+        aggregate_deltas.add(
+            user.id,
+            transaction.transaction_date,
+            transaction.category_id,
+            transaction.transaction_type,
+            transaction.amount
+        )
+        monthly_aggregates.apply(db, aggregate_deltas)
+        user_service.bump_data_version(db, user.id)
+
         db.add(transaction)
         db.commit()
         db.refresh(transaction)
 
-        # Atualizar saldo da carteira
-        if transaction.wallet_id:
-            TransactionService._update_wallet_balance(db, transaction.wallet_id)
-
         logger.info(f"✅ Transação atualizada: {transaction.id}")
         return transaction
 
@@ -171,13 +511,30 @@ class TransactionService:
 
         wallet_id = transaction.wallet_id
 
+        # Atualizar saldo da carteira (mesma transação do banco)
+        if wallet_id:
+            TransactionService._apply_wallet_delta(
+                db,
+                wallet_id,
+                -TransactionService._signed_amount(transaction.amount, transaction.transaction_type)
+            )
+
+        # Atualizar rollup mensal
+        deltas = AggregateDeltas()
+        deltas.add(
+            user.id,
+            transaction.transaction_date,
+            transaction.category_id,
+            transaction.transaction_type,
+            -transaction.amount,
+            -1
+        )
+        monthly_aggregates.apply(db, deltas)
+        user_service.bump_data_version(db, user.id)
+
         db.delete(transaction)
         db.commit()
 
-        # Atualizar saldo da carteira
-        if wallet_id:
-            TransactionService._update_wallet_balance(db, wallet_id)
-
         logger.info(f"✅ Transação deletada: {transaction_id}")
         return True
 
@@ -191,53 +548,336 @@ class TransactionService:
         """
         Retorna resumo de transações (receitas, despesas, saldo)
         Usado em /api/dashboard/summary
+
+        Períodos de meses inteiros são respondidos pelo rollup mensal
         """
-        query = db.query(Transaction).filter(Transaction.user_id == user.id)
+        if is_whole_months(start_date, end_date):
+            return monthly_aggregates.get_totals(db, user.id, start_date, end_date)
 
-        if start_date:
-            query = query.filter(Transaction.transaction_date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.transaction_date <= end_date)
+        return TransactionService.get_summaries(
+            db, user, {"period": (start_date, end_date)}
+        )["period"]
 
-        transactions = query.all()
+    @staticmethod
+    def get_summaries(
+        db: Session,
+        user: User,
+        periods: Dict[str, Tuple[Optional[date], Optional[date]]]
+    ) -> Dict[str, dict]:
+        """
+        Resumo de vários períodos em uma única consulta agregada
+        (SUM/COUNT condicionais agrupados por tipo, sem carregar transações)
 
-        total_income = sum(t.amount for t in transactions if t.transaction_type == "income")
-        total_expense = sum(t.amount for t in transactions if t.transaction_type == "expense")
-        balance = total_income - total_expense
+        Args:
+            periods: {"nome": (data_inicio, data_fim)}; None = sem limite
 
-        return {
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "balance": balance,
-            "transaction_count": len(transactions)
+        Returns:
+            {"nome": {"total_income", "total_expense", "balance", "transaction_count"}}
+        """
+        columns = []
+        for start_date, end_date in periods.values():
+            conditions = []
+            if start_date:
+                conditions.append(Transaction.transaction_date >= start_date)
+            if end_date:
+                conditions.append(Transaction.transaction_date <= end_date)
+
+            in_period = and_(*conditions) if conditions else true()
+            columns.append(func.coalesce(func.sum(case((in_period, Transaction.amount), else_=0)), 0))
+            columns.append(func.count(case((in_period, Transaction.id))))
+
+        query = select(Transaction.transaction_type, *columns).where(
+            Transaction.user_id == user.id
+        )
+
+        # Restringir à união dos períodos (permite usar o índice de data)
+        starts = [p[0] for p in periods.values()]
+        ends = [p[1] for p in periods.values()]
+        if all(starts):
+            query = query.where(Transaction.transaction_date >= min(starts))
+        if all(ends):
+            query = query.where(Transaction.transaction_date <= max(ends))
+
+        rows = db.execute(query.group_by(Transaction.transaction_type)).all()
+
+        summaries = {}
+        for index, name in enumerate(periods):
+            totals = {"income": 0.0, "expense": 0.0}
+            count = 0
+            for row in rows:
+                total, row_count = row[1 + index * 2], row[2 + index * 2]
+                if row.transaction_type in totals:
+                    totals[row.transaction_type] = float(total)
+                count += row_count
+
+            summaries[name] = {
+                "total_income": totals["income"],
+                "total_expense": totals["expense"],
+                "balance": totals["income"] - totals["expense"],
+                "transaction_count": count
+            }
+
+        return summaries
+
+    @staticmethod
+    def _bucket_expression(db: Session, column, bucket: str):
+        """
+        Expressão SQL do início do intervalo da coluna de data
+        (date_trunc no PostgreSQL, funções de data no SQLite)
+        """
+        if bucket == "day":
+            return column
+
+        if db.get_bind().dialect.name == "sqlite":
+            modifiers = {
+                # Próximo domingo (ou o próprio dia) menos 6 dias = segunda da semana
+                "week": ("weekday 0", "-6 days"),
+                "month": ("start of month",),
+                "year": ("start of year",),
+            }[bucket]
+            return func.date(column, *modifiers)
+
+        return cast(func.date_trunc(bucket, column), Date)
+
+    @staticmethod
+    def get_series(
+        db: Session,
+        user: User,
+        start_date: date,
+        end_date: date,
+        bucket: str = "day",
+        title_filter: Optional[str] = None,
+        category_id: Optional[int] = None
+    ) -> dict:
+        """
+        Série temporal de receitas e despesas agrupada por dia, semana, mês ou ano
+        GET /api/charts/series e GET /api/charts/bar
+
+        O agrupamento e o filtro de descrição são feitos no banco; intervalos
+        sem transações são preenchidos com zero. Agrupamentos por mês/ano de
+        meses inteiros sem filtro de descrição leem o rollup mensal.
+
+        Returns:
+            Arrays colunares alinhados: {"dates", "income", "expense", "balance", "count"}
+
+        Raises:
+            ValueError: Agrupamento inválido ou período longo demais
+        """
+        if bucket not in SERIES_BUCKETS:
+            raise ValueError(f"Agrupamento inválido: {bucket}")
+
+        buckets = series_buckets(start_date, end_date, bucket)
+
+        if bucket in ("month", "year") and not title_filter and is_whole_months(start_date, end_date):
+            period = TransactionService._bucket_expression(db, MonthlyAggregate.month, bucket)
+            conditions = [
+                MonthlyAggregate.user_id == user.id,
+                MonthlyAggregate.month >= start_date,
+                MonthlyAggregate.month <= end_date
+            ]
+            if category_id:
+                conditions.append(MonthlyAggregate.category_id == category_id)
+            amount, count = MonthlyAggregate.total_amount, MonthlyAggregate.transaction_count
+            type_column = MonthlyAggregate.transaction_type
+        else:
+            period = TransactionService._bucket_expression(db, Transaction.transaction_date, bucket)
+            conditions = TransactionService._filter_conditions(user.id, start_date, end_date, category_id)
+            if title_filter:
+                escaped = title_filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                conditions.append(Transaction.title.ilike(f"%{escaped}%", escape="\\"))
+            amount, count = Transaction.amount, 1
+            type_column = Transaction.transaction_type
+
+        income = func.coalesce(func.sum(case((type_column == "income", amount), else_=0)), 0)
+        expense = func.coalesce(func.sum(case((type_column == "expense", amount), else_=0)), 0)
+        total = func.coalesce(func.sum(count), 0)
+
+        rows = db.execute(
+            select(period.label("period"), income, expense, total)
+            .where(*conditions)
+            .group_by(period)
+        ).all()
+
+        # SQLite devolve as expressões de data como texto
+        totals = {
+            (date.fromisoformat(p) if isinstance(p, str) else p): (float(i), float(e), int(c))
+            for p, i, e, c in rows
         }
 
+        series = {"dates": [], "income": [], "expense": [], "balance": [], "count": []}
+        for start in buckets:
+            income_total, expense_total, row_count = totals.get(start, (0.0, 0.0, 0))
+            series["dates"].append(start.isoformat())
+            series["income"].append(income_total)
+            series["expense"].append(expense_total)
+            series["balance"].append(income_total - expense_total)
+            series["count"].append(row_count)
+
+        return series
+
     @staticmethod
-    def _update_wallet_balance(db: Session, wallet_id: int):
+    def compare_periods(
+        db: Session,
+        user: User,
+        periods: List[Tuple[date, date]],
+        transaction_type: str = "expense"
+    ) -> dict:
         """
-        Recalcula e atualiza o saldo da carteira
+        Totais por categoria em N períodos, com variação em relação ao período anterior
+        GET /api/dashboard/compare e tool compara_periodos
+
+        Uma única consulta: os períodos entram como CTE, a grade período x
+        categoria é completada com zeros e as janelas LAG (valor do período
+        anterior da categoria) e SUM (total do período) calculam as variações.
+
+        Args:
+            periods: [(data_inicio, data_fim)] do mais antigo para o mais recente
+
+        Returns:
+            {"periods": [{"start", "end", "total", "delta", "change"}],
+             "categories": [{"category_id", "name", "totals", "deltas", "changes"}]}
+            deltas/changes têm None na primeira posição; changes em % (None se o anterior for zero)
         """
-        wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
-        if not wallet:
-            return
+        period_selects = [
+            select(
+                literal(index, Integer).label("idx"),
+                literal(start_date, Date).label("start_date"),
+                literal(end_date, Date).label("end_date")
+            )
+            for index, (start_date, end_date) in enumerate(periods)
+        ]
+        period_table = (
+            union_all(*period_selects) if len(period_selects) > 1 else period_selects[0]
+        ).cte("periods")
+
+        category_id = func.coalesce(Transaction.category_id, 0)
+        totals = (
+            select(period_table.c.idx, category_id.label("category_id"), func.sum(Transaction.amount).label("total"))
+            .select_from(period_table.join(Transaction, and_(
+                Transaction.transaction_date >= period_table.c.start_date,
+                Transaction.transaction_date <= period_table.c.end_date
+            )))
+            .where(
+                Transaction.user_id == user.id,
+                Transaction.transaction_type == transaction_type,
+                Transaction.transaction_date >= min(p[0] for p in periods),
+                Transaction.transaction_date <= max(p[1] for p in periods)
+            )
+            .group_by(period_table.c.idx, category_id)
+            .cte("totals")
+        )
 
-        # Somar todas as transações da carteira
-        transactions = db.query(Transaction).filter(
-            Transaction.wallet_id == wallet_id
+        # Grade completa período x categoria (categoria ausente em um período = 0)
+        period_categories = select(totals.c.category_id).distinct().cte("period_categories")
+        grid = (
+            select(
+                period_table.c.idx,
+                period_categories.c.category_id,
+                func.coalesce(totals.c.total, 0).label("total")
+            )
+            .select_from(
+                period_table.join(period_categories, true()).outerjoin(totals, and_(
+                    totals.c.idx == period_table.c.idx,
+                    totals.c.category_id == period_categories.c.category_id
+                ))
+            )
+            .cte("grid")
+        )
+
+        rows = db.execute(
+            select(
+                grid.c.idx,
+                grid.c.category_id,
+                Category.name,
+                grid.c.total,
+                func.lag(grid.c.total).over(partition_by=grid.c.category_id, order_by=grid.c.idx).label("previous"),
+                func.sum(grid.c.total).over(partition_by=grid.c.idx).label("period_total")
+            )
+            .select_from(grid.outerjoin(Category, Category.id == grid.c.category_id))
+            .order_by(grid.c.category_id, grid.c.idx)
         ).all()
 
-        balance = 0.0
-        for t in transactions:
-            if t.transaction_type == "income":
-                balance += t.amount
-            else:
-                balance -= t.amount
+        def change(current: float, previous: float) -> Optional[float]:
+            return round((current - previous) / previous * 100, 1) if previous else None
+
+        size = len(periods)
+        period_totals = [0.0] * size
+        categories: Dict[int, dict] = {}
+
+        for idx, row_category_id, name, total, previous, period_total in rows:
+            period_totals[idx] = float(period_total)
+            category = categories.setdefault(row_category_id, {
+                "category_id": row_category_id or None,
+                "name": name or "Sem categoria",
+                "totals": [0.0] * size,
+                "deltas": [None] * size,
+                "changes": [None] * size
+            })
+            category["totals"][idx] = float(total)
+            if previous is not None:
+                category["deltas"][idx] = round(float(total) - float(previous), 2)
+                category["changes"][idx] = change(float(total), float(previous))
 
-        wallet.current_balance = balance
-        db.add(wallet)
-        db.commit()
+        return {
+            "periods": [
+                {
+                    "start": start_date,
+                    "end": end_date,
+                    "total": period_totals[index],
+                    "delta": round(period_totals[index] - period_totals[index - 1], 2) if index else None,
+                    "change": change(period_totals[index], period_totals[index - 1]) if index else None
+                }
+                for index, (start_date, end_date) in enumerate(periods)
+            ],
+            "categories": sorted(
+                categories.values(),
+                key=lambda c: (-c["totals"][-1], -abs(c["deltas"][-1] or 0), c["name"])
+            )
+        }
+
+    @staticmethod
+    def get_category_distribution(
+        db: Session,
+        user: User,
+        month: date,
+        transaction_type: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Totais do mês por nome de categoria, do maior para o menor
+        (rollup mensal + uma consulta para os nomes)
+        GET /api/charts/pizza
+        """
+        category_totals = monthly_aggregates.get_by_category(db, user.id, month, transaction_type)
 
-        logger.info(f"✅ Saldo da carteira {wallet_id} atualizado: R$ {balance}")
+        category_ids = [category_id for category_id, _ in category_totals if category_id]
+        category_names = dict(
+            db.query(Category.id, Category.name).filter(Category.id.in_(category_ids)).all()
+        ) if category_ids else {}
+
+        distribution = defaultdict(float)
+        for category_id, amount in category_totals:
+            distribution[category_names.get(category_id, "Sem categoria")] += amount
+
+        return sorted(distribution.items(), key=lambda item: item[1], reverse=True)
+
+    @staticmethod
+    def _signed_amount(amount: float, transaction_type: str) -> float:
+        """
+        Valor com sinal: receitas somam, despesas subtraem do saldo
+        """
+        return amount if transaction_type == "income" else -amount
+
+    @staticmethod
+    def _apply_wallet_delta(db: Session, wallet_id: int, delta: float):
+        """
+        Aplica incremento/decremento atômico no saldo da carteira (sem commit)
+        UPDATE wallets SET current_balance = current_balance + :delta
+        """
+        db.execute(
+            update(Wallet)
+            .where(Wallet.id == wallet_id)
+            .values(current_balance=func.coalesce(Wallet.current_balance, 0) + delta)
+        )
 
 
 # Instância global
@@ -3,6 +3,7 @@ Serviço de gerenciamento de usuários
 Baseado na lógica do N8n: [FLUXO PRINCIPAL] - PostgreSQL queries
 """
 from typing import Optional
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models import User, Wallet
 from app.core.security import generate_api_key, generate_master_token, hash_password
@@ -63,6 +64,19 @@ class UserService:
         logger.info(f"✅ Usuário criado: {user.remote_jid}")
         return user
 
+    @staticmethod
+    def bump_data_version(db: Session, user_id: int):
+        """
+        Incrementa a versão dos dados do usuário (atômico, sem commit)
+        Chamado na mesma transação do banco de toda escrita em transações,
+        lembretes e carteiras; invalida ETags e o cache de gráficos.
+        """
+        db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(data_version=User.data_version + 1)
+        )
+
     @staticmethod
     def create_master_token(db: Session, user: User) -> str:
         """
@@ -96,6 +110,7 @@ class UserService:
         )
 
         db.add(wallet)
+        UserService.bump_data_version(db, user.id)
         db.commit()
         db.refresh(wallet)
 
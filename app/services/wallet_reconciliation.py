@@ -0,0 +1,198 @@
+"""
+Conferência dos saldos das carteiras
+O saldo é mantido por incrementos atômicos (TransactionService._apply_wallet_delta);
+este job recalcula todos os saldos em uma única consulta agregada e reporta
+(opcionalmente corrige) qualquer divergência.
+
+Uso manual:
+    python -m app.services.wallet_reconciliation [--fix]
+"""
+import asyncio
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+from sqlalchemy import select, update, func, case
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models import Wallet, Transaction
+from app.services.user_service import user_service
+
+# Tolerância para erros de arredondamento de ponto flutuante
+BALANCE_TOLERANCE = 0.005
+
+
+@dataclass
+class WalletDrift:
+    """
+    Carteira com saldo salvo diferente da soma das transações
+    """
+    wallet_id: int
+    user_id: int
+    stored_balance: float
+    expected_balance: float
+
+    @property
+    def difference(self) -> float:
+        return round(self.stored_balance - self.expected_balance, 2)
+
+
+def _signed_amount():
+    """
+    Valor com sinal: receitas somam, despesas subtraem do saldo
+    """
+    return case(
+        (Transaction.transaction_type == "income", Transaction.amount),
+        else_=-Transaction.amount
+    )
+
+
+class WalletReconciliation:
+    """
+    Verificação em lote dos saldos das carteiras
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def find_drift(db: Session) -> List[WalletDrift]:
+        """
+        Compara o saldo salvo de todas as carteiras com a soma das transações
+        (um único GROUP BY, sem carregar transações)
+        """
+        totals = (
+            select(
+                Transaction.wallet_id.label("wallet_id"),
+                func.sum(_signed_amount()).label("total")
+            )
+            .where(Transaction.wallet_id.isnot(None))
+            .group_by(Transaction.wallet_id)
+            .subquery()
+        )
+
+        rows = db.execute(
+            select(
+                Wallet.id,
+                Wallet.user_id,
+                func.coalesce(Wallet.current_balance, 0),
+                func.coalesce(totals.c.total, 0)
+            ).outerjoin(totals, totals.c.wallet_id == Wallet.id)
+        ).all()
+
+        return [
+            WalletDrift(
+                wallet_id=wallet_id,
+                user_id=user_id,
+                stored_balance=float(stored),
+                expected_balance=float(expected)
+            )
+            for wallet_id, user_id, stored, expected in rows
+            if abs(float(stored) - float(expected)) > BALANCE_TOLERANCE
+        ]
+
+    @staticmethod
+    def fix(db: Session, drifts: List[WalletDrift]) -> int:
+        """
+        Corrige o saldo das carteiras divergentes
+
+        A divergência vem de uma leitura anterior: cada carteira é bloqueada
+        (FOR UPDATE) e o saldo esperado recalculado antes de gravar, para não
+        sobrescrever um _apply_wallet_delta confirmado nesse intervalo.
+        Transações ainda em andamento aplicam o delta depois, sobre o saldo
+        corrigido.
+
+        Returns:
+            Quantidade de carteiras corrigidas
+        """
+        fixed = 0
+        for drift in drifts:
+            stored = db.execute(
+                select(func.coalesce(Wallet.current_balance, 0))
+                .where(Wallet.id == drift.wallet_id)
+                .with_for_update()
+            ).scalar()
+            expected = db.execute(
+                select(func.coalesce(func.sum(_signed_amount()), 0))
+                .where(Transaction.wallet_id == drift.wallet_id)
+            ).scalar()
+
+            if stored is None or abs(float(stored) - float(expected)) <= BALANCE_TOLERANCE:
+                # Removida ou já acertada por outra escrita
+                db.commit()
+                continue
+
+            db.execute(
+                update(Wallet)
+                .where(Wallet.id == drift.wallet_id)
+                .values(current_balance=float(expected))
+            )
+            user_service.bump_data_version(db, drift.user_id)
+            db.commit()
+            fixed += 1
+
+        return fixed
+
+    @staticmethod
+    def run(db: Session, autofix: bool = False) -> List[WalletDrift]:
+        """
+        Executa a conferência e registra as divergências no log
+        """
+        drifts = WalletReconciliation.find_drift(db)
+
+        for drift in drifts:
+            logger.warning(
+                f"⚠️ Saldo divergente na carteira {drift.wallet_id} (usuário {drift.user_id}): "
+                f"salvo R$ {drift.stored_balance:.2f}, esperado R$ {drift.expected_balance:.2f} "
+                f"(diferença R$ {drift.difference:.2f})"
+            )
+
+        if drifts and autofix:
+            fixed = WalletReconciliation.fix(db, drifts)
+            logger.info(f"🔧 {fixed} saldo(s) de carteira corrigido(s)")
+        elif not drifts:
+            logger.info("✅ Saldos das carteiras conferidos, nenhuma divergência")
+
+        return drifts
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(settings.WALLET_RECONCILE_INTERVAL_SECONDS)
+            db = SessionLocal()
+            try:
+                await asyncio.to_thread(self.run, db, settings.WALLET_RECONCILE_AUTOFIX)
+            except Exception as e:
+                logger.error(f"❌ Erro na conferência de saldos: {e}")
+            finally:
+                db.close()
+
+    def start(self):
+        """
+        Inicia a conferência periódica (startup da aplicação)
+        """
+        if settings.WALLET_RECONCILE_INTERVAL_SECONDS > 0:
+            self._task = asyncio.create_task(self._loop(), name="wallet-reconciliation")
+
+    async def stop(self):
+        """
+        Encerra a conferência periódica (shutdown da aplicação)
+        """
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Instância global
+wallet_reconciliation = WalletReconciliation()
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        drifts = wallet_reconciliation.run(db, autofix="--fix" in sys.argv)
+    finally:
+        db.close()
+    sys.exit(1 if drifts and "--fix" not in sys.argv else 0)
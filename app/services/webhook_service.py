@@ -0,0 +1,130 @@
+"""
+Pipeline de processamento das mensagens do WhatsApp
+Baseado no N8n: [FLUXO PRINCIPAL] - Webhook /finmec
+
+Executado pelos workers da fila de entrada (app.services.inbound_queue),
+fora da requisição HTTP do webhook. Mensagens em rajada do mesmo usuário
+chegam juntas (agrupadas na reserva da fila) e viram um único turno.
+"""
+from typing import List
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.schemas.webhook import WebhookRequest
+from app.services.user_service import user_service
+from app.services.message_processor import message_processor
+from app.services.langgraph_agent import financial_agent
+from app.services.idempotency import message_idempotency
+from app.services.fast_path import fast_path
+from app.services.outbound_queue import outbound_dispatcher
+
+
+INACTIVE_USER_MESSAGE = """👋 Olá! Obrigado por entrar em contato.
+
+Para usar o sistema de controle financeiro, você precisa ativar sua conta primeiro.
+
+Entre em contato conosco para mais informações sobre como ativar."""
+
+
+class WebhookService:
+    """
+    Serviço que processa uma mensagem recebida pelo webhook
+    """
+
+    @staticmethod
+    def _reply(db: Session, remote_jid: str, text: str):
+        """
+        Enfileira a resposta na fila de saída (envio, limites de taxa e novas
+        tentativas ficam com o dispatcher).
+        Falhas não propagam: reprocessar o job repetiria
+        a transcrição, o LLM e as escritas no banco.
+        """
+        try:
+            outbound_dispatcher.send(db, remote_jid, text)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Erro ao enfileirar resposta para {remote_jid}: {e}")
+
+    @staticmethod
+    async def handle_message(db: Session, webhook_data: WebhookRequest) -> dict:
+        """
+        Processa uma única mensagem do webhook
+        """
+        return await WebhookService.handle_messages(db, [webhook_data])
+
+    @staticmethod
+    async def handle_messages(db: Session, webhooks: List[WebhookRequest]) -> dict:
+        """
+        Processa as mensagens de um mesmo remote_jid como um único turno
+
+        Fluxo:
+        1. Buscar ou criar usuário
+        2. Verificar se está ativo
+        3. Processar cada mensagem baseado no tipo (em ordem de chegada)
+        4. Enviar o texto combinado para o LangGraph Agent
+        5. Responder no WhatsApp
+        """
+        remote_jid = webhooks[0].remoteJid
+        message_ids = [webhook.message.id for webhook in webhooks if webhook.message.id]
+
+        logger.info(
+            f"📩 Processando {len(webhooks)} mensagem(ns) de {remote_jid} - "
+            f"Tipo(s): {', '.join(webhook.message.type for webhook in webhooks)}"
+        )
+
+        # 1. Buscar ou criar usuário
+        user, is_new = user_service.get_or_create_user(db, remote_jid)
+
+        # 2. Verificar se usuário está ativo
+        if not user.is_active:
+            # Usuário inativo (não pagou)
+            logger.warning(f"⚠️ Usuário inativo tentou usar o sistema: {remote_jid}")
+            WebhookService._reply(db, remote_jid, INACTIVE_USER_MESSAGE)
+            return {"status": "user_inactive", "user_id": user.id}
+
+        # 3. Processar mensagens baseado no tipo
+        parts = []
+        for webhook in webhooks:
+            message = webhook.message
+            try:
+                parts.append(await message_processor.route_and_process(
+                    message_type=message.type,
+                    message_data=message.dict(),
+                    message_id=message.id
+                ))
+            except Exception as e:
+                logger.error(f"❌ Erro ao processar mensagem: {e}")
+                parts.append("Desculpe, tive um problema ao processar sua mensagem.")
+
+        processed_text = "\n".join(parts)
+        logger.info(f"📝 Texto processado: {processed_text[:100]}...")
+
+        # 4. Fast path para transações simples ou LangGraph Agent
+        try:
+            agent_response = fast_path.try_handle(db, user, processed_text)
+            if agent_response:
+                await financial_agent.remember(db, user, processed_text, agent_response)
+            else:
+                agent_response = await financial_agent.process_message(
+                    user=user,
+                    message_text=processed_text,
+                    db=db
+                )
+        except Exception as e:
+            logger.error(f"❌ Erro no agent: {e}", exc_info=True)
+            agent_response = "Desculpe, tive um problema ao processar sua solicitação. Tente novamente em alguns instantes."
+
+        logger.info(f"🤖 Agent respondeu: {agent_response[:100]}...")
+
+        # 5. Responder no WhatsApp
+        WebhookService._reply(db, remote_jid, agent_response)
+
+        # Guardar resposta para replay de reentregas (todas as mensagens do turno)
+        for message_id in message_ids:
+            message_idempotency.record_response(db, message_id, agent_response)
+
+        return {"status": "success", "user_id": user.id, "response": agent_response}
+
+
+# Instância global
+webhook_service = WebhookService()
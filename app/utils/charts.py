@@ -0,0 +1,101 @@
+"""
+Renderização de gráficos em PNG (matplotlib)
+
+Funções puras, executadas nos processos do ChartRenderer: recebem apenas
+listas e textos (serializáveis) e devolvem os bytes da imagem. Este módulo
+não importa nada da aplicação, para que os processos filhos iniciem rápido.
+"""
+import io
+from typing import List
+
+# Cores do FinMec
+INCOME_COLOR = "#2e7d32"
+EXPENSE_COLOR = "#c62828"
+PIE_COLORS = [
+    "#1565c0", "#c62828", "#2e7d32", "#f9a825", "#6a1b9a", "#00838f",
+    "#ef6c00", "#4e342e", "#ad1457", "#37474f", "#9e9d24", "#5d4037"
+]
+
+# Tamanho das imagens enviadas pelo WhatsApp (polegadas x DPI)
+FIGURE_SIZE = (8, 5)
+DPI = 100
+
+
+def warmup():
+    """
+    Inicializador dos processos: importa o matplotlib uma única vez por processo
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _to_png(figure) -> bytes:
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+    plt.close(figure)
+    return buffer.getvalue()
+
+
+def _empty(ax, title: str):
+    ax.set_title(title)
+    ax.text(0.5, 0.5, "Sem transações no período", ha="center", va="center", fontsize=14, color="#757575")
+    ax.axis("off")
+
+
+def render_bar_chart(title: str, labels: List[str], income: List[float], expense: List[float]) -> bytes:
+    """
+    Barras agrupadas de receitas e despesas por intervalo
+    """
+    warmup()
+    import matplotlib.pyplot as plt
+
+    figure, ax = plt.subplots(figsize=FIGURE_SIZE)
+
+    if not any(income) and not any(expense):
+        _empty(ax, title)
+        return _to_png(figure)
+
+    positions = range(len(labels))
+    width = 0.4
+    ax.bar([p - width / 2 for p in positions], income, width, label="Receitas", color=INCOME_COLOR)
+    ax.bar([p + width / 2 for p in positions], expense, width, label="Despesas", color=EXPENSE_COLOR)
+
+    ax.set_title(title)
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(labels, rotation=45 if len(labels) > 7 else 0, ha="right" if len(labels) > 7 else "center")
+    ax.yaxis.set_major_formatter(lambda value, _: f"R$ {value:,.0f}".replace(",", "."))
+    ax.grid(axis="y", alpha=0.3)
+    ax.legend()
+
+    return _to_png(figure)
+
+
+def render_pizza_chart(title: str, labels: List[str], values: List[float]) -> bytes:
+    """
+    Distribuição por categoria (fatias com percentual)
+    """
+    warmup()
+    import matplotlib.pyplot as plt
+
+    figure, ax = plt.subplots(figsize=FIGURE_SIZE)
+
+    if not any(values):
+        _empty(ax, title)
+        return _to_png(figure)
+
+    ax.pie(
+        values,
+        labels=labels,
+        colors=PIE_COLORS[:len(values)] if len(values) <= len(PIE_COLORS) else None,
+        autopct=lambda pct: f"{pct:.1f}%" if pct >= 3 else "",
+        startangle=90,
+        counterclock=False,
+        wedgeprops={"linewidth": 1, "edgecolor": "white"}
+    )
+    ax.set_title(title)
+    ax.axis("equal")
+
+    return _to_png(figure)
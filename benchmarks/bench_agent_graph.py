@@ -0,0 +1,50 @@
+"""
+Benchmark: overhead por mensagem da montagem do grafo do agente
+
+Compara o fluxo antigo (bind_tools + StateGraph + compile a cada mensagem)
+com o grafo compilado uma única vez e reutilizado pelo registro.
+Não faz chamadas à OpenAI: mede apenas o custo de preparação do grafo.
+
+Execute: python benchmarks/bench_agent_graph.py [iteracoes]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.services.langgraph_agent import FinancialAgent  # noqa: E402
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call_ms = (time.perf_counter() - start) * 1000 / iterations
+    print(f"{label:<40} {per_call_ms:>10.3f} ms/mensagem")
+    return per_call_ms
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    agent = FinancialAgent()
+    tools = agent.get_tools()
+
+    before = bench("Antes (build_graph por mensagem)", lambda: agent.build_graph(tools), iterations)
+
+    agent.warmup()
+    after = bench("Depois (grafo compilado reutilizado)", lambda: agent.graph, iterations)
+
+    print(f"\nGanho: {before / max(after, 1e-9):,.0f}x menos overhead por mensagem")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: renderização de gráficos em PNG, sem cache x com cache
+
+Popula um mês de transações e mede ChartRenderer.bar_chart e
+ChartRenderer.pizza_chart com o cache vazio (renderização no pool de
+processos) e com a imagem já em cache (apenas a consulta agregada).
+O tempo de subida do pool (spawn + import do matplotlib) é medido à parte.
+
+Execute: python benchmarks/bench_chart_render.py [transacoes]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.core.metrics import metrics  # noqa: E402
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.db.init_db import create_default_categories  # noqa: E402
+from app.models import User  # noqa: E402
+from app.schemas.transaction import TransactionCreate  # noqa: E402
+from app.services.chart_renderer import ChartRenderer  # noqa: E402
+from app.services.transaction_service import transaction_service  # noqa: E402
+
+REPEAT = 20
+
+
+def seed(db, count: int) -> User:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    create_default_categories(db)
+
+    user = User(remote_jid="5500000000000@s.whatsapp.net", name="Bench", is_active=True)
+    db.add(user)
+    db.commit()
+
+    today = date.today()
+    transaction_service.create_many(db, user, [
+        TransactionCreate(
+            title=f"Transação {i}",
+            amount=10.0 + i % 300,
+            transaction_type="income" if i % 6 == 0 else "expense",
+            transaction_date=date(today.year, today.month, 1 + i % min(today.day, 28)),
+            category_id=1 + i % 11
+        )
+        for i in range(count)
+    ])
+    return user
+
+
+async def measure(fn, clear_cache=None) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        if clear_cache:
+            clear_cache()
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(db, user: User):
+    renderer = ChartRenderer(max_workers=2)
+
+    start = time.perf_counter()
+    renderer.start()
+    # Primeira renderização: inclui spawn dos processos e import do matplotlib
+    image = await renderer.pizza_chart(db, user)
+    startup = (time.perf_counter() - start) * 1000
+    print(f"Subida do pool + primeira imagem: {startup:.0f} ms ({len(image) / 1024:.0f} KB)\n")
+
+    charts = {
+        "barras (7 dias)": lambda: renderer.bar_chart(db, user),
+        "pizza (mês)": lambda: renderer.pizza_chart(db, user),
+    }
+
+    print(f"{'':<18}{'sem cache':>12}{'com cache':>12}")
+    for name, fn in charts.items():
+        cold = await measure(fn, clear_cache=renderer.cache.clear)
+        await fn()
+        warm = await measure(fn)
+        print(f"{name:<18}{cold:>9.1f} ms{warm:>9.2f} ms")
+
+    print(f"\nTaxa de acerto do cache: {metrics.ratio('chart_cache.hits', 'chart_cache.misses'):.0%}")
+    await renderer.stop()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    db = SessionLocal()
+    user = seed(db, count)
+    print(f"Usuário com {count} transações no mês\n")
+
+    asyncio.run(run(db, user))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
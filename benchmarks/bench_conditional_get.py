@@ -0,0 +1,125 @@
+"""
+Benchmark: polling do dashboard com e sem If-None-Match
+
+Simula um cliente que consulta os endpoints do dashboard a cada poucos
+segundos. Compara a resposta completa (200) com a revalidação pela ETag
+(304), em latência e em consultas SQL, e confere que uma escrita muda a ETag.
+
+Execute: python benchmarks/bench_conditional_get.py [transacoes]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.db.init_db import create_default_categories  # noqa: E402
+from app.db.query_counter import QueryCounter  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User, Wallet  # noqa: E402
+from app.schemas.transaction import TransactionCreate  # noqa: E402
+from app.services.transaction_service import transaction_service  # noqa: E402
+
+API_KEY = "bench-api-key"
+REPEAT = 50
+
+ENDPOINTS = [
+    "/api/dashboard/summary",
+    "/api/charts/pizza",
+    "/api/charts/bar",
+    "/api/charts/series?agrupamento=month&data_inicio=2020-01-01",
+    "/api/transactions/recent?limit=50",
+    "/api/wallet/current",
+]
+
+
+def seed(count: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    create_default_categories(db)
+
+    user = User(remote_jid="5500000000000@s.whatsapp.net", name="Bench", is_active=True, api_key=API_KEY)
+    db.add(user)
+    db.commit()
+    db.add(Wallet(user_id=user.id, name="Principal", current_balance=0.0, is_default=True))
+    db.commit()
+
+    today = date.today()
+    transaction_service.create_many(db, user, [
+        TransactionCreate(
+            title=f"Transação {i}",
+            amount=10.0 + i % 300,
+            transaction_type="income" if i % 5 == 0 else "expense",
+            transaction_date=date(2020 + (i // 12) % (today.year - 2019), 1 + i % 12, 1 + i % 28),
+            category_id=1 + i % 11
+        )
+        for i in range(count)
+    ])
+    db.close()
+
+
+def measure(client: TestClient, url: str, headers: dict) -> tuple:
+    """
+    Returns:
+        (mediana em ms, consultas SQL por requisição, status)
+    """
+    samples = []
+    for _ in range(REPEAT):
+        with QueryCounter() as counter:
+            start = time.perf_counter()
+            response = client.get(url, headers=headers)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), counter.count, response.status_code
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    seed(count)
+    print(f"Usuário com {count} transações, {REPEAT} requisições por endpoint\n")
+
+    client = TestClient(app)
+    headers = {"apikey": API_KEY}
+
+    print(f"{'':<58}{'200':>10}{'304':>10}{'SQL 200':>9}{'SQL 304':>9}")
+    total_full = total_revalidated = 0.0
+    for url in ENDPOINTS:
+        etag = client.get(url, headers=headers).headers["ETag"]
+
+        full, full_queries, _ = measure(client, url, headers)
+        revalidated, revalidated_queries, status = measure(client, url, {**headers, "If-None-Match": etag})
+        assert status == 304, f"{url}: esperado 304, recebido {status}"
+
+        total_full += full
+        total_revalidated += revalidated
+        print(f"{url:<58}{full:>7.2f} ms{revalidated:>7.2f} ms{full_queries:>9}{revalidated_queries:>9}")
+
+    print(f"\nPolling completo: {total_full:.1f} ms; com ETag: {total_revalidated:.1f} ms "
+          f"({total_full / total_revalidated:.1f}x)")
+
+    # Uma escrita invalida a ETag
+    etag = client.get(ENDPOINTS[0], headers=headers).headers["ETag"]
+    client.post("/api/transactions/", headers=headers, json={
+        "title": "Nova", "amount": 1.0, "transaction_type": "expense", "transaction_date": date.today().isoformat()
+    })
+    response = client.get(ENDPOINTS[0], headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag, "ETag não mudou após escrita"
+    print("Escrita nova: ETag alterada, resposta 200 ✅")
+
+
+if __name__ == "__main__":
+    main()
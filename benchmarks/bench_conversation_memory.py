@@ -0,0 +1,73 @@
+"""
+Benchmark: tokens de prompt por turno em uma conversa sintética de 200 turnos
+
+Compara o histórico completo (sem limite) com a janela limitada por tokens
++ resumo acumulado usada pelo agente. O resumo é simulado localmente
+(sem chamadas à OpenAI) respeitando MEMORY_SUMMARY_MAX_TOKENS.
+
+Execute: python benchmarks/bench_conversation_memory.py [turnos]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.core.config import settings  # noqa: E402
+from app.services.conversation_memory import ConversationWindow, estimate_tokens  # noqa: E402
+from app.services.langgraph_agent import SYSTEM_PROMPT  # noqa: E402
+
+
+async def fake_summarizer(summary, messages):
+    """Resumo simulado com o tamanho máximo configurado"""
+    text = (summary or "") + " " + " ".join(m["content"] for m in messages)
+    return text[-settings.MEMORY_SUMMARY_MAX_TOKENS * 4:]
+
+
+def synthetic_turn(n: int):
+    human = f"gastei {10 + n % 90},{n % 100:02d} no mercado com cartão de débito dia {1 + n % 28}"
+    ai = (
+        f"🔴 **DESPESA INSERIDA COM SUCESSO**\n\n*Mercado*\n💰 R$ {10 + n % 90},{n % 100:02d}\n"
+        f"🗓 {1 + n % 28:02d}/10/2026\n📊 Alimentação\n📍 Forma de pagamento: Cartão de Débito\n🔍 Código: {1000 + n}"
+    )
+    return human, ai
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    system_tokens = estimate_tokens(SYSTEM_PROMPT)
+
+    unbounded = ConversationWindow()
+    bounded = ConversationWindow()
+    summaries = 0
+
+    print(f"{'turno':>6} {'sem limite':>12} {'janela+resumo':>14}")
+    for n in range(1, turns + 1):
+        human, ai = synthetic_turn(n)
+
+        # Tokens do prompt enviado neste turno (system + histórico + mensagem)
+        prompt_unbounded = system_tokens + unbounded.tokens() + estimate_tokens(human)
+        prompt_bounded = system_tokens + bounded.tokens() + estimate_tokens(human)
+
+        if n in (1, 10, 25, 50, 100, 150, 200) or n == turns:
+            print(f"{n:>6} {prompt_unbounded:>12} {prompt_bounded:>14}")
+
+        unbounded.append_turn(human, ai, budget=10 ** 9)
+        overflow = bounded.append_turn(human, ai, budget=settings.MEMORY_TOKEN_BUDGET)
+        if overflow:
+            bounded.summary = await fake_summarizer(bounded.summary, overflow)
+            summaries += 1
+
+    print(f"\nResumos gerados: {summaries} em {turns} turnos (orçamento {settings.MEMORY_TOKEN_BUDGET} tokens)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
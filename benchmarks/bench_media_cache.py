@@ -0,0 +1,178 @@
+"""
+Benchmark: cache das análises de mídia por fileSha256
+
+Uma Uazapi e um Gemini falsos (com latência artificial de análise) rodam
+localmente. Processa documentos em que parte das mensagens reencaminha
+mídias já vistas e compara a latência de process_document por camada:
+- miss: download + análise no Gemini
+- hit em memória (LRU)
+- hit no banco (LRU esvaziado, como em outro worker ou após reinício)
+
+Reporta também a taxa de acerto (gauge media_cache.hit_rate) e quantas
+chamadas ao Gemini foram evitadas.
+
+Execute: python benchmarks/bench_media_cache.py [mensagens] [fracao_reencaminhada] [latencia_ms]
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["DEBUG"] = "False"
+
+from loguru import logger  # noqa: E402
+
+from app.core.metrics import metrics  # noqa: E402
+from app.db.database import Base, engine  # noqa: E402
+from app.integrations.gemini_client import gemini_client  # noqa: E402
+from app.integrations.uazapi import uazapi_client  # noqa: E402
+from app.services.media_cache import media_analysis_cache  # noqa: E402
+from app.services.message_processor import message_processor  # noqa: E402
+
+DOCUMENT = os.urandom(256 * 1024)
+GEMINI_RESPONSE = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": "Comprei energia elétrica por 189.90"}]}}]
+}).encode()
+
+
+class FakeServices(BaseHTTPRequestHandler):
+    """Uazapi (/message/download e /files/<id>) e Gemini com latência"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    analysis_latency = 0.5
+    analyses = 0
+
+    def _send(self, body: bytes, content_type: str = "application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/message/download":
+            port = self.server.server_address[1]
+            self._send(json.dumps({
+                "fileURL": f"http://127.0.0.1:{port}/files/{json.loads(body)['id']}.pdf",
+                "mimetype": "application/pdf"
+            }).encode())
+        else:
+            FakeServices.analyses += 1
+            time.sleep(self.analysis_latency)
+            self._send(GEMINI_RESPONSE)
+
+    def do_GET(self):
+        self._send(DOCUMENT, "application/pdf")
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeServices)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def build_messages(total: int, forwarded: float) -> list:
+    """Mensagens de documento; uma fração reencaminha um hash já enviado"""
+    random.seed(42)
+    hashes = []
+    messages = []
+    for i in range(total):
+        if hashes and random.random() < forwarded:
+            sha256 = random.choice(hashes)
+        else:
+            sha256 = f"sha-{i}"
+            hashes.append(sha256)
+        messages.append((f"doc-{i}", {"documentMessage": {"fileSha256": sha256}}))
+    return messages
+
+
+async def timed(message_id: str, message_data: dict) -> float:
+    start = time.perf_counter()
+    result = await message_processor.process_document(message_data, message_id)
+    assert "189.90" in result, result
+    return (time.perf_counter() - start) * 1000
+
+
+def counters() -> tuple:
+    return metrics.get("media_cache.memory_hits"), metrics.get("media_cache.db_hits")
+
+
+async def run(total: int, forwarded: float):
+    await uazapi_client.start()
+    await gemini_client.start()
+
+    latencies = {"miss": [], "memória": [], "banco": []}
+    for message_id, message_data in build_messages(total, forwarded):
+        before = counters()
+        elapsed = await timed(message_id, message_data)
+        after = counters()
+        tier = "memória" if after[0] > before[0] else "banco" if after[1] > before[1] else "miss"
+        latencies[tier].append(elapsed)
+
+    hit_rate = metrics.get("media_cache.hit_rate")
+    analyses = FakeServices.analyses
+
+    # Mesmas mídias com o LRU vazio: leitura do banco
+    media_analysis_cache.clear_memory()
+    seen = set()
+    for message_id, message_data in build_messages(total, forwarded):
+        sha256 = message_data["documentMessage"]["fileSha256"]
+        if sha256 not in seen:
+            seen.add(sha256)
+            latencies["banco"].append(await timed(message_id, message_data))
+
+    await gemini_client.stop()
+    await uazapi_client.stop()
+
+    print(f"{'':<12}{'chamadas':>10}{'mediana':>12}{'p95':>12}")
+    for tier, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1] if len(values) > 1 else values[0]
+        print(f"{tier:<12}{len(values):>10}{statistics.median(values):>9.2f} ms{p95:>9.2f} ms")
+
+    hits = total - len(latencies["miss"])
+    print(f"\nTaxa de acerto na primeira passada: {hits / total:.0%} (gauge media_cache.hit_rate: {hit_rate})")
+    print(f"Análises no Gemini: {analyses} de {total} mensagens")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    forwarded = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    FakeServices.analysis_latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 500) / 1000
+
+    logger.remove()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    base_url = start_stub()
+    uazapi_client.base_url = base_url
+    gemini_client.base_url = f"{base_url}/v1beta"
+
+    print(f"{total} documentos, {forwarded:.0%} reencaminhados, "
+          f"análise do Gemini em {FakeServices.analysis_latency * 1000:.0f} ms\n")
+    asyncio.run(run(total, forwarded))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark: pico de memória (RSS) ao processar documentos grandes em paralelo
+
+Compara o processamento de N documentos simultâneos:
+- antes: download_media com base64 no JSON + base64 inteiro no corpo do Gemini
+- depois: download_media_file (link + streaming para SpooledTemporaryFile)
+  e base64 gerado aos poucos durante o envio ao Gemini
+
+Uma Uazapi e um Gemini falsos rodam em outro processo (não entram na medição);
+cada modo roda em um processo novo e reporta o acréscimo do pico de RSS
+(ru_maxrss) em relação ao processo já inicializado.
+
+Execute: python benchmarks/bench_media_download.py [tamanho_mb] [documentos]
+"""
+import asyncio
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["DEBUG"] = "False"
+
+GEMINI_RESPONSE = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": "Comprei energia elétrica por 189.90"}]}}]
+}).encode()
+CHUNK = 64 * 1024
+
+
+def serve(size: int):
+    """
+    Processo servidor: Uazapi (/message/download e /files/<id>) e Gemini falsos
+    """
+    document = os.urandom(size)
+    encoded = json.dumps({"base64Data": base64.b64encode(document).decode(), "mimetype": "application/pdf"}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _read_body(self) -> bytes:
+            # Corpo lido em pedaços e descartado (requisições ao Gemini)
+            remaining = int(self.headers.get("Content-Length", 0))
+            first = b""
+            while remaining:
+                chunk = self.rfile.read(min(CHUNK, remaining))
+                first = first or chunk
+                remaining -= len(chunk)
+            return first
+
+        def _send(self, body: bytes, content_type: str = "application/json"):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for start in range(0, len(body), CHUNK):
+                self.wfile.write(body[start:start + CHUNK])
+
+        def do_POST(self):
+            body = self._read_body()
+            if self.path == "/message/download":
+                request = json.loads(body)
+                if request.get("return_base64"):
+                    self._send(encoded)
+                else:
+                    port = self.server.server_address[1]
+                    self._send(json.dumps({
+                        "fileURL": f"http://127.0.0.1:{port}/files/{request['id']}.pdf",
+                        "mimetype": "application/pdf"
+                    }).encode())
+            else:
+                self._send(GEMINI_RESPONSE)
+
+        def do_GET(self):
+            self._send(document, "application/pdf")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    print(server.server_address[1], flush=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sys.stdin.read()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_client(mode: str, port: int, documents: int) -> dict:
+    from loguru import logger
+    from app.integrations.gemini_client import gemini_client
+    from app.integrations.uazapi import uazapi_client
+    from app.services.message_processor import message_processor
+
+    logger.remove()
+    base_url = f"http://127.0.0.1:{port}"
+    uazapi_client.base_url = base_url
+    gemini_client.base_url = f"{base_url}/v1beta"
+
+    async def before(message_id: str) -> str:
+        """Implementação anterior de process_document"""
+        media_data = await uazapi_client.download_media(message_id=message_id, return_base64=True)
+        return await gemini_client.analyze_document(
+            document_base64=media_data.get("base64Data"),
+            mime_type=media_data.get("mimetype", "application/pdf")
+        )
+
+    async def after(message_id: str) -> str:
+        return await message_processor.process_document({}, message_id)
+
+    process = before if mode == "antes" else after
+
+    # Inicializa clientes e conexões antes da medição
+    await uazapi_client.start()
+    await gemini_client.start()
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(process(f"doc-{i}") for i in range(documents)))
+    elapsed = time.perf_counter() - start
+
+    assert all("189.90" in result for result in results), results[0]
+    return {"peak_mb": peak_rss_mb() - baseline, "seconds": elapsed}
+
+
+def main():
+    if sys.argv[1:2] == ["--serve"]:
+        serve(int(sys.argv[2]))
+        return
+    if sys.argv[1:2] == ["--client"]:
+        result = asyncio.run(run_client(sys.argv[2], int(sys.argv[3]), int(sys.argv[4])))
+        print(json.dumps(result))
+        return
+
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(int(size_mb * 1024 * 1024))],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    port = int(server.stdout.readline())
+
+    print(f"{documents} documentos de {size_mb:g} MB em paralelo\n")
+    print(f"{'':<10}{'pico de RSS':>14}{'tempo':>10}")
+    try:
+        for mode in ("antes", "depois"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--client", mode, str(port), str(documents)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<10}{result['peak_mb']:>11.0f} MB{result['seconds']:>8.2f} s")
+    finally:
+        server.stdin.close()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
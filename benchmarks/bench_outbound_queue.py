@@ -0,0 +1,197 @@
+"""
+Benchmark: vazão da fila de saída contra uma Uazapi falsa local
+
+Sobe um servidor que imita POST /send/text (com uma fração de respostas 503)
+e compara:
+- envio direto: send_text por mensagem, como fazia o BackgroundTasks
+  (falhas são perdidas)
+- fila de saída sem limite de taxa: vazão do dispatcher (reserva em lote
+  FIFO por destinatário, envio e novas tentativas), com o tempo de
+  enfileirar medido à parte
+- fila de saída com limite por instância: taxa observada x configurada
+
+Confere que nenhuma mensagem se perde e que a ordem por destinatário é mantida.
+
+Execute: python benchmarks/bench_outbound_queue.py [mensagens] [destinatarios] [taxa_de_falha]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["DEBUG"] = "False"
+
+from loguru import logger  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.metrics import metrics  # noqa: E402
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.integrations.uazapi import uazapi_client  # noqa: E402
+from app.services.outbound_queue import OutboundDispatcher, outbound_queue  # noqa: E402
+
+RESPONSE = json.dumps({"status": "success", "messageid": "bench"}).encode()
+
+
+class FakeUazapi(BaseHTTPRequestHandler):
+    """Responde como a Uazapi; uma fração das chamadas recebe 503"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    failure_rate = 0.0
+    received = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if random.random() < self.failure_rate:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        with self.lock:
+            self.received.append((time.perf_counter(), payload["number"], payload["text"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUazapi)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def build_messages(total: int, recipients: int) -> list:
+    return [(f"55000000{i % recipients:05d}@s.whatsapp.net", f"Resposta {i}") for i in range(total)]
+
+
+def check_delivery(messages: list) -> tuple:
+    """
+    Returns:
+        (mensagens entregues, destinatários fora de ordem)
+    """
+    expected = defaultdict(list)
+    for jid, text in messages:
+        expected[jid.split("@")[0]].append(text)
+
+    delivered = defaultdict(list)
+    for _, number, text in FakeUazapi.received:
+        # Reentrega at-least-once: ignora repetição consecutiva
+        if not delivered[number] or delivered[number][-1] != text:
+            delivered[number].append(text)
+
+    out_of_order = sum(1 for number, texts in expected.items() if delivered[number] != texts)
+    return sum(len(texts) for texts in delivered.values()), out_of_order
+
+
+async def send_direct(messages: list, concurrency: int) -> float:
+    """Implementação anterior: um send_text por resposta, falhas descartadas"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(jid: str, text: str):
+        async with semaphore:
+            try:
+                await uazapi_client.send_text(jid, text)
+            except Exception:
+                pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(jid, text) for jid, text in messages))
+    return time.perf_counter() - start
+
+
+async def send_queued(messages: list) -> float:
+    """Enfileira tudo e mede o tempo do dispatcher para esvaziar a fila"""
+    db = SessionLocal()
+    start = time.perf_counter()
+    for jid, text in messages:
+        outbound_queue.enqueue(db, jid, text)
+    print(f"  (enfileirar: {(time.perf_counter() - start) * 1000 / len(messages):.2f} ms por resposta)")
+    db.close()
+
+    sent_before = metrics.get("outbound.sent")
+    dispatcher = OutboundDispatcher()
+    start = time.perf_counter()
+    await dispatcher.start()
+
+    while metrics.get("outbound.sent") - sent_before < len(messages):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    await dispatcher.stop()
+    return elapsed
+
+
+def report(name: str, messages: list, elapsed: float):
+    delivered, out_of_order = check_delivery(messages)
+    print(f"{name:<32}{len(messages) / elapsed:>9.0f} msg/s{delivered:>8}/{len(messages)}{out_of_order:>14}")
+
+
+async def run(total: int, recipients: int):
+    messages = build_messages(total, recipients)
+
+    print(f"{'':<32}{'vazão':>15}{'entregues':>14}{'fora de ordem':>14}")
+
+    FakeUazapi.received.clear()
+    report("envio direto", messages, await send_direct(messages, settings.OUTBOUND_WORKERS))
+
+    # Fila sem limite de taxa
+    settings.OUTBOUND_RATE_PER_SECOND = 0
+    settings.OUTBOUND_RECIPIENT_RATE_PER_SECOND = 0
+    FakeUazapi.received.clear()
+    report("fila de saída (sem limite)", messages, await send_queued(messages))
+
+    # Fila com limite por instância: taxa observada no servidor
+    rate = 100
+    settings.OUTBOUND_RATE_PER_SECOND = rate
+    settings.OUTBOUND_BURST = 10
+    FakeUazapi.received.clear()
+    elapsed = await send_queued(messages)
+    report(f"fila de saída ({rate} msg/s)", messages, elapsed)
+
+    times = sorted(t for t, _, _ in FakeUazapi.received)
+    print(f"\nTaxa observada no servidor com limite de {rate} msg/s: "
+          f"{(len(times) - 1) / (times[-1] - times[0]):.0f} msg/s")
+    print(f"Novas tentativas: {metrics.get('outbound.retries'):.0f}, dead-letter: {metrics.get('outbound.dead'):.0f}")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    recipients = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    FakeUazapi.failure_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+    logger.remove()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    uazapi_client.base_url = start_stub()
+    settings.OUTBOUND_RETRY_BACKOFF_SECONDS = 0.05
+    settings.OUTBOUND_POLL_INTERVAL_SECONDS = 0.05
+
+    print(f"{total} respostas para {recipients} destinatários, "
+          f"{FakeUazapi.failure_rate:.0%} de respostas 503, {settings.OUTBOUND_WORKERS} workers\n")
+    asyncio.run(run(total, recipients))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: latência da página 1 x página 1000 em GET /api/transactions
+
+Compara a paginação por offset (TransactionService.get_all) com a paginação
+por keyset em (transaction_date, id) (TransactionService.get_page) para um
+usuário com muitas transações. Para o keyset, o cursor da página 1000 é
+obtido previamente (como faria um cliente navegando página a página).
+
+Execute: python benchmarks/bench_pagination.py [transacoes] [tamanho_pagina]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.models import User, Transaction  # noqa: E402
+from app.services.transaction_service import transaction_service  # noqa: E402
+
+REPEAT = 20
+
+
+def seed(db, user: User, count: int):
+    start = date(2020, 1, 1)
+    rows = [
+        {
+            "user_id": user.id,
+            "title": f"Seed {i}",
+            "amount": 10.0 + i % 100,
+            "transaction_type": "income" if i % 5 == 0 else "expense",
+            # Várias transações por dia (empates em transaction_date)
+            "transaction_date": start + timedelta(days=i // 40),
+        }
+        for i in range(count)
+    ]
+    for offset in range(0, count, 10000):
+        db.execute(insert(Transaction), rows[offset:offset + 10000])
+    db.commit()
+
+
+def measure(fn) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    deep_page = 1000
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    user = User(remote_jid="5500000000000@s.whatsapp.net", name="Bench", is_active=True)
+    db.add(user)
+    db.commit()
+
+    seed(db, user, count)
+    print(f"Usuário com {count} transações, páginas de {page_size}\n")
+
+    # Cursor da página 1000: última transação da página 999
+    previous = transaction_service.get_all(db, user, limit=1, offset=(deep_page - 1) * page_size - 1)[0]
+    deep_cursor = transaction_service.encode_cursor(previous)
+
+    offset_first = measure(lambda: transaction_service.get_all(db, user, limit=page_size))
+    offset_deep = measure(lambda: transaction_service.get_all(db, user, limit=page_size, offset=(deep_page - 1) * page_size))
+    keyset_first = measure(lambda: transaction_service.get_page(db, user, page_size))
+    keyset_deep = measure(lambda: transaction_service.get_page(db, user, page_size, deep_cursor))
+
+    # As duas estratégias devem devolver a mesma página
+    by_offset = [t.id for t in transaction_service.get_all(db, user, limit=page_size, offset=(deep_page - 1) * page_size)]
+    by_keyset = [t.id for t in transaction_service.get_page(db, user, page_size, deep_cursor)[0]]
+    assert by_offset == by_keyset, "offset e keyset devolveram páginas diferentes"
+
+    print(f"{'':<10}{'página 1':>12}{f'página {deep_page}':>16}")
+    print(f"{'offset':<10}{offset_first:>9.2f} ms{offset_deep:>13.2f} ms")
+    print(f"{'keyset':<10}{keyset_first:>9.2f} ms{keyset_deep:>13.2f} ms")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: importação de extrato CSV com 100k linhas
+
+Gera um extrato sintético no formato de bancos brasileiros (separador ";",
+valores "1.234,56", datas DD/MM/YYYY), importa via StatementImportService
+(parse, categorização local, lotes com um commit cada) e importa o mesmo
+arquivo de novo para medir a detecção de duplicatas.
+
+Execute: python benchmarks/bench_statement_import.py [linhas]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.db.init_db import create_default_categories  # noqa: E402
+from app.models import User, Wallet  # noqa: E402
+from app.services.statement_import import statement_import  # noqa: E402
+from app.services.wallet_reconciliation import wallet_reconciliation  # noqa: E402
+from app.services.monthly_aggregates import monthly_aggregates  # noqa: E402
+
+DESCRIPTIONS = [
+    "Supermercado Extra", "Uber *Viagem", "Farmacia Drogasil", "Netflix.com",
+    "Pagamento Aluguel", "Posto Shell Gasolina", "Salario Empresa", "Restaurante Sabor",
+    "Pix recebido Joao", "Livraria Cultura",
+]
+
+
+def build_csv(count: int) -> bytes:
+    start = date(2020, 1, 1)
+    lines = ["Data;Descrição;Valor"]
+    for i in range(count):
+        description = DESCRIPTIONS[i % len(DESCRIPTIONS)]
+        value = 10 + (i * 37) % 5000 + (i % 100) / 100
+        sign = "" if description.startswith(("Salario", "Pix recebido")) else "-"
+        amount = f"{sign}{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        lines.append(f"{(start + timedelta(days=i // 50)).strftime('%d/%m/%Y')};{description} {i};{amount}")
+    return "\n".join(lines).encode("utf-8")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    create_default_categories(db)
+    user = User(remote_jid="5500000000000@s.whatsapp.net", name="Bench", is_active=True)
+    db.add(user)
+    db.commit()
+    db.add(Wallet(user_id=user.id, name="Principal", current_balance=0.0, is_default=True))
+    db.commit()
+
+    content = build_csv(count)
+    print(f"Extrato com {count} linhas ({len(content) / 1e6:.1f} MB)\n")
+
+    start = time.perf_counter()
+    result = statement_import.import_file(db, user, "extrato.csv", content)
+    elapsed = time.perf_counter() - start
+    print(f"Importação:  {elapsed:6.2f}s  ({result.inserted / elapsed:,.0f} linhas/s) "
+          f"inseridas={result.inserted} erros={len(result.errors)}")
+
+    start = time.perf_counter()
+    again = statement_import.import_file(db, user, "extrato.csv", content)
+    elapsed = time.perf_counter() - start
+    print(f"Reimportação: {elapsed:5.2f}s  inseridas={again.inserted} duplicadas={len(again.duplicates)}")
+
+    drifts = wallet_reconciliation.find_drift(db)
+    inconsistent = monthly_aggregates.check_consistency(db)
+    print(f"\nSaldo divergente: {len(drifts)}  Rollup divergente: {len(inconsistent)}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: latência de envio pela Uazapi, cliente por chamada x pool compartilhado
+
+Sobe um servidor local que imita POST /send/text e mede p50/p99 de:
+- antes: um httpx.AsyncClient novo por chamada (nova conexão TCP/TLS a cada envio)
+- depois: UazapiClient com o cliente compartilhado (conexões reutilizadas)
+
+Com --tls o servidor usa HTTPS com certificado autoassinado (gerado com o
+openssl), que é o cenário real: cada conexão nova paga o handshake TLS.
+
+Execute: python benchmarks/bench_uazapi_client.py [envios] [concorrencia] [--tls]
+"""
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["DEBUG"] = "False"
+
+import httpx  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from app.integrations.uazapi import UazapiClient  # noqa: E402
+
+RESPONSE = json.dumps({"status": "success", "messageid": "bench"}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Responde como a Uazapi, mantendo a conexão aberta (HTTP/1.1)"""
+    protocol_version = "HTTP/1.1"
+    # Cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY o ACK
+    # atrasado adicionaria ~40 ms a cada resposta
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(tls: bool) -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    scheme = "http"
+
+    if tls:
+        directory = tempfile.mkdtemp()
+        cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+            check=True, capture_output=True
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        # Clientes httpx confiam no certificado autoassinado
+        os.environ["SSL_CERT_FILE"] = cert
+        scheme = "https"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+
+async def send_text_per_call(base_url: str, number: str, text: str):
+    """Implementação anterior: um cliente novo a cada envio"""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{base_url}/send/text",
+            headers={"token": "bench", "Accept": "application/json", "Content-Type": "application/json"},
+            json={"number": number, "text": text, "readchat": "true", "linkPreview": "true"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+async def measure(send, total: int, concurrency: int) -> list:
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await send("5500000000000", f"Mensagem {i}")
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return samples
+
+
+def percentile(samples: list, p: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(p) - 1]
+
+
+async def run(base_url: str, total: int, concurrency: int):
+    before = await measure(lambda n, t: send_text_per_call(base_url, n, t), total, concurrency)
+
+    client = UazapiClient()
+    client.base_url = base_url
+    await client.start()
+    after = await measure(client.send_text, total, concurrency)
+    await client.stop()
+
+    print(f"{'':<24}{'p50':>10}{'p99':>10}")
+    for name, samples in (("cliente por chamada", before), ("cliente compartilhado", after)):
+        print(f"{name:<24}{percentile(samples, 50):>7.2f} ms{percentile(samples, 99):>7.2f} ms")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    total = int(args[0]) if args else 500
+    concurrency = int(args[1]) if len(args) > 1 else 4
+    tls = "--tls" in sys.argv
+
+    logger.remove()
+    base_url = start_stub(tls)
+    print(f"Servidor stub em {base_url}: {total} envios, concorrência {concurrency}\n")
+    asyncio.run(run(base_url, total, concurrency))
+
+
+if __name__ == "__main__":
+    main()
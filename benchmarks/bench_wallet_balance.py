@@ -0,0 +1,122 @@
+"""
+Benchmark: latência de escrita de transações em uma carteira com 100k transações
+
+Compara o recálculo completo do saldo (soma de todas as transações da
+carteira a cada escrita, comportamento anterior) com o incremento atômico
+usado pelo TransactionService. Ao final executa a conferência de saldos
+(app.services.wallet_reconciliation) para confirmar que não há divergência.
+
+Execute: python benchmarks/bench_wallet_balance.py [transacoes] [escritas]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.models import User, Wallet, Transaction  # noqa: E402
+from app.schemas.transaction import TransactionCreate  # noqa: E402
+from app.services.transaction_service import transaction_service  # noqa: E402
+from app.services.wallet_reconciliation import wallet_reconciliation  # noqa: E402
+
+
+def full_recompute(db, wallet_id: int):
+    """Recálculo completo do saldo (implementação anterior)"""
+    wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
+    transactions = db.query(Transaction).filter(Transaction.wallet_id == wallet_id).all()
+    total = sum(t.amount if t.transaction_type == "income" else -t.amount for t in transactions)
+    wallet.current_balance = total
+    db.commit()
+
+
+def seed(db, user: User, wallet: Wallet, count: int):
+    rows = [
+        {
+            "user_id": user.id,
+            "wallet_id": wallet.id,
+            "title": f"Seed {i}",
+            "amount": 10.0 + i % 100,
+            "transaction_type": "income" if i % 5 == 0 else "expense",
+            "transaction_date": date(2026, 1 + i % 12, 1 + i % 28),
+        }
+        for i in range(count)
+    ]
+    for start in range(0, count, 10000):
+        db.execute(insert(Transaction), rows[start:start + 10000])
+    wallet.current_balance = sum(r["amount"] if r["transaction_type"] == "income" else -r["amount"] for r in rows)
+    db.commit()
+
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} média {statistics.mean(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    user = User(remote_jid="5500000000000@s.whatsapp.net", name="Bench", is_active=True)
+    db.add(user)
+    db.commit()
+    wallet = Wallet(user_id=user.id, name="Principal", current_balance=0.0, is_default=True)
+    db.add(wallet)
+    db.commit()
+
+    seed(db, user, wallet, count)
+    print(f"Carteira com {count} transações\n")
+
+    data = TransactionCreate(
+        title="Bench", amount=12.34, transaction_type="expense",
+        transaction_date=date(2026, 10, 1), wallet_id=wallet.id
+    )
+
+    # Recálculo completo: cria a transação e soma a carteira inteira
+    recompute = []
+    for _ in range(writes):
+        start = time.perf_counter()
+        transaction = Transaction(user_id=user.id, wallet_id=wallet.id, title=data.title, amount=data.amount,
+                                  transaction_type=data.transaction_type, transaction_date=data.transaction_date)
+        db.add(transaction)
+        db.commit()
+        full_recompute(db, wallet.id)
+        recompute.append((time.perf_counter() - start) * 1000)
+
+    # Incremento atômico (TransactionService)
+    delta = []
+    for _ in range(writes):
+        start = time.perf_counter()
+        transaction_service.create(db, user, data)
+        delta.append((time.perf_counter() - start) * 1000)
+
+    report("Recálculo completo", recompute)
+    report("Incremento atômico", delta)
+
+    start = time.perf_counter()
+    drifts = wallet_reconciliation.run(db)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"\nConferência de saldos: {elapsed:.2f} ms, {len(drifts)} divergência(s)")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
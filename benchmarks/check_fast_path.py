@@ -0,0 +1,79 @@
+"""
+Verificação do parser do fast path (app.services.fast_path.FastPathParser)
+
+Frases com o resultado esperado: tipo e valor quando o fast path deve
+registrar sozinho, ou None quando a mensagem precisa seguir para o agente
+(valores com quantificador, vários números, perguntas, listas).
+
+Execute: python benchmarks/check_fast_path.py
+
+Sai com código 1 se alguma frase for interpretada diferente do esperado.
+"""
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["DEBUG"] = "False"
+
+from app.core.config import settings  # noqa: E402
+from app.services.fast_path import FastPathParser  # noqa: E402
+
+TODAY = date(2026, 10, 18)
+
+CASES = [
+    # Registradas pelo fast path: (tipo, valor)
+    ("gastei 45,90 no mercado", ("expense", 45.90)),
+    ("paguei R$ 1.234,56 de aluguel", ("expense", 1234.56)),
+    ("recebi 3000 de salário ontem", ("income", 3000.0)),
+    ("gastei 50 reais na farmácia no pix", ("expense", 50.0)),
+    ("comprei tênis por 299,9 dia 5", ("expense", 299.90)),
+    ("paguei 120 de luz 05/10", ("expense", 120.0)),
+    ("recebi 5 mil de salário", ("income", 5000.0)),
+    ("recebi 2,5 mil de freela", ("income", 2500.0)),
+    ("ganhei 3 k de rendimentos", ("income", 3000.0)),
+    ("gastei 5k no mercado", ("expense", 5000.0)),
+    ("recebi 2mil de freela", ("income", 2000.0)),
+
+    # Seguem para o agente
+    ("recebi 10% de desconto no mercado", None),
+    ("paguei 3 x de 100 no cartão de crédito", None),
+    ("comprei tv em 10 vezes no cartão", None),
+    ("comprei 2 pizzas por 90", None),
+    ("recebi 2 milhões de herança", None),
+    ("comprei geladeira em 10x no cartão", None),
+    ("gastei 50 no mercado e 30 na farmácia", None),
+    ("quanto gastei no mercado?", None),
+    ("não gastei 50 no mercado", None),
+    ("gastei no mercado", None),
+]
+
+
+def main():
+    failures = 0
+    for text, expected in CASES:
+        parsed = FastPathParser.parse(text, today=TODAY)
+        if parsed and parsed.confidence < settings.FAST_PATH_MIN_CONFIDENCE:
+            parsed = None
+        result = (parsed.transaction_type, parsed.amount) if parsed else None
+
+        ok = result == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {text:<45} {result}" + ("" if ok else f" (esperado {expected})"))
+
+    if failures:
+        print(f"\n{failures} frase(s) interpretadas de forma errada")
+        sys.exit(1)
+    print(f"\n{len(CASES)} frases conferidas")
+
+
+if __name__ == "__main__":
+    main()
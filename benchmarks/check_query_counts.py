@@ -0,0 +1,137 @@
+"""
+Verificação de N+1: quantidade de consultas SQL por endpoint/tool
+
+Executa os endpoints de gráficos, dashboard e transações e as tools de
+relatório/listagem do agente com um mês de 10 e de 500 transações,
+contando as consultas com app.db.query_counter.QueryCounter. A quantidade
+deve ser a mesma nos dois cenários (limitada, independente do volume).
+
+Execute: python benchmarks/check_query_counts.py
+
+Sai com código 1 se alguma consulta cresce com o número de transações.
+"""
+import asyncio
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.db.init_db import create_default_categories, create_default_payment_methods  # noqa: E402
+from app.db.query_counter import QueryCounter  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User, Wallet  # noqa: E402
+from app.schemas.transaction import TransactionCreate  # noqa: E402
+from app.services.langgraph_tools import get_all_tools  # noqa: E402
+from app.services.advanced_tools import get_advanced_tools  # noqa: E402
+from app.services.tool_runtime import ToolContext, ToolRuntime  # noqa: E402
+from app.services.transaction_service import transaction_service  # noqa: E402
+
+API_KEY = "bench-api-key"
+
+
+def seed(count: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    create_default_categories(db)
+    create_default_payment_methods(db)
+
+    user = User(remote_jid="5500000000000@s.whatsapp.net", name="Bench", is_active=True, api_key=API_KEY)
+    db.add(user)
+    db.commit()
+    db.add(Wallet(user_id=user.id, name="Principal", current_balance=0.0, is_default=True))
+    db.commit()
+
+    today = date.today()
+    transaction_service.create_many(db, user, [
+        TransactionCreate(
+            title=f"Transação {i}",
+            amount=10.0 + i,
+            transaction_type="income" if i % 4 == 0 else "expense",
+            transaction_date=date(today.year, today.month, 1 + i % 28),
+            category_id=1 + i % 11,
+            payment_method_id=1 + i % 6
+        )
+        for i in range(count)
+    ])
+    db.close()
+
+
+def count_queries(count: int) -> dict:
+    seed(count)
+    today = date.today()
+    month_start = date(today.year, today.month, 1).isoformat()
+
+    client = TestClient(app)
+    headers = {"apikey": API_KEY}
+    endpoints = {
+        "GET /api/charts/pizza": "/api/charts/pizza",
+        "GET /api/charts/bar": "/api/charts/bar",
+        "GET /api/charts/series": "/api/charts/series?agrupamento=week",
+        "GET /api/dashboard/summary": "/api/dashboard/summary",
+        "GET /api/transactions/recent": "/api/transactions/recent?limit=100",
+        "GET /api/transactions": "/api/transactions/?limit=100",
+    }
+
+    counts = {}
+    for name, url in endpoints.items():
+        with QueryCounter() as counter:
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200, f"{name}: {response.status_code}"
+        # Zero consultas indica contador quebrado, não endpoint sem banco
+        assert counter.count > 0, f"{name}: nenhuma consulta contada"
+        counts[name] = counter.count
+
+    tool_calls = {
+        "tool transacoes_recentes": ("transacoes_recentes", {"limite": 100}),
+        "tool resumo_mes_atual": ("resumo_mes_atual", {}),
+        "tool relatorio_detalhado": ("relatorio_detalhado", {"data_inicio": month_start, "data_fim": today.isoformat()}),
+    }
+
+    runtime = ToolRuntime(get_all_tools() + get_advanced_tools())
+    db = SessionLocal()
+    user = db.query(User).filter(User.api_key == API_KEY).first()
+    for name, (tool, args) in tool_calls.items():
+        # Um ToolContext novo por chamada (como em um turno do agente)
+        context = ToolContext(db=db, user_id=user.id, user=user)
+        with QueryCounter() as counter:
+            asyncio.run(runtime.execute([{"name": tool, "args": args, "id": name}], context))
+        assert counter.count > 0, f"{name}: nenhuma consulta contada"
+        counts[name] = counter.count
+    db.close()
+
+    return counts
+
+
+def main():
+    small = count_queries(10)
+    large = count_queries(500)
+
+    failures = 0
+    print(f"{'':<32}{'10 transações':>16}{'500 transações':>16}")
+    for name in small:
+        ok = large[name] == small[name]
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {name:<30}{small[name]:>16}{large[name]:>16}")
+
+    if failures:
+        print(f"\n{failures} caminho(s) com consultas proporcionais ao volume (N+1)")
+        sys.exit(1)
+    print("\nNenhum N+1: consultas limitadas em todos os caminhos")
+
+
+if __name__ == "__main__":
+    main()
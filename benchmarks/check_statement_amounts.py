@@ -0,0 +1,71 @@
+"""
+Verificação dos valores do importador de extratos (app.services.statement_import._parse_amount)
+
+Formatos brasileiro e americano com o resultado esperado, ou None quando o
+valor é ambíguo ou inválido e a linha deve ser reportada como erro.
+
+Execute: python benchmarks/check_statement_amounts.py
+
+Sai com código 1 se algum valor for interpretado diferente do esperado.
+"""
+import os
+import sys
+
+sys.path.insert(0, ".")
+
+# Valores mínimos para carregar as configurações sem .env
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("UAZAPI_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("UAZAPI_TOKEN", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ["DEBUG"] = "False"
+
+from app.services.statement_import import _parse_amount  # noqa: E402
+
+CASES = [
+    # Formato brasileiro
+    ("1.234,56", 1234.56),
+    ("-45,90", -45.90),
+    ("R$ 10", 10.0),
+    ("1.234", 1234.0),
+    ("1.234.567", 1234567.0),
+    ("12,5", 12.5),
+    ("(1.500,00)", -1500.0),
+
+    # Formato americano (OFX)
+    ("1,234.56", 1234.56),
+    ("-45.90", -45.90),
+    ("1,234,567", 1234567.0),
+    ("10.5", 10.5),
+
+    # Ambíguos ou inválidos
+    ("1,234", None),
+    ("1.23.456", None),
+    ("12.34,5.6", None),
+    ("abc", None),
+    ("0,00", None),
+]
+
+
+def main():
+    failures = 0
+    for text, expected in CASES:
+        try:
+            result = _parse_amount(text)
+        except ValueError:
+            result = None
+
+        ok = result == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {text:<15} {result}" + ("" if ok else f" (esperado {expected})"))
+
+    if failures:
+        print(f"\n{failures} valor(es) interpretados de forma errada")
+        sys.exit(1)
+    print(f"\n{len(CASES)} valores conferidos")
+
+
+if __name__ == "__main__":
+    main()